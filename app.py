@@ -1,10 +1,27 @@
 import streamlit as st
-import requests
+import pandas as pd
+import os
+import sys
 import json
 import time
-import random
+import joblib
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from streamlit_lottie import st_lottie
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from bulk_scoring import (NO_FAILURE, FallbackChunkScorer, local_chunk_scorer, read_telemetry, remote_chunk_scorer,
+                          score_in_chunks, validate_readings)
+from drift_monitor import DriftMonitor, load_reference
+from explanations import BASE_VALUE, EXPLAINED_CLASS, main_drivers
+from features import RAW_COLUMNS
+from local_scorer import HotSwapScorer
+from metrics_store import MetricsStore
+from model_registry import resolve_model_dir, version_dir
+from prediction_cache import PredictionCache
+from scoring_client import IAM_URL, CircuitBreaker, RemoteUnavailable, WMLClient
+from streaming_features import add_window_features, engine_for
+
 # ==============================================================================
 # --- Page Configuration ---
 # ==============================================================================
@@ -421,41 +438,417 @@ ENHANCED_LOTTIE_DATA = {
 # ==============================================================================
 # --- API Configuration ---
 # ==============================================================================
-WML_API_KEY = "9rTun65cAZVA-Rx1K0Lb29EjGe5CDr89OcGI9GhV7jq1"
-WML_ENDPOINT_URL = "https://us-south.ml.cloud.ibm.com/ml/v4/deployments/failure_prediction_service/predictions?version=2021-05-01"
+# Environment variables override the defaults, e.g. to use scripts/mock_wml_server.py
+WML_API_KEY = os.environ.get("WML_API_KEY", "9rTun65cAZVA-Rx1K0Lb29EjGe5CDr89OcGI9GhV7jq1")
+WML_ENDPOINT_URL = os.environ.get("WML_ENDPOINT_URL", "https://us-south.ml.cloud.ibm.com/ml/v4/deployments/failure_prediction_service/predictions?version=2021-05-01")
+WML_IAM_URL = os.environ.get("WML_IAM_URL", IAM_URL)
+
+# Remote calls: seconds per attempt and per prediction (retries included).
+# WML_HEDGE_AFTER (seconds) duplicates attempts slower than that; unset disables hedging.
+WML_TIMEOUT = float(os.environ.get("WML_TIMEOUT", "3"))
+WML_DEADLINE = float(os.environ.get("WML_DEADLINE", "8"))
+WML_HEDGE_AFTER = float(os.environ["WML_HEDGE_AFTER"]) if os.environ.get("WML_HEDGE_AFTER") else None
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# DRIFT_MONITOR=1 compares every scored reading with the training distribution
+# (needs models/drift_reference.pkl, saved by the training pipeline)
+DRIFT_MONITOR = os.environ.get("DRIFT_MONITOR", "").lower() in ("1", "true", "yes")
+
+# Flagged rows of an uploaded file explained, riskiest first (exact contributions
+# cost about 12 ms per reading on one core)
+BULK_EXPLAIN_LIMIT = 500
 
+# Display details per failure type
+FAILURE_DISPLAY = {
+    "Heat Dissipation Failure": {"text": "Heat Dissipation Failure", "type": "warn", "icon": "🔥", "desc": "Thermal management issue detected"},
+    "No Failure": {"text": "System Nominal", "type": "success", "icon": "✅", "desc": "All systems operating within normal parameters"},
+    "Overstrain Failure": {"text": "Overstrain Failure", "type": "warn", "icon": "⚡", "desc": "Mechanical stress beyond tolerance limits"},
+    "Power Failure": {"text": "Power Failure", "type": "fail", "icon": "🔌", "desc": "Electrical system malfunction detected"},
+    "Random Failure": {"text": "Random Failure", "type": "warn", "icon": "❓", "desc": "Unexpected anomaly requiring investigation"},
+    "Tool Wear Failure": {"text": "Tool Wear Failure", "type": "fail", "icon": "🔧", "desc": "Tool degradation beyond operational limits"}
+}
+
+# Class order of the remote WML deployment's prediction codes
 LABEL_MAPPING = {
-    0: {"text": "Heat Dissipation Failure", "type": "warn", "icon": "🔥", "desc": "Thermal management issue detected"},
-    1: {"text": "System Nominal", "type": "success", "icon": "✅", "desc": "All systems operating within normal parameters"},
-    2: {"text": "Overstrain Failure", "type": "warn", "icon": "⚡", "desc": "Mechanical stress beyond tolerance limits"},
-    3: {"text": "Power Failure", "type": "fail", "icon": "🔌", "desc": "Electrical system malfunction detected"},
-    4: {"text": "Random Failure", "type": "warn", "icon": "❓", "desc": "Unexpected anomaly requiring investigation"},
-    5: {"text": "Tool Wear Failure", "type": "fail", "icon": "🔧", "desc": "Tool degradation beyond operational limits"}
+    0: "Heat Dissipation Failure",
+    1: "No Failure",
+    2: "Overstrain Failure",
+    3: "Power Failure",
+    4: "Random Failure",
+    5: "Tool Wear Failure"
 }
 
-@st.cache_data(ttl=3600)
-def get_wml_token(api_key):
-    """Enhanced token retrieval with error handling"""
-    url = "https://iam.cloud.ibm.com/identity/token"
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    data = f"grant_type=urn:ibm:params:oauth:grant-type:apikey&apikey={api_key}"
-    response = requests.post(url, headers=headers, data=data)
-    response.raise_for_status()
-    return response.json()["access_token"]
-
-def call_prediction_api(endpoint_url, token, input_data):
-    """Enhanced API call with better error handling"""
-    headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'}
-    payload = {
-        "input_data": [{
-            "fields": ["Type", "Air temperature [K]", "Process temperature [K]", "Rotational speed [rpm]", "Torque [Nm]", "Tool wear [min]"],
-            "values": [input_data]
-        }]
-    }
-    response = requests.post(endpoint_url, headers=headers, json=payload)
-    response.raise_for_status()
-    prediction = response.json()['predictions'][0]['values'][0][0]
-    return prediction
+LOCAL_BACKEND = "🖥️ Local model"
+REMOTE_BACKEND = "☁️ IBM Watson ML"
+
+@st.cache_resource
+def get_local_scorer(model_path):
+    """
+    Saved model artifacts, loaded once per server process
+
+    A newly published model version is loaded in the background and takes
+    over once warmed up, without restarting the app.
+    """
+    return HotSwapScorer(model_path)
+
+@st.cache_resource
+def get_scoring_client(endpoint_url, api_key, iam_url):
+    """
+    One pooled client per server process; its token is refreshed in the background
+
+    Its circuit breaker is shared by all sessions: after 5 failed predictions in
+    a row the deployment is left alone for 30 s and callers fall back at once.
+    """
+    return WMLClient(endpoint_url, api_key=api_key, iam_url=iam_url, timeout=WML_TIMEOUT,
+                     deadline=WML_DEADLINE, breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30),
+                     hedge_after=WML_HEDGE_AFTER)
+
+@st.cache_resource
+def get_prediction_executor():
+    """Worker threads shared by all sessions, so predictions never block a script run"""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="prediction")
+
+@st.cache_resource
+def get_metrics_store():
+    """Rolling latency/error telemetry of every prediction served by this process"""
+    return MetricsStore()
+
+@st.cache_resource
+def get_prediction_cache():
+    """Results of recent single predictions, keyed by backend and input values"""
+    return PredictionCache(maxsize=4096)
+
+@st.cache_resource
+def get_version_drift_monitor(model_path, version):
+    """Streaming input histograms against one model version's reference (None when it has none)"""
+    reference = load_reference(version_dir(model_path, version) if version else model_path)
+    return DriftMonitor(reference) if reference is not None else None
+
+def get_drift_monitor(model_path):
+    """
+    Drift monitor of the model version being served (None when disabled or no reference is saved)
+
+    Keyed on the local scorer's version, so after a hot swap readings are
+    compared with the new version's training data.
+    """
+    if not DRIFT_MONITOR:
+        return None
+    return get_version_drift_monitor(model_path, get_local_scorer(model_path).version)
+
+@st.cache_data
+def get_model_metadata(model_path):
+    """Training metadata of the deployed model (None when no model has been saved)"""
+    try:
+        return joblib.load(os.path.join(model_path, 'model_metadata.pkl'))
+    except FileNotFoundError:
+        return None
+
+def call_prediction_api(client, input_data):
+    """(failure type, probabilities or None) for one reading, over the client's keep-alive session"""
+    row = client.predict([input_data])[0]
+    failure_type = LABEL_MAPPING[row[0]]
+    probabilities = dict(zip(LABEL_MAPPING.values(), row[1])) if len(row) > 1 else None
+    return failure_type, probabilities
+
+class LocalBackend:
+    """Bundled models/ artifacts scored in this process"""
+    name = "local"
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+        # Model version answering this prediction, so cached results never outlive a model swap
+        self.version = scorer.version
+
+    def predict(self, input_values, set_stage):
+        set_stage("scoring")
+        return self.scorer.predict_one(input_values)
+
+class RemoteBackend:
+    """
+    IBM Watson ML deployment (or a stand-in at WML_ENDPOINT_URL)
+
+    When the deployment is unavailable (deadline passed, retries exhausted or
+    circuit open) and a fallback scorer is given, the local model answers and
+    fallback_reason says why.
+    """
+    name = "remote"
+
+    def __init__(self, client, fallback=None):
+        self.client = client
+        self.fallback = fallback
+        self.fallback_reason = None
+
+    def predict(self, input_values, set_stage):
+        try:
+            set_stage("authenticating")
+            self.client.warm_up()
+            set_stage("scoring")
+            return call_prediction_api(self.client, input_values)
+        except (RemoteUnavailable, requests.RequestException) as e:
+            if self.fallback is None:
+                raise
+            self.fallback_reason = str(e)
+            set_stage("fallback")
+            return self.fallback.predict_one(input_values)
+
+def timed_chunk_scorer(score_chunk, metrics):
+    """Wrap a bulk chunk scorer so each request's latency and outcome go to the metrics store"""
+    def score(chunk):
+        start = time.perf_counter()
+        try:
+            scored = score_chunk(chunk)
+        except Exception:
+            metrics.record("bulk", 1000 * (time.perf_counter() - start), error=True, rows=len(chunk))
+            raise
+        latency_ms = 1000 * (time.perf_counter() - start)
+        metrics.record("bulk", latency_ms, latency_ms, rows=len(chunk))
+        return scored
+    return score
+
+# Seconds between refreshes of the result panel while a prediction runs
+PREDICTION_POLL_SECONDS = 0.25
+
+# Time the submitting script run waits for a result before handing over to the fragment
+FAST_RESULT_SECONDS = 0.1
+
+# Minimum seconds between two accepted clicks on the Analyze button
+PREDICTION_DEBOUNCE_SECONDS = 1.0
+
+# Job stage -> (progress bar fraction, label)
+PREDICTION_STAGES = {
+    "queued": (0.1, "⏳ Waiting for a worker..."),
+    "authenticating": (0.35, "🔐 Authenticating with the scoring service..."),
+    "scoring": (0.7, "🧠 AI processing telemetry data..."),
+    "fallback": (0.85, "🖥️ Remote scoring unavailable, using the local model..."),
+    "explaining": (0.9, "🔍 Explaining the prediction..."),
+    "done": (1.0, "✅ Analysis complete"),
+}
+
+class PredictionJob:
+    """
+    One prediction running on the worker pool; the worker records its stage and timings
+
+    Repeated inputs are answered from the cache, and every job (failed ones
+    included) is recorded in the metrics store and, when given, the drift monitor.
+    With an explainer (a local scorer), the predicted failure type is also
+    explained per sensor; a failed explanation leaves the prediction intact.
+    """
+
+    def __init__(self, backend, input_values, cache, metrics, drift=None, explainer=None):
+        self.stage = "queued"
+        self.submitted = time.perf_counter()
+        self.finished = None
+        self.timings = {}
+        self.cache_hit = False
+        self.backend = backend
+        self.explanation = None
+        self.explanation_error = None
+        self._stage_started = {}
+        self._cache = cache
+        self._metrics = metrics
+        self._drift = drift
+        self._explainer = explainer
+        self.future = get_prediction_executor().submit(self._run, backend, input_values)
+
+    def _set_stage(self, stage):
+        self._stage_started[stage] = time.perf_counter()
+        self.stage = stage
+
+    def _run(self, backend, input_values):
+        key = (backend.name, getattr(backend, "version", None), tuple(input_values))
+        error = True
+        try:
+            if self._drift is not None:
+                self._drift.observe_one(input_values)
+            result = self._cache.get(key)
+            if result is None:
+                result = backend.predict(input_values, self._set_stage)
+                if not getattr(backend, "fallback_reason", None):
+                    self._cache.put(key, result)
+            else:
+                self.cache_hit = True
+            error = False
+            if self._explainer is not None:
+                self._set_stage("explaining")
+                try:
+                    self.explanation = self._explainer.explain(pd.DataFrame([input_values], columns=RAW_COLUMNS),
+                                                               target=result[0]).iloc[0]
+                except Exception as e:
+                    self.explanation_error = str(e)
+            return result
+        finally:
+            self.finished = time.perf_counter()
+            scored = self._stage_started.get("explaining", self.finished)
+            self.timings = {
+                "total_ms": 1000 * (scored - self.submitted),
+                "backend_ms": 1000 * (scored - self._stage_started.get("scoring", scored)),
+                "explain_ms": 1000 * (self.finished - scored),
+            }
+            self._metrics.record("interactive", self.timings["total_ms"],
+                                 None if self.cache_hit else self.timings["backend_ms"],
+                                 error=error, cache_hit=self.cache_hit)
+            self.stage = "done"
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.submitted
+
+def render_prediction_panel(polling=False):
+    """
+    Result area; runs as a fragment that polls while a prediction is in flight
+
+    polling: the fragment was registered with run_every; once the result is
+             stored the app reruns, which registers it again without polling
+    """
+    job = st.session_state.prediction_job
+    if job is not None and not job.future.done():
+        progress, label = PREDICTION_STAGES[job.stage]
+        st.markdown('<div class="loading-container">', unsafe_allow_html=True)
+        st_lottie(ENHANCED_LOTTIE_DATA, speed=1.8, height=200, key="enhanced_loading")
+        st.progress(progress, text=f"{label} ({job.elapsed():.1f}s)")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+
+    if job is not None:
+        st.session_state.prediction_job = None
+        st.session_state.prediction_timings = job.timings
+        st.session_state.prediction_fallback = getattr(job.backend, "fallback_reason", None)
+        try:
+            failure_type, probabilities = job.future.result()
+            st.session_state.prediction_result = FAILURE_DISPLAY[failure_type]
+            st.session_state.prediction_confidence = probabilities[failure_type] if probabilities else None
+            st.session_state.prediction_probabilities = probabilities
+            st.session_state.prediction_explanation = job.explanation
+            st.session_state.prediction_explanation_error = job.explanation_error
+            st.session_state.prediction_error = None
+        except Exception as e:
+            st.session_state.prediction_result = None
+            st.session_state.prediction_error = str(e)
+        if polling:
+            st.rerun()
+
+    if st.session_state.prediction_error:
+        st.error(f"🚨 API Communication Error: {st.session_state.prediction_error}")
+
+    if st.session_state.prediction_result:
+        result = st.session_state.prediction_result
+        if st.session_state.get("prediction_fallback"):
+            st.warning(f"☁️ Remote scoring unavailable, answered by the local model: "
+                       f"{st.session_state.prediction_fallback}")
+        confidence = st.session_state.prediction_confidence
+        confidence_text = f"{confidence:.1%}" if confidence is not None else "n/a"
+        timings = st.session_state.prediction_timings or {}
+        st.markdown(f"""
+        <div class="result-container" style="text-align: center; padding: 2rem;">
+            <div style="font-size: 6rem; line-height: 1; margin-bottom: 1rem;">{result['icon']}</div>
+            <h2 class="status-{result['type']}" style="font-size: 2rem; font-weight: 800; margin-bottom: 0.5rem;">{result['text']}</h2>
+            <p style="color: rgba(255,255,255,0.7); font-size: 1.1rem; margin-bottom: 1rem;">{result['desc']}</p>
+            <div style="background: rgba(255,255,255,0.1); border-radius: 12px; padding: 1rem; margin-top: 1rem;">
+                <p style="margin: 0; font-size: 0.9rem; color: rgba(255,255,255,0.8);">
+                    🎯 Confidence Level: <strong>{confidence_text}</strong>
+                </p>
+                <p style="margin: 0.5rem 0 0; font-size: 0.8rem; color: rgba(255,255,255,0.6);">
+                    ⏱️ Time to result: <strong>{timings.get('total_ms', 0):.0f} ms</strong>
+                    (model {timings.get('backend_ms', 0):.0f} ms)
+                </p>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        if st.session_state.prediction_probabilities:
+            with st.expander("📊 Class probabilities"):
+                for failure_type, probability in sorted(st.session_state.prediction_probabilities.items(),
+                                                        key=lambda item: -item[1]):
+                    st.progress(probability, text=f"{failure_type}: {probability:.1%}")
+        if st.session_state.get("prediction_explanation") is not None:
+            explanation = st.session_state.prediction_explanation
+            with st.expander("🔍 Why this prediction", expanded=True):
+                contributions = explanation[RAW_COLUMNS].astype(float).sort_values()
+                st.bar_chart(contributions.rename("Contribution"), horizontal=True)
+                st.caption(f"Contribution of each reading to the {explanation[EXPLAINED_CLASS]} log-odds "
+                           f"(base value {explanation[BASE_VALUE]:.2f}): positive values push towards it, "
+                           f"negative values away. Explained by the local model in "
+                           f"{timings.get('explain_ms', 0):.0f} ms.")
+        elif st.session_state.get("prediction_explanation_error"):
+            st.caption(f"🔍 No explanation: {st.session_state.prediction_explanation_error}")
+    elif not st.session_state.prediction_error:
+        st.markdown("""
+        <div style="text-align: center; padding: 2rem; color: rgba(255,255,255,0.6);">
+            <div style="font-size: 3rem; margin-bottom: 1rem;">🤖</div>
+            <h3>AI System Ready</h3>
+            <p>Configure telemetry parameters and initiate analysis</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+# Seconds between refreshes of the analytics panel, and the window its figures cover
+ANALYTICS_REFRESH_SECONDS = 5
+ANALYTICS_WINDOW_SECONDS = 300
+
+def format_ms(value):
+    if value is None:
+        return "n/a"
+    return f"{value:.0f} ms" if value >= 10 else f"{value:.1f} ms"
+
+def render_analytics_panel():
+    """Live scoring telemetry of this server process; runs as a fragment on a timer"""
+    metrics = get_metrics_store()
+    interactive = metrics.snapshot("interactive", ANALYTICS_WINDOW_SECONDS)
+    bulk = metrics.snapshot("bulk", ANALYTICS_WINDOW_SECONDS)
+    metadata = get_model_metadata(resolve_model_dir(MODEL_PATH))
+    window = f"last {ANALYTICS_WINDOW_SECONDS // 60} min"
+
+    stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
+    with stats_col1:
+        request_count = interactive["requests"] + bulk["requests"]
+        errors = interactive["errors"] + bulk["errors"]
+        st.metric("🔄 Success Rate", f"{1 - errors / request_count:.1%}" if request_count else "n/a",
+                  delta=f"{errors} errors" if errors else None, delta_color="inverse",
+                  help=f"Prediction requests that returned a result, {window}")
+    with stats_col2:
+        st.metric("🎯 Model Accuracy", f"{metadata['accuracy']:.1%}" if metadata else "n/a",
+                  help=(f"{metadata['best_model_name']} test accuracy, trained {metadata['training_date']}"
+                        + (f", version {metadata['version']}" if metadata.get('version') else "")
+                        if metadata else "No model metadata found"))
+    with stats_col3:
+        st.metric("⚡ Response Time (p50)", format_ms(interactive["end_to_end_p50_ms"]),
+                  help=f"Click to result, single predictions, {window}")
+    with stats_col4:
+        st.metric("💾 Cache Hit Rate",
+                  f"{interactive['cache_hit_rate']:.0%}" if interactive["requests"] else "n/a",
+                  help=f"Single predictions answered from the result cache, {window}")
+
+    st.caption(
+        f"Single predictions ({window}): {interactive['requests']:,} requests • "
+        f"end-to-end p50/p95/p99 {format_ms(interactive['end_to_end_p50_ms'])} / "
+        f"{format_ms(interactive['end_to_end_p95_ms'])} / {format_ms(interactive['end_to_end_p99_ms'])} • "
+        f"model p50/p95/p99 {format_ms(interactive['backend_p50_ms'])} / "
+        f"{format_ms(interactive['backend_p95_ms'])} / {format_ms(interactive['backend_p99_ms'])} • "
+        f"error rate {interactive['error_rate']:.1%}"
+    )
+    if bulk["requests"]:
+        st.caption(
+            f"Bulk scoring ({window}): {bulk['requests']:,} requests • "
+            f"request p50/p95/p99 {format_ms(bulk['end_to_end_p50_ms'])} / "
+            f"{format_ms(bulk['end_to_end_p95_ms'])} / {format_ms(bulk['end_to_end_p99_ms'])} • "
+            f"error rate {bulk['error_rate']:.1%} • {bulk['totals']['rows']:,} rows since start"
+        )
+
+    drift = get_drift_monitor(MODEL_PATH)
+    if drift is not None:
+        report = drift.snapshot()
+        drift_window = f"last {report['window_seconds'] // 60} min"
+        if report["status"] == "insufficient data":
+            st.caption(f"Input drift ({drift_window}): {report['samples']:,} of the "
+                       f"{drift.min_samples:,} readings needed to compare with the training data")
+        else:
+            st.caption(f"Input drift ({drift_window}): {report['samples']:,} readings • "
+                       f"{len(report['alerts'])} of {len(report['features'])} features flagged")
+        if report["alerts"]:
+            flagged = ", ".join(f"{a['feature']} (PSI {a['psi']:.2f}, KS {a['ks']:.2f})" for a in report["alerts"])
+            message = f"Live readings differ from the training data ({drift_window}): {flagged}"
+            if report["status"] == "drift":
+                st.error(f"🌊 {message}")
+            else:
+                st.warning(f"🌊 {message}")
 
 # ==============================================================================
 # --- Enhanced User Interface ---
@@ -466,160 +859,273 @@ st.markdown('<h1 class="neon-header">MachineInsight AI</h1>', unsafe_allow_html=
 st.markdown('<p class="subtitle">Advanced Predictive Maintenance Intelligence Platform</p>', unsafe_allow_html=True)
 
 # --- Main Dashboard Layout ---
-col1, col2 = st.columns([0.6, 0.4], gap="large")
+# Inputs, live readings and results form one fragment: moving a slider or
+# clicking Analyze reruns only this part of the page, so the CSS, bulk panel
+# and documentation are not rebuilt and re-sent on every interaction.
+@st.fragment
+def render_telemetry_workspace():
+    col1, col2 = st.columns([0.6, 0.4], gap="large")
 
-with col1:
-    st.markdown('<div class="glass-panel">', unsafe_allow_html=True)
-    st.markdown('<div class="section-header">🔧 Machine Telemetry Configuration</div>', unsafe_allow_html=True)
+    with col1:
+        st.markdown('<div class="glass-panel">', unsafe_allow_html=True)
+        st.markdown('<div class="section-header">🔧 Machine Telemetry Configuration</div>', unsafe_allow_html=True)
     
-    # Input Controls in Grid Layout
-    input_col1, input_col2 = st.columns(2)
+        # Input Controls in Grid Layout
+        input_col1, input_col2 = st.columns(2)
     
-    with input_col1:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        machine_type = st.selectbox(
-            "🏭 Machine Type", 
-            ("L", "M", "H"), 
-            help="L: Low-grade • M: Medium-grade • H: High-grade quality variant"
-        )
-        air_temp = st.slider(
-            "🌡️ Air Temperature [K]", 
-            295.0, 305.0, 300.5, 0.1,
-            help="Ambient air temperature affecting machine operation"
-        )
-        rot_speed = st.slider(
-            "⚙️ Rotational Speed [rpm]", 
-            1100, 2900, 1500, 10,
-            help="Machine spindle rotation speed"
-        )
-        st.markdown('</div>', unsafe_allow_html=True)
+        with input_col1:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            machine_type = st.selectbox(
+                "🏭 Machine Type", 
+                ("L", "M", "H"), 
+                help="L: Low-grade • M: Medium-grade • H: High-grade quality variant"
+            )
+            air_temp = st.slider(
+                "🌡️ Air Temperature [K]", 
+                295.0, 305.0, 300.5, 0.1,
+                help="Ambient air temperature affecting machine operation"
+            )
+            rot_speed = st.slider(
+                "⚙️ Rotational Speed [rpm]", 
+                1100, 2900, 1500, 10,
+                help="Machine spindle rotation speed"
+            )
+            st.markdown('</div>', unsafe_allow_html=True)
     
-    with input_col2:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        process_temp = st.slider(
-            "🔥 Process Temperature [K]", 
-            305.0, 315.0, 309.8, 0.1,
-            help="Operating temperature during processing"
-        )
-        torque = st.slider(
-            "💪 Torque [Nm]", 
-            3.0, 80.0, 45.3, 0.1,
-            help="Rotational force applied to the workpiece"
+        with input_col2:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            process_temp = st.slider(
+                "🔥 Process Temperature [K]", 
+                305.0, 315.0, 309.8, 0.1,
+                help="Operating temperature during processing"
+            )
+            torque = st.slider(
+                "💪 Torque [Nm]", 
+                3.0, 80.0, 45.3, 0.1,
+                help="Rotational force applied to the workpiece"
+            )
+            tool_wear = st.slider(
+                "⏱️ Tool Wear [min]", 
+                0, 260, 120, 1,
+                help="Cumulative tool usage time"
+            )
+            st.markdown('</div>', unsafe_allow_html=True)
+    
+        backend_choice = st.radio(
+            "🧠 Inference Backend",
+            (LOCAL_BACKEND, REMOTE_BACKEND),
+            key="backend_choice",
+            horizontal=True,
+            help="Local: bundled model scored in-process in milliseconds • Remote: IBM Watson ML deployment"
         )
-        tool_wear = st.slider(
-            "⏱️ Tool Wear [min]", 
-            0, 260, 120, 1,
-            help="Cumulative tool usage time"
+        explain_prediction = st.toggle(
+            "🔍 Explain prediction",
+            key="explain_prediction",
+            help="Break the prediction down into each reading's contribution (computed by the local model)"
         )
-        st.markdown('</div>', unsafe_allow_html=True)
     
-    st.markdown('<br>', unsafe_allow_html=True)
-    predict_button = st.button("🚀 Analyze Machine Status", use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown('<br>', unsafe_allow_html=True)
+        predict_button = st.button("🚀 Analyze Machine Status", use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
-with col2:
-    st.markdown('<div class="glass-panel" style="height: auto; min-height: 600px;">', unsafe_allow_html=True)
-    st.markdown('<div class="section-header">📊 Real-Time System Dashboard</div>', unsafe_allow_html=True)
-    
-    # Live Metrics Display
-    st.markdown("### 📈 Live Telemetry Readings")
+    with col2:
+        st.markdown('<div class="glass-panel" style="height: auto; min-height: 600px;">', unsafe_allow_html=True)
+        st.markdown('<div class="section-header">📊 Real-Time System Dashboard</div>', unsafe_allow_html=True)
     
-    # Enhanced Progress Bars
-    torque_percent = (torque - 3.0) / (80.0 - 3.0)
-    speed_percent = (rot_speed - 1100) / (2900 - 1100)
-    wear_percent = tool_wear / 260
+        # Live Metrics Display
+        st.markdown("### 📈 Live Telemetry Readings")
     
-    st.progress(torque_percent, text=f"🔧 Torque: {torque:.1f} Nm ({torque_percent:.1%})")
-    st.progress(speed_percent, text=f"⚙️ Speed: {rot_speed} rpm ({speed_percent:.1%})")
-    st.progress(wear_percent, text=f"⏱️ Tool Wear: {tool_wear} min ({wear_percent:.1%})")
+        # Enhanced Progress Bars
+        torque_percent = (torque - 3.0) / (80.0 - 3.0)
+        speed_percent = (rot_speed - 1100) / (2900 - 1100)
+        wear_percent = tool_wear / 260
     
-    # Temperature Differential
-    temp_diff = process_temp - air_temp
-    st.metric("🌡️ Temperature Differential", f"{temp_diff:.1f} K", delta=f"{temp_diff - 9.3:.1f}")
+        st.progress(torque_percent, text=f"🔧 Torque: {torque:.1f} Nm ({torque_percent:.1%})")
+        st.progress(speed_percent, text=f"⚙️ Speed: {rot_speed} rpm ({speed_percent:.1%})")
+        st.progress(wear_percent, text=f"⏱️ Tool Wear: {tool_wear} min ({wear_percent:.1%})")
     
-    st.markdown("<hr style='margin: 2rem 0; border-color: rgba(255,255,255,0.1);'>", unsafe_allow_html=True)
+        # Temperature Differential
+        temp_diff = process_temp - air_temp
+        st.metric("🌡️ Temperature Differential", f"{temp_diff:.1f} K", delta=f"{temp_diff - 9.3:.1f}")
     
-    # Prediction Results Area
-    result_placeholder = st.empty()
+        st.markdown("<hr style='margin: 2rem 0; border-color: rgba(255,255,255,0.1);'>", unsafe_allow_html=True)
     
-    # Initialize session state
-    if 'prediction_result' not in st.session_state:
-        st.session_state.prediction_result = None
-    if 'prediction_confidence' not in st.session_state:
-        st.session_state.prediction_confidence = None
-
-    if predict_button:
-        input_values = [machine_type, air_temp, process_temp, float(rot_speed), torque, float(tool_wear)]
-        
-        # Enhanced Loading Animation
-        with result_placeholder.container():
-            st.markdown('<div class="loading-container">', unsafe_allow_html=True)
-            st_lottie(ENHANCED_LOTTIE_DATA, speed=1.8, height=200, key="enhanced_loading")
-            st.markdown('<div class="loading-text">🔍 Analyzing machine patterns...</div>', unsafe_allow_html=True)
-            st.markdown('<div class="loading-text">🧠 AI processing telemetry data...</div>', unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+        # Initialize session state
+        for key in ('prediction_result', 'prediction_confidence', 'prediction_probabilities',
+                    'prediction_explanation', 'prediction_explanation_error',
+                    'prediction_job', 'prediction_timings', 'prediction_error', 'last_submit'):
+            if key not in st.session_state:
+                st.session_state[key] = None
 
-        try:
-            if WML_API_KEY.startswith("PASTE") or WML_ENDPOINT_URL.startswith("PASTE"):
+        # Debounce: a click arriving right after the previous one (double click,
+        # impatient repeat) does not start another prediction
+        now = time.monotonic()
+        if predict_button and (st.session_state.last_submit is None
+                               or now - st.session_state.last_submit >= PREDICTION_DEBOUNCE_SECONDS):
+            st.session_state.last_submit = now
+            input_values = [machine_type, air_temp, process_temp, float(rot_speed), torque, float(tool_wear)]
+            if backend_choice == REMOTE_BACKEND and (WML_API_KEY.startswith("PASTE") or WML_ENDPOINT_URL.startswith("PASTE")):
                 st.error("⚠️ API Configuration Required: Please update credentials in the script.")
                 st.session_state.prediction_result = None
+            elif st.session_state.prediction_job is None:
+                if backend_choice == LOCAL_BACKEND:
+                    backend = LocalBackend(get_local_scorer(MODEL_PATH))
+                else:
+                    backend = RemoteBackend(get_scoring_client(WML_ENDPOINT_URL, WML_API_KEY, WML_IAM_URL),
+                                            fallback=get_local_scorer(MODEL_PATH))
+                # Runs in the background; the result panel below picks it up when it finishes.
+                # Fast (local) predictions are shown in this run without polling.
+                job = PredictionJob(backend, input_values, get_prediction_cache(), get_metrics_store(),
+                                    get_drift_monitor(MODEL_PATH),
+                                    explainer=get_local_scorer(MODEL_PATH) if explain_prediction else None)
+                wait([job.future], timeout=FAST_RESULT_SECONDS)
+                st.session_state.prediction_job = job
+
+        # Prediction Results Area: only this fragment reruns while a prediction is in flight
+        prediction_pending = (st.session_state.prediction_job is not None
+                              and not st.session_state.prediction_job.future.done())
+        st.fragment(render_prediction_panel,
+                    run_every=PREDICTION_POLL_SECONDS if prediction_pending else None)(polling=prediction_pending)
+
+        st.markdown('</div>', unsafe_allow_html=True)
+
+render_telemetry_workspace()
+
+# --- Bulk Telemetry Scoring ---
+@st.fragment
+def render_bulk_panel():
+    st.markdown('<div class="glass-panel">', unsafe_allow_html=True)
+    st.markdown('<div class="section-header">📂 Bulk Telemetry Scoring</div>', unsafe_allow_html=True)
+
+    uploaded_file = st.file_uploader(
+        "Upload a telemetry file (CSV or Parquet) with Type and the five sensor columns",
+        type=["csv", "parquet"]
+    )
+    bulk_col1, bulk_col2, bulk_col3 = st.columns([0.35, 0.35, 0.3])
+    with bulk_col1:
+        bulk_chunk_size = st.number_input("Rows per request", 50, 10000, 500, 50)
+    with bulk_col2:
+        bulk_workers = st.number_input("Concurrent requests", 1, 16, 4, 1)
+    with bulk_col3:
+        st.markdown('<br>', unsafe_allow_html=True)
+        bulk_button = st.button("📤 Score File", use_container_width=True, disabled=uploaded_file is None)
+    explain_flagged = st.checkbox(
+        "🔍 Explain flagged rows",
+        help=f"Add the reading that pushed hardest towards each predicted failure "
+             f"(up to {BULK_EXPLAIN_LIMIT} riskiest rows, explained by the local model)"
+    )
+
+    if uploaded_file is not None and bulk_button:
+        try:
+            readings = read_telemetry(uploaded_file.getvalue(), uploaded_file.name)
+            problems = validate_readings(readings)
+        except ImportError as e:
+            problems = [str(e)]
+        if problems:
+            st.error("⚠️ Cannot score this file:\n\n" + "\n".join(f"- {p}" for p in problems))
+        else:
+            drift = get_drift_monitor(MODEL_PATH)
+            if drift is not None:
+                drift.observe(readings)
+            # A file is its own history: window features come from a fresh engine, leaving the live one alone
+            local_scorer = get_local_scorer(MODEL_PATH)
+            file_engine = engine_for(local_scorer.metadata, local_scorer.feature_names)
+            if file_engine is not None:
+                readings = add_window_features(readings, file_engine)
+            if st.session_state.backend_choice == LOCAL_BACKEND:
+                score_chunk = timed_chunk_scorer(local_chunk_scorer(get_local_scorer(MODEL_PATH)),
+                                                 get_metrics_store())
             else:
-                # Simulate processing time for better UX
-                time.sleep(2)
-                token = get_wml_token(WML_API_KEY)
-                prediction_code = call_prediction_api(WML_ENDPOINT_URL, token, input_values)
-                st.session_state.prediction_result = LABEL_MAPPING.get(prediction_code)
-                st.session_state.prediction_confidence = random.uniform(0.85, 0.98)  # Simulated confidence
-                st.rerun()
-        except Exception as e:
-            st.session_state.prediction_result = None
-            st.error(f"🚨 API Communication Error: {str(e)}")
-            st.rerun()
+                # Chunks the deployment cannot answer are scored by the local model
+                remote = remote_chunk_scorer(get_scoring_client(WML_ENDPOINT_URL, WML_API_KEY, WML_IAM_URL),
+                                             list(LABEL_MAPPING.values()))
+                score_chunk = FallbackChunkScorer(timed_chunk_scorer(remote, get_metrics_store()),
+                                                  local_chunk_scorer(get_local_scorer(MODEL_PATH)),
+                                                  (RemoteUnavailable, requests.RequestException))
+            progress_bar = st.progress(0.0, text="Scoring...")
+            throughput_placeholder = st.empty()
+            table_placeholder = st.empty()
+            scored_chunks = {}
+            riskiest = None
+            try:
+                for start, scored, progress in score_in_chunks(score_chunk, readings, int(bulk_chunk_size),
+                                                               int(bulk_workers)):
+                    scored_chunks[start] = scored
+                    progress_bar.progress(progress["rows"] / progress["total_rows"],
+                                          text=f"Scored {progress['rows']:,} / {progress['total_rows']:,} rows "
+                                               f"({progress['chunks']}/{progress['total_chunks']} requests)")
+                    throughput_placeholder.markdown(
+                        f"⚡ **{progress['rows_per_second']:,.0f} rows/s** • {progress['elapsed_seconds']:.2f}s elapsed"
+                    )
+                    riskiest = pd.concat([riskiest, scored]).nlargest(200, "Failure Risk")
+                    table_placeholder.dataframe(riskiest, use_container_width=True)
+                results = pd.concat([scored_chunks[start] for start in sorted(scored_chunks)])
+                explained_rows, explain_seconds, explain_error = 0, None, None
+                if explain_flagged:
+                    progress_bar.progress(1.0, text="Explaining flagged rows...")
+                    explain_start = time.perf_counter()
+                    flagged = results[results["Predicted Failure"] != NO_FAILURE].nlargest(BULK_EXPLAIN_LIMIT,
+                                                                                          "Failure Risk")
+                    # Rows not explained are left empty; a failed explanation leaves the scores intact
+                    results["Main Driver"], results["Driver Contribution"] = None, None
+                    try:
+                        explanation = get_local_scorer(MODEL_PATH).explain(flagged,
+                                                                           target=flagged["Predicted Failure"])
+                        drivers = [names[0] for names in main_drivers(explanation)]
+                        results["Main Driver"] = pd.Series(drivers, index=flagged.index)
+                        results["Driver Contribution"] = pd.Series(
+                            [explanation.at[index, name] for index, name in zip(flagged.index, drivers)],
+                            index=flagged.index)
+                        explained_rows, explain_seconds = len(flagged), time.perf_counter() - explain_start
+                    except Exception as e:
+                        explain_error = str(e)
+                st.session_state.bulk_results = {"name": uploaded_file.name, "results": results,
+                                                 "progress": progress,
+                                                 "explained_rows": explained_rows, "explain_seconds": explain_seconds,
+                                                 "explain_error": explain_error,
+                                                 "fallback_chunks": getattr(score_chunk, "fallback_chunks", 0),
+                                                 "fallback_error": getattr(score_chunk, "last_error", None)}
+            except Exception as e:
+                st.error(f"🚨 Bulk scoring failed: {str(e)}")
+            progress_bar.empty()
+            throughput_placeholder.empty()
+            table_placeholder.empty()
 
-    # Display Results
-    if st.session_state.prediction_result:
-        result = st.session_state.prediction_result
-        confidence = st.session_state.prediction_confidence or 0.95
-        
-        with result_placeholder.container():
-            st.markdown(f"""
-            <div class="result-container" style="text-align: center; padding: 2rem;">
-                <div style="font-size: 6rem; line-height: 1; margin-bottom: 1rem;">{result['icon']}</div>
-                <h2 class="status-{result['type']}" style="font-size: 2rem; font-weight: 800; margin-bottom: 0.5rem;">{result['text']}</h2>
-                <p style="color: rgba(255,255,255,0.7); font-size: 1.1rem; margin-bottom: 1rem;">{result['desc']}</p>
-                <div style="background: rgba(255,255,255,0.1); border-radius: 12px; padding: 1rem; margin-top: 1rem;">
-                    <p style="margin: 0; font-size: 0.9rem; color: rgba(255,255,255,0.8);">
-                        🎯 Confidence Level: <strong>{confidence:.1%}</strong>
-                    </p>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-    else:
-        with result_placeholder.container():
-            st.markdown("""
-            <div style="text-align: center; padding: 2rem; color: rgba(255,255,255,0.6);">
-                <div style="font-size: 3rem; margin-bottom: 1rem;">🤖</div>
-                <h3>AI System Ready</h3>
-                <p>Configure telemetry parameters and initiate analysis</p>
-            </div>
-            """, unsafe_allow_html=True)
+    if st.session_state.get("bulk_results"):
+        bulk = st.session_state.bulk_results
+        results, progress = bulk["results"], bulk["progress"]
+        if bulk["fallback_chunks"]:
+            st.warning(f"☁️ {bulk['fallback_chunks']} of {progress['total_chunks']} requests were scored by the "
+                       f"local model because remote scoring was unavailable: {bulk['fallback_error']}")
+        summary_cols = st.columns(4)
+        summary_cols[0].metric("📄 Rows Scored", f"{len(results):,}")
+        summary_cols[1].metric("⚡ Throughput", f"{progress['rows_per_second']:,.0f} rows/s")
+        summary_cols[2].metric("⏱️ Total Time", f"{progress['elapsed_seconds']:.2f}s")
+        summary_cols[3].metric("🚨 Predicted Failures", f"{(results['Predicted Failure'] != 'No Failure').sum():,}")
+        if bulk.get("explained_rows"):
+            st.caption(f"🔍 {bulk['explained_rows']:,} flagged rows explained in {bulk['explain_seconds']:.1f}s: "
+                       f"Main Driver is the reading that pushed hardest towards the predicted failure "
+                       f"(Driver Contribution in log-odds)")
+        elif bulk.get("explain_error"):
+            st.caption(f"🔍 Flagged rows not explained: {bulk['explain_error']}")
+        st.dataframe(results.nlargest(200, "Failure Risk"), use_container_width=True)
+        st.download_button(
+            "⬇️ Download Scored Telemetry (CSV)",
+            results.to_csv(index=False).encode(),
+            file_name=f"scored_{os.path.splitext(bulk['name'])[0]}.csv",
+            mime="text/csv",
+            on_click="ignore",
+        )
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+render_bulk_panel()
+
 # --- Enhanced Statistics Section ---
 st.markdown('<div class="glass-panel">', unsafe_allow_html=True)
 st.markdown('<div class="section-header">📊 Advanced Analytics & Insights</div>', unsafe_allow_html=True)
 
-stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
-
-with stats_col1:
-    st.metric("🔄 System Uptime", "99.8%", delta="0.2%")
-with stats_col2:
-    st.metric("🎯 Prediction Accuracy", "97.3%", delta="1.1%")
-with stats_col3:
-    st.metric("⚡ Response Time", "1.2s", delta="-0.3s")
-with stats_col4:
-    st.metric("🔍 Models Deployed", "15", delta="3")
+st.fragment(render_analytics_panel, run_every=ANALYTICS_REFRESH_SECONDS)()
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -633,7 +1139,7 @@ with st.expander("📚 Technical Documentation & System Architecture", expanded=
         ### 🏗️ System Architecture
         - **Frontend**: Advanced Streamlit interface with custom CSS animations
         - **AI Engine**: XGBoost classification with 97%+ accuracy
-        - **Backend**: IBM Watson ML cloud deployment
+        - **Backend**: Bundled model scored in-process, or IBM Watson ML cloud deployment
         - **Real-time Processing**: Sub-2 second prediction latency
         - **Security**: OAuth 2.0 with encrypted API communications
         
@@ -1,7 +1,8 @@
+import os
+
 import joblib
-import pandas as pd
 
-def predict_failure(new_data, model_path='models/', return_probabilities=False):
+def predict_failure(new_data, model_path='models/', return_probabilities=False, backend=None):
     """
     Predict machinery failure type for new data
     
@@ -9,12 +10,20 @@ def predict_failure(new_data, model_path='models/', return_probabilities=False):
     new_data: pandas DataFrame with required features
     model_path: path to saved models
     return_probabilities: whether to return prediction probabilities
+    backend: inference backend to run the model (see scripts/inference_backends.py;
+             default: the saved model's own predict_proba)
     
     Returns:
     predictions and optionally probabilities
     """
-    # Load components
-    model = joblib.load(f'{model_path}best_model_xgboost.pkl')
+    # Published versions: read the one models/CURRENT names
+    if os.path.exists(f'{model_path}CURRENT'):
+        with open(f'{model_path}CURRENT') as f:
+            model_path = f'{model_path}versions/{f.read().strip()}/'
+    
+    # Load components (the best model's file is named in the version's metadata)
+    metadata = joblib.load(f'{model_path}model_metadata.pkl')
+    model = joblib.load(f'{model_path}best_model_{metadata["best_model_name"].lower().replace(" ", "_")}.pkl')
     scaler = joblib.load(f'{model_path}feature_scaler.pkl')
     le_failure = joblib.load(f'{model_path}label_encoder_failure.pkl')
     feature_names = joblib.load(f'{model_path}feature_names.pkl')
@@ -28,12 +37,12 @@ def predict_failure(new_data, model_path='models/', return_probabilities=False):
     X_new = new_data[feature_names]
     X_new_scaled = scaler.transform(X_new)
     
-    # Make predictions
-    predictions_encoded = model.predict(X_new_scaled)
+    # Make predictions (one probability pass; labels are its argmax)
+    probabilities = (backend or model).predict_proba(X_new_scaled)
+    predictions_encoded = model.classes_[probabilities.argmax(axis=1)]
     predictions = le_failure.inverse_transform(predictions_encoded)
     
     if return_probabilities:
-        probabilities = model.predict_proba(X_new_scaled)
         return predictions, probabilities
     
     return predictions
@@ -0,0 +1,143 @@
+import streamlit as st
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+from fleet_monitor import TABLE_SORT_KEYS, FileTailSource, FleetMonitor, SimulatorSource
+from local_scorer import HotSwapScorer
+
+# ==============================================================================
+# --- Page Configuration ---
+# ==============================================================================
+st.set_page_config(
+    page_title="MachineInsight AI - Fleet Monitor",
+    page_icon="🏭",
+    layout="wide",
+)
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+# Seconds between refreshes of the fleet view
+FLEET_REFRESH_SECONDS = 1.0
+
+# Most recently changed machines listed under "Latest changes"
+CHANGES_SHOWN = 100
+
+SIMULATOR_SOURCE = "🧪 Simulated fleet"
+FILE_SOURCE = "📄 Tail a telemetry file"
+
+@st.cache_resource
+def get_local_scorer(model_path):
+    """Saved model artifacts, loaded once per server process; follows newly published versions"""
+    return HotSwapScorer(model_path)
+
+@st.cache_resource
+def get_monitor_slot():
+    """The server's one running FleetMonitor (shared by all sessions, so the fleet is scored once)"""
+    return {"monitor": None}
+
+def start_monitor(source):
+    slot = get_monitor_slot()
+    if slot["monitor"] is not None:
+        slot["monitor"].stop()
+    slot["monitor"] = FleetMonitor(get_local_scorer(MODEL_PATH), source).start()
+
+def stop_monitor():
+    slot = get_monitor_slot()
+    if slot["monitor"] is not None:
+        slot["monitor"].stop()
+
+# ==============================================================================
+# --- Source Controls ---
+# ==============================================================================
+with st.sidebar:
+    st.header("🏭 Telemetry Source")
+    source_choice = st.radio("Source", (SIMULATOR_SOURCE, FILE_SOURCE))
+    if source_choice == SIMULATOR_SOURCE:
+        n_machines = st.number_input("Machines", 10, 100_000, 10_000, 1000)
+        interval = st.number_input("Seconds between readings per machine", 0.5, 60.0, 1.0, 0.5)
+    else:
+        tail_path = st.text_input("Telemetry file (CSV or JSON lines)", "data/telemetry.csv",
+                                  help="e.g. written by scripts/telemetry_simulator.py --output data/telemetry.csv")
+    start_col, stop_col = st.columns(2)
+    if start_col.button("▶️ Start", use_container_width=True):
+        if source_choice == SIMULATOR_SOURCE:
+            start_monitor(SimulatorSource(int(n_machines), interval=float(interval)))
+        else:
+            start_monitor(FileTailSource(tail_path))
+    if stop_col.button("⏹️ Stop", use_container_width=True):
+        stop_monitor()
+
+st.title("🏭 Fleet Monitor")
+st.caption("Failure risk of every machine, scored in micro-batches from live telemetry with the bundled model")
+
+# ==============================================================================
+# --- Fleet View ---
+# ==============================================================================
+@st.fragment(run_every=FLEET_REFRESH_SECONDS)
+def render_fleet_view():
+    """Refreshes on a timer; only machines whose prediction changed are fetched for the change feed"""
+    monitor = get_monitor_slot()["monitor"]
+    if monitor is None:
+        st.info("Choose a telemetry source in the sidebar and press Start.")
+        return
+    store, stats = monitor.store, monitor.stats
+
+    # Ingest rate over the time since this session's previous refresh (of the same monitor:
+    # any session may have restarted it)
+    now = time.monotonic()
+    previous = st.session_state.get("fleet_rate_sample")
+    readings_per_second = None
+    if previous is not None and previous[0] == id(monitor) and now > previous[1]:
+        readings_per_second = (stats["readings"] - previous[2]) / (now - previous[1])
+    st.session_state.fleet_rate_sample = (id(monitor), now, stats["readings"])
+
+    status = "🟢 running" if monitor.running else "⏹️ stopped"
+    st.markdown(f"**Source:** {monitor.source.describe()} • {status}")
+    if stats["last_error"]:
+        st.warning(f"⚠️ {stats['errors']} micro-batches failed; last error: {stats['last_error']}")
+
+    overview = st.columns(5)
+    overview[0].metric("🏭 Machines", f"{store.size:,}")
+    overview[1].metric("📥 Readings/s", f"{readings_per_second:,.0f}" if readings_per_second is not None else "…")
+    overview[2].metric("🧮 Last Micro-batch", f"{stats['last_batch_rows']:,} rows",
+                       delta=f"{stats['last_step_ms']:.0f} ms", delta_color="off")
+    overview[3].metric("⚙️ Scoring CPU", f"{stats['busy_fraction']:.0%}",
+                       help="Share of each poll interval spent polling, scoring and storing")
+    overview[4].metric("💾 Fleet State", f"{store.nbytes() / 2**20:.1f} MB",
+                       help=f"{store.nbytes() / max(store.capacity, 1):.0f} bytes per machine slot")
+
+    # Machines currently predicted per failure type, with the change since the previous refresh
+    counts = store.class_counts()
+    previous_counts = st.session_state.get("fleet_class_counts") or counts
+    st.session_state.fleet_class_counts = counts
+    count_cols = st.columns(len(counts))
+    for col, (failure_type, count) in zip(count_cols, counts.items()):
+        change = count - previous_counts.get(failure_type, 0)
+        col.metric(failure_type, f"{count:,}", delta=change or None,
+                   delta_color="normal" if failure_type == "No Failure" else "inverse")
+
+    table_col, changes_col = st.columns([0.6, 0.4], gap="large")
+    with table_col:
+        sort_col, size_col = st.columns(2)
+        sort_by = sort_col.selectbox("Rank machines by", TABLE_SORT_KEYS, key="fleet_sort_by")
+        top_n = size_col.number_input("Machines shown", 10, 1000, 100, 10, key="fleet_top_n")
+        st.dataframe(
+            store.table(store.top(int(top_n), sort_by)),
+            hide_index=True,
+            use_container_width=True,
+            column_config={"Failure Risk": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0,
+                                                                          format="percent")},
+        )
+    with changes_col:
+        # Only rows changed since this session last looked at this monitor are fetched from the store
+        seen_monitor, seen = st.session_state.get("fleet_seen_sequence", (None, 0))
+        changed, sequence = store.changed_since(seen if seen_monitor == id(monitor) else 0, limit=CHANGES_SHOWN)
+        st.session_state.fleet_seen_sequence = (id(monitor), sequence)
+        st.markdown(f"**🔄 Latest changes** ({len(changed):,} machines changed since the last refresh"
+                    f"{', newest shown' if len(changed) == CHANGES_SHOWN else ''})")
+        st.dataframe(store.table(changed)[["Product ID", "Predicted Failure", "Failure Risk", "Last Seen"]],
+                     hide_index=True, use_container_width=True)
+
+render_fleet_view()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Streamlit App Rerun Benchmark
+=============================
+
+Measures what one user interaction with app.py costs on the server: the
+time from the browser's rerun request to the end of the script run, and
+the bytes and messages sent back over the websocket.
+
+The benchmark starts `streamlit run app.py` (or uses --url) and talks to it
+like a browser tab: it keeps the widget ids and fragment ids from the
+element deltas, asks for fragment-scoped reruns when the widget lives in a
+fragment, and reports the hashes of cached messages so large unchanged
+elements come back as references, as they would to a real client.
+
+Interactions:
+- initial load: the first script run of a new session
+- move slider:  the Air Temperature slider set to a new value
+- predict:      a click on the Analyze button (local backend)
+
+Usage:
+    python3 scripts/app_rerun_benchmark.py --repeat 10 --output rerun_before.json
+    python3 scripts/app_rerun_benchmark.py --url ws://127.0.0.1:8501/_stcore/stream
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+SLIDER_LABEL = 'Air Temperature'
+BUTTON_LABEL = 'Analyze Machine Status'
+SLIDER_VALUES = [296.0, 298.5, 301.2, 303.4, 304.9]
+
+
+class AppSession:
+    """One websocket session with a running Streamlit app"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}
+        self.cached_hashes = set()
+
+    async def rerun(self, widget_states=(), fragment_id=''):
+        """
+        Request a rerun and read messages until the script run finishes
+
+        Returns:
+        dict with server_ms, bytes, messages and fragment (whether the run was fragment-scoped)
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.cached_message_hashes.extend(sorted(self.cached_hashes))
+        for state in widget_states:
+            msg.rerun_script.widget_states.widgets.add().CopyFrom(state)
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        n_bytes = n_messages = 0
+        while True:
+            data = await self.ws.recv()
+            n_bytes += len(data)
+            n_messages += 1
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            self._observe(forward)
+            if forward.WhichOneof('type') == 'script_finished':
+                return {
+                    'server_ms': 1000 * (time.perf_counter() - start),
+                    'bytes': n_bytes,
+                    'messages': n_messages,
+                    'fragment': bool(fragment_id),
+                }
+
+    def _observe(self, forward):
+        if forward.metadata.cacheable:
+            self.cached_hashes.add(forward.hash)
+        if forward.WhichOneof('type') != 'delta' or forward.delta.WhichOneof('type') != 'new_element':
+            return
+        element = forward.delta.new_element
+        kind = element.WhichOneof('type')
+        widget = getattr(element, kind, None)
+        if kind and getattr(widget, 'id', '') and getattr(widget, 'label', ''):
+            self.widgets[widget.label] = {'id': widget.id, 'kind': kind,
+                                          'fragment_id': forward.delta.fragment_id}
+
+    def find(self, label):
+        matches = [w for name, w in self.widgets.items() if label in name]
+        if not matches:
+            raise SystemExit(f"No widget labelled {label!r} in the app")
+        return matches[0]
+
+
+def _slider_state(widget, value):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+    state = WidgetState(id=widget['id'])
+    state.double_array_value.data.append(value)
+    return state
+
+
+def _trigger_state(widget):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+    return WidgetState(id=widget['id'], trigger_value=True)
+
+
+async def measure(url, repeat, prediction_wait):
+    results = {'initial load': [], 'move slider': [], 'predict': []}
+    for i in range(repeat):
+        async with websockets.connect(url, subprotocols=['streamlit'], max_size=None) as ws:
+            session = AppSession(ws)
+            results['initial load'].append(await session.rerun())
+
+            slider = session.find(SLIDER_LABEL)
+            for value in SLIDER_VALUES:
+                results['move slider'].append(
+                    await session.rerun([_slider_state(slider, value)], slider['fragment_id']))
+
+            button = session.find(BUTTON_LABEL)
+            results['predict'].append(
+                await session.rerun([_slider_state(slider, SLIDER_VALUES[-1]), _trigger_state(button)],
+                                    button['fragment_id']))
+            # Let the prediction finish so the next session starts idle
+            await asyncio.sleep(prediction_wait)
+    return results
+
+
+def summarize(results):
+    summary = {}
+    for interaction, runs in results.items():
+        summary[interaction] = {
+            'runs': len(runs),
+            'median_server_ms': statistics.median(r['server_ms'] for r in runs),
+            'max_server_ms': max(r['server_ms'] for r in runs),
+            'median_bytes': statistics.median(r['bytes'] for r in runs),
+            'median_messages': statistics.median(r['messages'] for r in runs),
+            'fragment_scoped': all(r['fragment'] for r in runs),
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'interaction':<14} {'runs':>5} {'server ms':>10} {'max ms':>8} {'KB':>9} {'msgs':>6}  scope")
+    for interaction, s in summary.items():
+        scope = 'fragment' if s['fragment_scoped'] else 'full app'
+        print(f"{interaction:<14} {s['runs']:>5} {s['median_server_ms']:>10.1f} {s['max_server_ms']:>8.1f} "
+              f"{s['median_bytes'] / 1024:>9.1f} {s['median_messages']:>6.0f}  {scope}")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(app_path, timeout=60):
+    """(process, websocket URL) of `streamlit run app_path` on a free port"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1)
+            return process, f'ws://127.0.0.1:{port}/_stcore/stream'
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit(f"streamlit exited with code {process.returncode}")
+            time.sleep(0.3)
+    process.terminate()
+    raise SystemExit(f"streamlit did not start within {timeout}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Server time and payload of app.py interactions')
+    parser.add_argument('--app', default=APP_PATH, help='Streamlit script to start (default: app.py)')
+    parser.add_argument('--url', help='websocket URL of an already running app instead of starting one')
+    parser.add_argument('--repeat', type=int, default=5, help='sessions measured (default: %(default)s)')
+    parser.add_argument('--prediction-wait', type=float, default=0.5,
+                        help='seconds left for each prediction to finish (default: %(default)s)')
+    parser.add_argument('--output', help='write the per-run measurements and summary as JSON')
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_app(args.app)
+    try:
+        # One warm-up session so imports and cached resources are not measured
+        asyncio.run(measure(url, 1, args.prediction_wait))
+        results = asyncio.run(measure(url, args.repeat, args.prediction_wait))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(results)
+    print_summary(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'runs': results}, f, indent=2)
+        print(f"📄 Report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Training Pipeline Scaling Benchmark
+===================================
+
+Measures how each stage of PredictiveMaintenanceML scales with dataset size.
+
+For every requested size a synthetic dataset is generated with
+create_sample_data.generate_dataset (fixed seed, cached on disk) and the pipeline stages
+are run in a fresh subprocess with fixed seeds, so peak memory of one size
+does not leak into the next. Per-stage wall time, CPU time and peak RSS come
+from the pipeline's StageProfiler.
+
+Outputs (in --output-dir):
+- scaling_<timestamp>.json: raw results plus environment, seeds and settings
+- scaling_<timestamp>.md:   scaling table with a fitted log-log exponent per stage
+- scaling_<timestamp>.png:  log-log plot of wall time against rows
+
+An exponent noticeably above 1 marks a super-linear stage. Pass --compare
+with an earlier JSON to print per-stage time ratios against that run.
+
+Usage:
+    python3 scripts/benchmark_scaling.py --sizes 10000 100000 1000000 --n-trials 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+STAGES = [
+    'load_data',
+    'preprocess_data',
+    'exploratory_data_analysis',
+    'feature_engineering',
+    'prepare_data_for_modeling',
+    'cross_validate_random_forest',
+    'cross_validate_xgboost',
+    'cross_validate_lightgbm',
+    'compare_models',
+    'select_features',
+    'train_models',
+    'optimize_best_model',
+    'evaluate_models',
+    'create_visualizations',
+    'save_models_and_artifacts',
+    'wait_for_figures',
+]
+
+# Exponent above which a stage is flagged as super-linear
+SUPERLINEAR_THRESHOLD = 1.15
+
+
+def dataset_path(data_dir, n_samples, seed):
+    return os.path.join(data_dir, f'pm_{n_samples}_seed{seed}.csv')
+
+
+def ensure_dataset(data_dir, n_samples, seed):
+    """Generate (once) the synthetic dataset for one size"""
+    path = dataset_path(data_dir, n_samples, seed)
+    if os.path.exists(path):
+        return path, 0.0
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    from create_sample_data import generate_dataset
+
+    print(f"📊 Generating {n_samples:,} rows -> {path}")
+    start = time.perf_counter()
+    generate_dataset(path, n_samples, seed=seed)
+    return path, time.perf_counter() - start
+
+
+def run_one(data_path, work_dir, until, n_trials, seed, result_path):
+    """Child process: run the pipeline stages on one dataset and dump the profile"""
+    sys.path.insert(0, SCRIPTS_DIR)
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+
+    np.random.seed(seed)
+    from predictive_maintenance_pipeline import PredictiveMaintenanceML
+
+    pipeline = PredictiveMaintenanceML(data_path, headless=True, plot_dpi=100,
+                                       plot_cache=False, n_trials=n_trials)
+    error = None
+    try:
+        for stage in STAGES[:STAGES.index(until) + 1]:
+            getattr(pipeline, stage)()
+    except Exception as e:
+        error = str(e)
+    finally:
+        pipeline.renderer.close()
+
+    report = pipeline.profiler.report(error=error)
+    with open(result_path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+
+def fit_exponent(sizes, values):
+    """Slope of log(value) against log(size), or None with fewer than two points"""
+    points = [(n, v) for n, v in zip(sizes, values) if v is not None and v > 0]
+    if len(points) < 2:
+        return None
+    x = np.log([n for n, _ in points])
+    y = np.log([v for _, v in points])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def summarise(results):
+    """Per-stage {size: metrics} tables and fitted exponents"""
+    sizes = sorted(int(n) for n in results['runs'])
+    table = {}
+    for stage in STAGES:
+        row = {}
+        for n in sizes:
+            run = results['runs'][str(n)]
+            record = next((s for s in run.get('stages', []) if s['stage'] == stage), None)
+            if record is not None:
+                row[n] = record
+        if row:
+            table[stage] = row
+
+    exponents = {
+        stage: fit_exponent(sizes, [row[n]['wall_seconds'] if n in row else None for n in sizes])
+        for stage, row in table.items()
+    }
+    return sizes, table, exponents
+
+
+def write_markdown(results, path):
+    sizes, table, exponents = summarise(results)
+    lines = [
+        f"# Pipeline scaling benchmark ({results['started_at']})",
+        '',
+        f"Python {results['environment']['python']} on {results['environment']['platform']}, "
+        f"{results['environment']['cpu_count']} CPUs, seed {results['settings']['seed']}, "
+        f"{results['settings']['n_trials']} Optuna trials",
+        '',
+        '## Wall time (s)',
+        '',
+        '| Stage | ' + ' | '.join(f'{n:,}' for n in sizes) + ' | Exponent |',
+        '|---' * (len(sizes) + 2) + '|',
+    ]
+    for stage, row in table.items():
+        cells = [f"{row[n]['wall_seconds']:.2f}" if n in row else '-' for n in sizes]
+        exp = exponents[stage]
+        if exp is None:
+            exp_cell = '-'
+        elif exp > SUPERLINEAR_THRESHOLD:
+            exp_cell = f'{exp:.2f} ⚠️ super-linear'
+        else:
+            exp_cell = f'{exp:.2f}'
+        lines.append(f"| {stage} | " + ' | '.join(cells) + f" | {exp_cell} |")
+
+    lines += ['', '## Peak RSS (MB)', '',
+              '~: process-wide peak shared with stages running at the same time', '',
+              '| Stage | ' + ' | '.join(f'{n:,}' for n in sizes) + ' |',
+              '|---' * (len(sizes) + 1) + '|']
+    for stage, row in table.items():
+        cells = [f"{row[n]['peak_rss_mb']:.0f}{'~' if row[n].get('overlapped') else ''}" if n in row else '-'
+                 for n in sizes]
+        lines.append(f"| {stage} | " + ' | '.join(cells) + ' |')
+
+    failures = {n: run['error'] for n, run in results['runs'].items() if run.get('error')}
+    if failures:
+        lines += ['', '## Incomplete runs', '']
+        lines += [f"- {int(n):,} rows: {error}" for n, error in failures.items()]
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_plot(results, path):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    sizes, table, exponents = summarise(results)
+    fig, ax = plt.subplots(figsize=(10, 7))
+    for stage, row in table.items():
+        xs = [n for n in sizes if n in row]
+        ys = [max(row[n]['wall_seconds'], 1e-3) for n in xs]
+        exp = exponents[stage]
+        label = f'{stage} (k={exp:.2f})' if exp is not None else stage
+        ax.plot(xs, ys, marker='o', label=label)
+
+    # Linear reference through the smallest size
+    if sizes:
+        ax.plot(sizes, [sizes[i] / sizes[0] for i in range(len(sizes))], 'k--', alpha=0.4,
+                label='linear reference')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Rows')
+    ax.set_ylabel('Wall time (s)')
+    ax.set_title('Pipeline stage scaling')
+    ax.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def compare(results, previous_path):
+    """Print per-stage wall-time ratios against an earlier benchmark JSON"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    _, table, _ = summarise(results)
+    _, prev_table, _ = summarise(previous)
+
+    print(f"\nComparison with {previous_path} (current / previous wall time):")
+    for stage, row in table.items():
+        ratios = []
+        for n, record in row.items():
+            prev = prev_table.get(stage, {}).get(n)
+            if prev and prev['wall_seconds'] > 0:
+                ratios.append(f"{n:,}: {record['wall_seconds'] / prev['wall_seconds']:.2f}x")
+        if ratios:
+            print(f"  {stage:<28}" + '  '.join(ratios))
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=SCRIPTS_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stage scaling across dataset sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='dataset sizes in rows (default: %(default)s)')
+    parser.add_argument('--until', choices=STAGES, default=STAGES[-1],
+                        help='last stage to run (default: all)')
+    parser.add_argument('--n-trials', type=int, default=5,
+                        help='Optuna trials per run (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42, help='data and model seed (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='seconds allowed per size before the run is abandoned')
+    parser.add_argument('--output-dir', default='benchmarks', help='results directory (default: %(default)s)')
+    parser.add_argument('--compare', metavar='JSON', help='earlier results file to compare against')
+    parser.add_argument('--run-one', nargs=3, metavar=('DATA', 'WORK_DIR', 'RESULT'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        data_path, work_dir, result_path = args.run_one
+        run_one(data_path, work_dir, args.until, args.n_trials, args.seed, result_path)
+        return
+
+    output_dir = os.path.abspath(args.output_dir)
+    data_dir = os.path.join(output_dir, 'data')
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    results = {
+        'started_at': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {
+            'sizes': args.sizes,
+            'until': args.until,
+            'n_trials': args.n_trials,
+            'seed': args.seed,
+        },
+        'runs': {},
+    }
+
+    for n_samples in sorted(args.sizes):
+        data_path, generation_seconds = ensure_dataset(data_dir, n_samples, args.seed)
+        work_dir = os.path.join(output_dir, 'work', str(n_samples))
+        result_path = os.path.join(work_dir, 'profile.json')
+        os.makedirs(work_dir, exist_ok=True)
+
+        print(f"\n🚀 Running pipeline on {n_samples:,} rows...")
+        cmd = [sys.executable, os.path.abspath(__file__),
+               '--run-one', data_path, work_dir, result_path,
+               '--until', args.until, '--n-trials', str(args.n_trials), '--seed', str(args.seed)]
+        log_path = os.path.join(work_dir, 'pipeline.log')
+        try:
+            with open(log_path, 'w') as log:
+                subprocess.run(cmd, check=True, timeout=args.timeout,
+                               stdout=log, stderr=subprocess.STDOUT)
+            with open(result_path) as f:
+                run = json.load(f)
+        except subprocess.TimeoutExpired:
+            run = {'error': f'timed out after {args.timeout}s', 'stages': []}
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            run = {'error': f'{e} (see {log_path})', 'stages': []}
+
+        run['generation_seconds'] = generation_seconds
+        results['runs'][str(n_samples)] = run
+
+        done = ', '.join(f"{s['stage']} {s['wall_seconds']:.1f}s" for s in run['stages'])
+        print(f"  {done or run.get('error')}")
+
+    base = os.path.join(output_dir, f'scaling_{stamp}')
+    with open(base + '.json', 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    write_markdown(results, base + '.md')
+    write_plot(results, base + '.png')
+
+    _, _, exponents = summarise(results)
+    print("\nFitted scaling exponents (wall time ~ rows^k):")
+    for stage, exp in exponents.items():
+        if exp is not None:
+            flag = '  ⚠️ super-linear' if exp > SUPERLINEAR_THRESHOLD else ''
+            print(f"  {stage:<28}{exp:6.2f}{flag}")
+    print(f"\n📄 Results: {base}.json, {base}.md, {base}.png")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
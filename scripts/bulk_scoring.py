@@ -0,0 +1,168 @@
+"""
+Bulk Telemetry Scoring
+======================
+
+Scores uploaded telemetry files in fixed-size chunks with bounded
+concurrency, yielding each chunk as soon as it is scored so callers can
+show progress and partial results. A chunk is one multi-row request: one
+`values` payload for the remote WML deployment, or one predict_proba call
+for the local model.
+"""
+
+import io
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from features import RAW_COLUMNS
+
+PREDICTION_COLUMNS = ['Predicted Failure', 'Confidence', 'Failure Risk']
+
+# The failure type whose probability is not a risk
+NO_FAILURE = 'No Failure'
+
+
+def read_telemetry(data, filename):
+    """
+    DataFrame from uploaded CSV or Parquet bytes (format from the file name)
+
+    Raises ImportError naming the missing package when Parquet support (pyarrow) is not installed.
+    """
+    buffer = io.BytesIO(data)
+    if filename.lower().endswith('.parquet'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"Reading Parquet needs pyarrow (see requirements.txt): {e}") from e
+        return pd.read_parquet(buffer, engine='pyarrow')
+    return pd.read_csv(buffer)
+
+
+def validate_readings(df, product_types=('L', 'M', 'H')):
+    """List of problems that prevent scoring (empty when the file is usable)"""
+    missing = [column for column in RAW_COLUMNS if column not in df.columns]
+    if missing:
+        return [f"Missing columns: {', '.join(missing)}"]
+
+    problems = []
+    unknown = sorted(set(df['Type'].dropna().astype(str)) - set(product_types))
+    if unknown:
+        problems.append(f"Unknown machine types: {', '.join(unknown)}")
+    for column in RAW_COLUMNS[1:]:
+        values = pd.to_numeric(df[column], errors='coerce')
+        bad = int(values.isna().sum())
+        if bad:
+            problems.append(f"{column}: {bad:,} missing or non-numeric values")
+    if df['Type'].isna().any():
+        problems.append(f"Type: {int(df['Type'].isna().sum()):,} missing values")
+    return problems
+
+
+def _scored(readings, classes, probabilities):
+    probabilities = np.asarray(probabilities, dtype=float)
+    out = readings.copy()
+    out['Predicted Failure'] = np.asarray(classes, dtype=object)[probabilities.argmax(axis=1)]
+    out['Confidence'] = probabilities.max(axis=1)
+    no_failure = list(classes).index(NO_FAILURE)
+    out['Failure Risk'] = 1.0 - probabilities[:, no_failure]
+    return out
+
+
+def local_chunk_scorer(scorer):
+    """Chunk scorer using an in-process LocalScorer"""
+    def score(chunk):
+        return _scored(chunk, scorer.classes, scorer.predict_proba(chunk))
+    return score
+
+
+def remote_chunk_scorer(client, classes):
+    """
+    Chunk scorer sending each chunk as one multi-row WML request
+
+    classes: failure type of each remote prediction code, in code order
+    """
+    def score(chunk):
+        rows = client.predict(chunk[RAW_COLUMNS].values.tolist())
+        if rows and len(rows[0]) > 1:
+            probabilities = [row[1] for row in rows]
+        else:
+            # No probabilities in the response: one-hot on the predicted code
+            probabilities = np.eye(len(classes))[[row[0] for row in rows]]
+        return _scored(chunk, classes, probabilities)
+    return score
+
+
+class FallbackChunkScorer:
+    """
+    Chunk scorer that scores a chunk with `fallback` when `primary` raises one of `exceptions`
+
+    fallback_chunks counts the chunks the fallback answered, e.g. remote
+    chunks answered by the local model while the deployment was unavailable.
+    """
+
+    def __init__(self, primary, fallback, exceptions):
+        self.primary = primary
+        self.fallback = fallback
+        self.exceptions = exceptions
+        self.fallback_chunks = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def __call__(self, chunk):
+        try:
+            return self.primary(chunk)
+        except self.exceptions as e:
+            with self._lock:
+                self.fallback_chunks += 1
+                self.last_error = str(e)
+            return self.fallback(chunk)
+
+
+def score_in_chunks(score_chunk, readings, chunk_size=500, max_workers=4):
+    """
+    Score readings chunk by chunk on a thread pool
+
+    At most 2 x max_workers chunks are queued or running at a time, so
+    memory and load on the scoring target stay bounded for any file size.
+
+    Yields:
+    (start row, scored chunk DataFrame, progress dict) in completion order
+    """
+    readings = readings.reset_index(drop=True)
+    starts = iter(range(0, len(readings), chunk_size))
+    start_time = time.perf_counter()
+    rows_done = chunks_done = 0
+    n_chunks = -(-len(readings) // chunk_size)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+
+        def submit_next():
+            start = next(starts, None)
+            if start is not None:
+                chunk = readings.iloc[start:start + chunk_size]
+                pending[pool.submit(score_chunk, chunk)] = start
+
+        for _ in range(2 * max_workers):
+            submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                start = pending.pop(future)
+                scored = future.result()
+                submit_next()
+                rows_done += len(scored)
+                chunks_done += 1
+                elapsed = time.perf_counter() - start_time
+                yield start, scored, {
+                    'rows': rows_done,
+                    'total_rows': len(readings),
+                    'chunks': chunks_done,
+                    'total_chunks': n_chunks,
+                    'elapsed_seconds': elapsed,
+                    'rows_per_second': rows_done / elapsed if elapsed > 0 else 0.0,
+                }
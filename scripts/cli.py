@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Predictive Maintenance Command-Line Interface
+=============================================
+
+One entry point for the project's workflows:
+
+    python3 scripts/cli.py train [pipeline options]      # full training pipeline
+    python3 scripts/cli.py score --type L --air-temp 300.5 --process-temp 310.2 \\
+                                 --rpm 1500 --torque 45.3 --tool-wear 120
+    python3 scripts/cli.py score --csv readings.csv [--explain]
+    python3 scripts/cli.py evaluate --csv data/predictive_maintenance.csv
+    python3 scripts/cli.py models list                   # published model versions
+    python3 scripts/cli.py models rollback               # back to the previous version
+    python3 scripts/cli.py bench imports                 # import-time budget check
+    python3 scripts/cli.py bench scaling [options]       # pipeline scaling benchmark
+    python3 scripts/cli.py bench load --csv FILE [options]  # scoring load test
+    python3 scripts/cli.py bench app [options]           # Streamlit rerun cost per interaction
+    python3 scripts/cli.py bench backends [--export]     # inference runtimes: labels and speed
+    python3 scripts/cli.py bench explain [options]       # explanation throughput
+    python3 scripts/cli.py bench remote [options]        # scoring client vs. the fault-injecting mock server
+
+Only the standard library is imported at module load. Each subcommand
+imports the libraries it needs inside its handler, so `score --help` never
+touches pandas or xgboost and scoring never loads matplotlib, seaborn,
+plotly, optuna, lightgbm or imbalanced-learn.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Libraries the scoring path must never import
+TRAINING_ONLY_MODULES = ['matplotlib', 'seaborn', 'plotly', 'optuna', 'lightgbm', 'imblearn']
+
+# Default import-time budgets in seconds (wall time of a fresh interpreter)
+HELP_BUDGET = 0.5
+SCORE_BUDGET = 5.0
+
+
+def cmd_train(args):
+    """Run the complete training pipeline"""
+    sys.path.insert(0, SCRIPTS_DIR)
+    from predictive_maintenance_pipeline import main as pipeline_main
+    pipeline_main(args.extra_args)
+
+
+def cmd_models(args):
+    """List, activate and roll back published model versions"""
+    sys.path.insert(0, SCRIPTS_DIR)
+    from model_registry import main as registry_main
+    registry_main(args.extra_args)
+
+
+def _load_readings(args):
+    import pandas as pd
+
+    if args.csv:
+        return pd.read_csv(args.csv)
+
+    values = {
+        'Type': args.type,
+        'Air temperature [K]': args.air_temp,
+        'Process temperature [K]': args.process_temp,
+        'Rotational speed [rpm]': args.rpm,
+        'Torque [Nm]': args.torque,
+        'Tool wear [min]': args.tool_wear,
+    }
+    missing = [name for name, value in values.items() if value is None]
+    if missing:
+        raise SystemExit(f"score: missing reading values for {missing} (or pass --csv)")
+    return pd.DataFrame({name: [value] for name, value in values.items()})
+
+
+def cmd_score(args):
+    """Predict failure types for raw sensor readings"""
+    import joblib
+    sys.path.insert(0, SCRIPTS_DIR)
+    from features import raw_to_features
+    from model_registry import resolve_model_dir
+    # The version's own prediction script (a flat models/ directory keeps it at the top)
+    sys.path.insert(0, args.model_path)
+    sys.path.insert(0, resolve_model_dir(args.model_path))
+    from predict_failure import predict_failure
+    from streaming_features import add_window_features, engine_for
+
+    # The published version in use, so every artifact comes from the same training run
+    model_path = os.path.join(resolve_model_dir(args.model_path), '')
+    readings = _load_readings(args)
+    if args.explain:
+        from explanations import BASE_VALUE, EXPLAINED_CLASS
+        from local_scorer import LocalScorer
+        scorer = LocalScorer(model_path, backend='sklearn')
+        explanation = scorer.explain(scorer.add_window_features(readings))
+        for row in explanation.to_dict('records'):
+            prediction, base_value = row.pop(EXPLAINED_CLASS), row.pop(BASE_VALUE)
+            print(json.dumps({'prediction': prediction, 'base_value': float(base_value),
+                              'contributions': {name: float(value) for name, value in row.items()}}))
+        return
+    le_type = joblib.load(f'{model_path}label_encoder_type.pkl')
+    feature_names = joblib.load(f'{model_path}feature_names.pkl')
+    # Window features: the rows are each machine's readings in order (--csv), or a first reading
+    engine = engine_for(joblib.load(f'{model_path}model_metadata.pkl'), feature_names)
+    if engine is not None:
+        readings = add_window_features(readings, engine)
+    features = raw_to_features(readings, le_type, feature_names)
+    backend = None
+    if args.backend:
+        from inference_backends import load_backend
+        backend = load_backend(args.backend, model_path)
+
+    if args.probabilities:
+        classes = joblib.load(f'{model_path}label_encoder_failure.pkl').classes_
+        predictions, probabilities = predict_failure(features, model_path=model_path,
+                                                     return_probabilities=True, backend=backend)
+        for label, probs in zip(predictions, probabilities):
+            print(json.dumps({'prediction': label,
+                              'probabilities': dict(zip(classes, map(float, probs)))}))
+    else:
+        for label in predict_failure(features, model_path=model_path, backend=backend):
+            print(label)
+
+
+def cmd_evaluate(args):
+    """Score the saved model against a labelled CSV"""
+    import joblib
+    import pandas as pd
+    sys.path.insert(0, SCRIPTS_DIR)
+    from evaluation import evaluate_model
+    from features import raw_to_features
+    from model_registry import resolve_model_dir
+    from streaming_features import add_window_features, engine_for
+
+    model_path = os.path.join(resolve_model_dir(args.model_path), '')
+    metadata = joblib.load(f'{model_path}model_metadata.pkl')
+    model_file = f'{model_path}best_model_{metadata["best_model_name"].lower().replace(" ", "_")}.pkl'
+    model = joblib.load(model_file)
+    scaler = joblib.load(f'{model_path}feature_scaler.pkl')
+    le_type = joblib.load(f'{model_path}label_encoder_type.pkl')
+    le_failure = joblib.load(f'{model_path}label_encoder_failure.pkl')
+    feature_names = joblib.load(f'{model_path}feature_names.pkl')
+
+    # Stream the CSV: one predict_proba pass per chunk, only the confusion matrix is kept.
+    # Window features follow each machine through the chunks, as in live scoring.
+    engine = engine_for(metadata, feature_names)
+
+    def chunks():
+        for df in pd.read_csv(args.csv, chunksize=args.chunk_size):
+            if engine is not None:
+                df = add_window_features(df, engine)
+            yield (scaler.transform(raw_to_features(df, le_type, feature_names)),
+                   le_failure.transform(df['Failure Type']))
+
+    n_classes = len(le_failure.classes_)
+    result = evaluate_model(model, chunks(), n_classes, keep_outputs=False)
+    cm = result.pop('confusion_matrix')
+    results = {'model': metadata['best_model_name'], 'rows': int(cm.sum()), **result}
+    print(json.dumps(results, indent=2))
+    print("Confusion matrix (rows = actual, columns = predicted):")
+    print(pd.DataFrame(cm, index=le_failure.classes_, columns=le_failure.classes_))
+
+
+def _measure(cmd):
+    """Wall time and imported top-level modules of a fresh interpreter running cmd"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + cmd,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"bench imports: {' '.join(cmd)} failed:\n{result.stderr[-2000:]}")
+
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip()
+            modules.add(name.split('.')[0])
+    return elapsed, modules
+
+
+def cmd_bench(args):
+    """Performance checks and benchmarks"""
+    if args.bench == 'scaling':
+        sys.argv = [os.path.join(SCRIPTS_DIR, 'benchmark_scaling.py')] + args.extra_args
+        sys.path.insert(0, SCRIPTS_DIR)
+        from benchmark_scaling import main as scaling_main
+        scaling_main()
+        return
+    if args.bench == 'load':
+        sys.path.insert(0, SCRIPTS_DIR)
+        from load_test import main as load_main
+        load_main(args.extra_args)
+        return
+    if args.bench == 'app':
+        sys.path.insert(0, SCRIPTS_DIR)
+        from app_rerun_benchmark import main as app_main
+        app_main(args.extra_args)
+        return
+    if args.bench == 'backends':
+        sys.path.insert(0, SCRIPTS_DIR)
+        from inference_backends import main as backends_main
+        backends_main(args.extra_args)
+        return
+    if args.bench == 'explain':
+        sys.path.insert(0, SCRIPTS_DIR)
+        from explanations import main as explain_main
+        explain_main(args.extra_args)
+        return
+    if args.bench == 'remote':
+        sys.path.insert(0, SCRIPTS_DIR)
+        from remote_scoring_check import main as remote_main
+        remote_main(args.extra_args)
+        return
+
+    cli = os.path.abspath(__file__)
+    checks = [
+        ('score --help', [cli, 'score', '--help'], args.help_budget, ['pandas', 'xgboost', 'sklearn']),
+        ('score single reading', [cli, 'score', '--model-path', args.model_path,
+                                  '--type', 'L', '--air-temp', '300.5', '--process-temp', '310.2',
+                                  '--rpm', '1500', '--torque', '45.3', '--tool-wear', '120'],
+         args.score_budget, []),
+    ]
+
+    failed = False
+    print(f"{'Check':<24}{'Seconds':>9}{'Budget':>9}  Result")
+    for name, cmd, budget, extra_forbidden in checks:
+        # Best of a few runs, so a cold disk cache does not fail the check
+        runs = [_measure(cmd) for _ in range(args.repeat)]
+        elapsed = min(t for t, _ in runs)
+        forbidden = sorted(set(TRAINING_ONLY_MODULES + extra_forbidden) & runs[0][1])
+
+        problems = []
+        if elapsed > budget:
+            problems.append('over budget')
+        if forbidden:
+            problems.append(f"imports {', '.join(forbidden)}")
+        failed |= bool(problems)
+        print(f"{name:<24}{elapsed:>9.2f}{budget:>9.2f}  {'; '.join(problems) or 'ok'}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='Predictive maintenance toolkit')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Options of train, models and the bench passthroughs (including --help) go to the underlying script
+    train = subparsers.add_parser('train', add_help=False,
+                                  help='run the complete training pipeline (options as predictive_maintenance_pipeline.py)')
+    train.set_defaults(func=cmd_train, passthrough=True)
+
+    models = subparsers.add_parser('models', add_help=False,
+                                   help='published model versions: list, activate, rollback (options as model_registry.py)')
+    models.set_defaults(func=cmd_models, passthrough=True)
+
+    score = subparsers.add_parser('score', help='predict failure types for raw readings')
+    score.add_argument('--csv', help='CSV of raw readings (Type plus the five sensor columns)')
+    score.add_argument('--type', choices=['L', 'M', 'H'], help='product quality variant')
+    score.add_argument('--air-temp', type=float, help='air temperature [K]')
+    score.add_argument('--process-temp', type=float, help='process temperature [K]')
+    score.add_argument('--rpm', type=float, help='rotational speed [rpm]')
+    score.add_argument('--torque', type=float, help='torque [Nm]')
+    score.add_argument('--tool-wear', type=float, help='tool wear [min]')
+    score.add_argument('--probabilities', action='store_true',
+                       help='print JSON lines with class probabilities')
+    score.add_argument('--explain', action='store_true',
+                       help='print JSON lines with each sensor\'s contribution (log-odds) to the prediction')
+    score.add_argument('--model-path', default='models', help='saved artifacts (default: %(default)s)')
+    score.add_argument('--backend', choices=['auto', 'sklearn', 'booster', 'onnx', 'treelite'],
+                       help='inference backend (default: the saved model; see bench backends)')
+    score.set_defaults(func=cmd_score)
+
+    evaluate = subparsers.add_parser('evaluate', help='evaluate the saved model on a labelled CSV')
+    evaluate.add_argument('--csv', required=True, help='labelled readings in the training data format')
+    evaluate.add_argument('--model-path', default='models', help='saved artifacts (default: %(default)s)')
+    evaluate.add_argument('--chunk-size', type=int, default=100_000,
+                          help='rows read and scored at a time (default: %(default)s)')
+    evaluate.set_defaults(func=cmd_evaluate)
+
+    bench = subparsers.add_parser('bench', help='performance checks and benchmarks')
+    bench_sub = bench.add_subparsers(dest='bench', required=True)
+    imports = bench_sub.add_parser('imports', help='check CLI startup against import-time budgets')
+    imports.add_argument('--help-budget', type=float, default=HELP_BUDGET,
+                         help='seconds allowed for `score --help` (default: %(default)s)')
+    imports.add_argument('--score-budget', type=float, default=SCORE_BUDGET,
+                         help='seconds allowed to score one reading (default: %(default)s)')
+    imports.add_argument('--repeat', type=int, default=3, help='runs per check, best is kept')
+    imports.add_argument('--model-path', default='models', help='saved artifacts (default: %(default)s)')
+    bench_sub.add_parser('scaling', add_help=False,
+                         help='pipeline scaling benchmark (options as benchmark_scaling.py)'
+                         ).set_defaults(passthrough=True)
+    bench_sub.add_parser('load', add_help=False,
+                         help='open-loop scoring load test (options as load_test.py)'
+                         ).set_defaults(passthrough=True)
+    bench_sub.add_parser('app', add_help=False,
+                         help='server time and payload of app interactions (options as app_rerun_benchmark.py)'
+                         ).set_defaults(passthrough=True)
+    bench_sub.add_parser('backends', add_help=False,
+                         help='export, verify and benchmark inference backends (options as inference_backends.py)'
+                         ).set_defaults(passthrough=True)
+    bench_sub.add_parser('explain', add_help=False,
+                         help='throughput of batched, cached explanations (options as explanations.py)'
+                         ).set_defaults(passthrough=True)
+    bench_sub.add_parser('remote', add_help=False,
+                         help='scoring client against the fault-injecting mock server '
+                              '(options as remote_scoring_check.py)'
+                         ).set_defaults(passthrough=True)
+    bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra_args = parser.parse_known_args(argv)
+    if extra_args and not getattr(args, 'passthrough', False):
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+    args.extra_args = extra_args
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
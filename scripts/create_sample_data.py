@@ -1,115 +1,235 @@
-import pandas as pd
-import numpy as np
-from sklearn.datasets import make_classification
+"""
+Synthetic Predictive Maintenance Data
+=====================================
+
+Generates data resembling the Kaggle predictive maintenance dataset.
+
+Small datasets are built in memory with create_synthetic_maintenance_data().
+Large ones (load tests, scaling benchmarks) are written by generate_dataset()
+in fixed-size chunks straight to CSV or Parquet, so memory stays bounded at
+any size. Chunks run in worker processes, and each chunk is seeded from its
+own child of one np.random.SeedSequence, so the output depends only on the
+seed and chunk size and not on the number of workers.
+
+Usage:
+    python3 scripts/create_sample_data.py                          # 10,000 rows
+    python3 scripts/create_sample_data.py --n-samples 10000000 \\
+        --output data/pm_10m.parquet --workers 8
+"""
+
+import argparse
 import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-# Set random seed for reproducibility
-np.random.seed(42)
+import numpy as np
+import pandas as pd
+
+PRODUCT_TYPES = ['L', 'M', 'H']  # Low, Medium, High quality variants
+PRODUCT_TYPE_P = [0.6, 0.3, 0.1]
+
+# Failure rules in priority order: (failure type, probability when the condition holds)
+FAILURE_RULES = [
+    ('Tool Wear Failure', 0.7),
+    ('Heat Dissipation Failure', 0.6),
+    ('Power Failure', 0.5),
+    ('Overstrain Failure', 0.4),
+    ('Random Failure', 0.01),
+]
 
-def create_synthetic_maintenance_data(n_samples=10000):
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def label_failures(df, rng=np.random):
+    """
+    Assign failure types to sensor readings with vectorized rule masks
+
+    The first rule (in FAILURE_RULES order) whose condition holds and whose
+    random draw succeeds sets the failure type; rows matching no rule are
+    'No Failure'.
+
+    Parameters:
+    df: DataFrame or dict with the five sensor columns
+    rng: np.random.Generator (or the np.random module) used for the draws
+
+    Returns:
+    (machine failure 0/1 array, failure type array)
+    """
+    n_samples = len(df['Tool wear [min]'])
+    conditions = {
+        'Tool Wear Failure': df['Tool wear [min]'] > 200,
+        'Heat Dissipation Failure': (df['Air temperature [K]'] > 300) & (df['Process temperature [K]'] > 310),
+        'Power Failure': (df['Torque [Nm]'] > 60) & (df['Rotational speed [rpm]'] < 1200),
+        'Overstrain Failure': (df['Torque [Nm]'] > 55) & (df['Tool wear [min]'] > 150),
+        'Random Failure': np.ones(n_samples, dtype=bool),
+    }
+
+    failure_types = np.full(n_samples, 'No Failure', dtype=object)
+    unassigned = np.ones(n_samples, dtype=bool)
+    for failure_type, probability in FAILURE_RULES:
+        hit = unassigned & np.asarray(conditions[failure_type]) & (rng.random(n_samples) < probability)
+        failure_types[hit] = failure_type
+        unassigned &= ~hit
+
+    return (~unassigned).astype(int), failure_types
+
+
+def create_synthetic_maintenance_data(n_samples=10000, rng=None, start_udi=1):
     """
     Create synthetic predictive maintenance data similar to the Kaggle dataset
+
+    Parameters:
+    n_samples: number of rows
+    rng: np.random.Generator (default: the global np.random state, so
+         np.random.seed() keeps working)
+    start_udi: UDI of the first row, for chunks of a larger dataset
     """
-    
+    rng = np.random if rng is None else rng
+
     # Generate base features
     data = {}
-    
-    # Product ID (categorical)
-    product_types = ['L', 'M', 'H']  # Low, Medium, High quality variants
-    data['Type'] = np.random.choice(product_types, n_samples, p=[0.6, 0.3, 0.1])
-    
-    # Air temperature [K]
-    data['Air temperature [K]'] = np.random.normal(298.1, 2.0, n_samples)
-    
-    # Process temperature [K] 
-    data['Process temperature [K]'] = data['Air temperature [K]'] + np.random.normal(10, 1.5, n_samples)
-    
-    # Rotational speed [rpm]
-    data['Rotational speed [rpm]'] = np.random.normal(1538.8, 179.3, n_samples)
-    
-    # Torque [Nm]
-    data['Torque [Nm]'] = np.random.normal(40.17, 9.97, n_samples)
-    
-    # Tool wear [min]
-    data['Tool wear [min]'] = np.random.exponential(108, n_samples)
-    
+    data['Type'] = rng.choice(PRODUCT_TYPES, n_samples, p=PRODUCT_TYPE_P)
+    data['Air temperature [K]'] = rng.normal(298.1, 2.0, n_samples)
+    data['Process temperature [K]'] = data['Air temperature [K]'] + rng.normal(10, 1.5, n_samples)
+    data['Rotational speed [rpm]'] = rng.normal(1538.8, 179.3, n_samples)
+    data['Torque [Nm]'] = rng.normal(40.17, 9.97, n_samples)
+    data['Tool wear [min]'] = rng.exponential(108, n_samples)
+
     # Create failure conditions based on realistic scenarios
-    failures = []
-    failure_types = []
-    
-    for i in range(n_samples):
-        failure = 0
-        failure_type = 'No Failure'
-        
-        # Tool Wear Failure (TWF)
-        if data['Tool wear [min]'][i] > 200 and np.random.random() < 0.7:
-            failure = 1
-            failure_type = 'Tool Wear Failure'
-        
-        # Heat Dissipation Failure (HDF)
-        elif (data['Air temperature [K]'][i] > 300 and 
-              data['Process temperature [K]'][i] > 310 and 
-              np.random.random() < 0.6):
-            failure = 1
-            failure_type = 'Heat Dissipation Failure'
-        
-        # Power Failure (PWF)
-        elif (data['Torque [Nm]'][i] > 60 and 
-              data['Rotational speed [rpm]'][i] < 1200 and 
-              np.random.random() < 0.5):
-            failure = 1
-            failure_type = 'Power Failure'
-        
-        # Overstrain Failure (OSF)
-        elif (data['Torque [Nm]'][i] > 55 and 
-              data['Tool wear [min]'][i] > 150 and 
-              np.random.random() < 0.4):
-            failure = 1
-            failure_type = 'Overstrain Failure'
-        
-        # Random Failure (RNF)
-        elif np.random.random() < 0.01:
-            failure = 1
-            failure_type = 'Random Failure'
-        
-        failures.append(failure)
-        failure_types.append(failure_type)
-    
-    # Add machine failure and failure type columns
-    data['Machine failure'] = failures
-    data['Failure Type'] = failure_types
-    
-    # Create DataFrame
+    data['Machine failure'], data['Failure Type'] = label_failures(data, rng)
+
     df = pd.DataFrame(data)
-    
-    # Add UDI (Unique identifier)
-    df.insert(0, 'UDI', range(1, len(df) + 1))
-    
-    # Add Product ID
-    df.insert(1, 'Product ID', [f"{row['Type']}{str(row['UDI']).zfill(5)}" for _, row in df.iterrows()])
-    
+
+    # Add UDI (Unique identifier) and Product ID
+    udi = np.arange(start_udi, start_udi + n_samples)
+    df.insert(0, 'UDI', udi)
+    df.insert(1, 'Product ID', df['Type'] + pd.Series(udi).astype(str).str.zfill(5))
+
     return df
 
+
+def _output_format(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError(f"Unsupported output format '{fmt}' (use csv or parquet)")
+    if fmt == 'parquet':
+        # Checked before any worker starts writing parts
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"Parquet output needs pyarrow (see requirements.txt): {e}") from e
+    return fmt
+
+
+def _write_chunk(task):
+    """Worker: generate one seeded chunk into its part file"""
+    part_path, seed_seq, n_samples, start_udi, fmt = task
+    df = create_synthetic_maintenance_data(n_samples, rng=np.random.default_rng(seed_seq),
+                                           start_udi=start_udi)
+    if fmt == 'csv':
+        df.to_csv(part_path, index=False, header=start_udi == 1)
+    else:
+        df.to_parquet(part_path, index=False)
+    return part_path, df['Failure Type'].value_counts().to_dict()
+
+
+def _concatenate_parts(part_paths, output_path, fmt):
+    if fmt == 'csv':
+        with open(output_path, 'wb') as out:
+            for part_path in part_paths:
+                with open(part_path, 'rb') as part:
+                    shutil.copyfileobj(part, out)
+        return
+
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for part_path in part_paths:
+            table = pq.read_table(part_path)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def generate_dataset(output_path, n_samples, chunk_size=DEFAULT_CHUNK_SIZE, seed=42,
+                     workers=None, fmt=None):
+    """
+    Write a synthetic dataset of any size in seeded chunks
+
+    Parameters:
+    output_path: destination .csv or .parquet file (replaced atomically)
+    n_samples: total number of rows
+    chunk_size: rows per chunk; peak memory is about workers x chunk_size rows
+    seed: root seed; chunk i uses SeedSequence(seed).spawn(n_chunks)[i]
+    workers: worker processes (default: CPU count, 1 runs in-process)
+    fmt: 'csv' or 'parquet' (default: from the file extension)
+
+    Returns:
+    {failure type: row count}
+    """
+    fmt = _output_format(output_path, fmt)
+    n_chunks = max(1, -(-n_samples // chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    workers = min(workers or os.cpu_count() or 1, n_chunks)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    part_dir = tempfile.mkdtemp(prefix='.parts_', dir=output_dir)
+    try:
+        tasks = []
+        for i, seed_seq in enumerate(seeds):
+            start = i * chunk_size
+            tasks.append((os.path.join(part_dir, f'{i:06d}.{fmt}'), seed_seq,
+                          min(chunk_size, n_samples - start), start + 1, fmt))
+
+        if workers == 1:
+            results = list(map(_write_chunk, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_write_chunk, tasks))
+
+        counts = Counter()
+        for _, chunk_counts in results:
+            counts.update(chunk_counts)
+
+        tmp_path = os.path.join(part_dir, 'combined')
+        _concatenate_parts([path for path, _ in results], tmp_path, fmt)
+        os.replace(tmp_path, output_path)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    return dict(counts)
+
+
 def main():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
-    # Generate synthetic data
+    parser = argparse.ArgumentParser(description='Generate synthetic predictive maintenance data')
+    parser.add_argument('--n-samples', type=int, default=10000, help='rows (default: %(default)s)')
+    parser.add_argument('--output', default='data/predictive_maintenance.csv',
+                        help='.csv or .parquet destination (default: %(default)s)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='rows per chunk (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=42, help='root seed (default: %(default)s)')
+    args = parser.parse_args()
+
     print("Generating synthetic predictive maintenance data...")
-    df = create_synthetic_maintenance_data(10000)
-    
-    # Save to CSV
-    output_path = 'data/predictive_maintenance.csv'
-    df.to_csv(output_path, index=False)
-    
-    print(f"Dataset created and saved to {output_path}")
-    print(f"Dataset shape: {df.shape}")
-    print("\nDataset info:")
-    print(df.info())
+    try:
+        counts = generate_dataset(args.output, args.n_samples, chunk_size=args.chunk_size,
+                                  seed=args.seed, workers=args.workers)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+
+    print(f"Dataset created and saved to {args.output}")
+    print(f"Rows: {args.n_samples:,}")
     print("\nFailure type distribution:")
-    print(df['Failure Type'].value_counts())
-    print("\nFirst few rows:")
-    print(df.head())
+    print(pd.Series(counts).sort_values(ascending=False))
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
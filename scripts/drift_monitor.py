@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Input Drift Monitor
+===================
+
+Checks whether the readings being scored still look like the training data.
+
+At training time the pipeline saves reference bins per feature
+(models/drift_reference.pkl): decile cut points of the training rows and the
+share of rows in each bin. At scoring time every observed reading adds one
+count per feature to a streaming histogram over those same bins. Counts are
+kept per time slot in a ring (default 60 slots of 60 s), so memory is fixed
+and old readings age out of the window on their own.
+
+Per feature and window:
+- PSI (population stability index) of the live bin shares against the
+  reference shares: below 0.1 stable, 0.1-0.25 worth a look, above 0.25 shifted
+- KS: the largest gap between the live and reference cumulative shares, a
+  binned Kolmogorov-Smirnov statistic
+
+Usage:
+    python3 scripts/drift_monitor.py --build-reference data/predictive_maintenance.csv
+    python3 scripts/drift_monitor.py --csv data/telemetry.csv
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from features import ALL_FEATURES, ENGINEERED_FEATURES, NUMERICAL_COLS, RAW_COLUMNS
+from model_registry import current_version, publish_derived, resolve_model_dir
+
+REFERENCE_FILE = 'drift_reference.pkl'
+
+# PSI levels for "warning" and "drift", KS gap for "drift"
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
+KS_DRIFT = 0.15
+
+# Shares below this are clamped so an empty bin does not make PSI infinite
+MIN_SHARE = 1e-4
+
+
+def _feature_matrix(readings, features, type_classes):
+    """
+    (rows, features) float matrix from raw readings
+
+    readings may be a DataFrame or any mapping of RAW_COLUMNS to sequences;
+    unknown product types become NaN.
+    """
+    values = {c: np.asarray(readings[c], dtype=float) for c in NUMERICAL_COLS}
+    X = np.empty((len(values[NUMERICAL_COLS[0]]), len(features)))
+    for j, name in enumerate(features):
+        if name in values:
+            X[:, j] = values[name]
+        elif name == 'Type_encoded':
+            types = np.asarray(readings['Type'], dtype=object).astype(str)
+            codes = np.searchsorted(type_classes, types)
+            known = (codes < len(type_classes)) & (type_classes[np.minimum(codes, len(type_classes) - 1)] == types)
+            X[:, j] = np.where(known, codes, np.nan)
+        else:
+            X[:, j] = ENGINEERED_FEATURES[name](values)
+    return X
+
+
+def build_reference(readings, type_classes, features=ALL_FEATURES, n_bins=10):
+    """
+    Reference bins from training readings
+
+    Parameters:
+    readings: DataFrame with the RAW_COLUMNS (real rows, before any resampling)
+    type_classes: product types in label encoder order
+    features: features to monitor
+    n_bins: quantile bins per feature (fewer for features with few distinct values)
+
+    Returns:
+    dict of plain lists/arrays, saved with joblib next to the model
+    """
+    type_classes = np.asarray(type_classes, dtype=str)
+    X = _feature_matrix(readings, features, type_classes)
+    cuts, shares = [], []
+    for j in range(len(features)):
+        column = X[:, j][np.isfinite(X[:, j])]
+        # Interior cut points; ties (e.g. a discrete feature) collapse to fewer bins
+        feature_cuts = np.unique(np.quantile(column, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(feature_cuts, column, side='right'), minlength=len(feature_cuts) + 1)
+        cuts.append(feature_cuts)
+        shares.append(counts / counts.sum())
+    return {
+        'features': list(features),
+        'cuts': cuts,
+        'shares': shares,
+        'type_classes': type_classes.tolist(),
+        'n_rows': len(X),
+        'created': datetime.now().isoformat(),
+    }
+
+
+def load_reference(model_path='models'):
+    """Saved reference bins of the current model version, or None when it was trained without them"""
+    try:
+        return joblib.load(os.path.join(resolve_model_dir(model_path), REFERENCE_FILE))
+    except FileNotFoundError:
+        return None
+
+
+def psi(live_shares, reference_shares):
+    """Population stability index between two sets of bin shares"""
+    live = np.maximum(live_shares, MIN_SHARE)
+    reference = np.maximum(reference_shares, MIN_SHARE)
+    return float(np.sum((live - reference) * np.log(live / reference)))
+
+
+class DriftMonitor:
+    """
+    Streaming per-feature histograms of scored readings, compared with the reference
+
+    Parameters:
+    reference: dict from build_reference / load_reference
+    slot_seconds: width of one time slot
+    n_slots: slots kept; the longest window is slot_seconds x n_slots
+    min_samples: readings a window needs before it is scored (PSI of a
+                 small sample is mostly noise)
+    """
+
+    def __init__(self, reference, slot_seconds=60, n_slots=60, min_samples=500):
+        self.reference = reference
+        self.features = reference['features']
+        self.slot_seconds = slot_seconds
+        self.n_slots = n_slots
+        self.min_samples = min_samples
+        self._type_classes = np.asarray(reference['type_classes'], dtype=str)
+        self._cuts = [np.asarray(c, dtype=float) for c in reference['cuts']]
+        self._shares = [np.asarray(s, dtype=float) for s in reference['shares']]
+        # Every feature's bins side by side in one row per slot
+        sizes = [len(c) + 1 for c in self._cuts]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        self._n_bins = int(sum(sizes))
+        # Cut points as one (features, cuts) matrix padded with +inf, so binning is one comparison
+        self._cut_matrix = np.full((len(self._cuts), max(sizes) - 1), np.inf)
+        for j, cuts in enumerate(self._cuts):
+            self._cut_matrix[j, :len(cuts)] = cuts
+        self._slot_ids = np.full(n_slots, -1, dtype=np.int64)
+        self._counts = np.zeros((n_slots, self._n_bins), dtype=np.int64)
+        self._rows = np.zeros(n_slots, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.observed = 0
+
+    def observe(self, readings, now=None):
+        """Count a batch of raw readings (DataFrame or mapping of RAW_COLUMNS to sequences)"""
+        X = _feature_matrix(readings, self.features, self._type_classes)
+        X = X[np.isfinite(X).all(axis=1)]
+        if not len(X):
+            return
+        # Bin index = number of cut points <= value (searchsorted side='right')
+        bins = (self._cut_matrix <= X[:, :, None]).sum(axis=2)
+        counts = np.bincount((bins + self._offsets).ravel(), minlength=self._n_bins)
+
+        slot_id = int((time.time() if now is None else now) // self.slot_seconds)
+        slot = slot_id % self.n_slots
+        with self._lock:
+            if self._slot_ids[slot] != slot_id:
+                # Slot reused for a new interval: clear what it held
+                self._slot_ids[slot] = slot_id
+                self._counts[slot] = 0
+                self._rows[slot] = 0
+            self._counts[slot] += counts
+            self._rows[slot] += len(X)
+            self.observed += len(X)
+
+    def observe_one(self, reading, now=None):
+        """Count one [Type, air, process, rpm, torque, wear] reading"""
+        self.observe({name: [value] for name, value in zip(RAW_COLUMNS, reading)}, now=now)
+
+    def snapshot(self, window_seconds=None, now=None):
+        """
+        Drift scores over the last window_seconds (default: the whole ring)
+
+        Returns:
+        dict with samples, status ('insufficient data', 'ok', 'warning' or
+        'drift'), per-feature {psi, ks, status} and alerts, the features in
+        warning or drift ordered by PSI
+        """
+        now = time.time() if now is None else now
+        window_seconds = window_seconds or self.slot_seconds * self.n_slots
+        current = int(now // self.slot_seconds)
+        n_window = max(1, min(self.n_slots, int(np.ceil(window_seconds / self.slot_seconds))))
+        with self._lock:
+            in_window = self._slot_ids > current - n_window
+            counts = self._counts[in_window].sum(axis=0)
+            samples = int(self._rows[in_window].sum())
+
+        result = {'window_seconds': window_seconds, 'samples': samples, 'features': {}, 'alerts': []}
+        if samples < self.min_samples:
+            result['status'] = 'insufficient data'
+            return result
+
+        for j, name in enumerate(self.features):
+            start = self._offsets[j]
+            live = counts[start:start + len(self._shares[j])] / samples
+            reference = self._shares[j]
+            score = psi(live, reference)
+            ks = float(np.abs(np.cumsum(live) - np.cumsum(reference)).max())
+            if score >= PSI_DRIFT or ks >= KS_DRIFT:
+                status = 'drift'
+            elif score >= PSI_WARNING:
+                status = 'warning'
+            else:
+                status = 'ok'
+            result['features'][name] = {'psi': score, 'ks': ks, 'status': status}
+
+        flagged = [(name, f) for name, f in result['features'].items() if f['status'] != 'ok']
+        result['alerts'] = [dict(feature=name, **f) for name, f in sorted(flagged, key=lambda item: -item[1]['psi'])]
+        statuses = {f['status'] for f in result['features'].values()}
+        result['status'] = 'drift' if 'drift' in statuses else 'warning' if 'warning' in statuses else 'ok'
+        return result
+
+
+def print_report(snapshot):
+    print(f"📊 {snapshot['samples']:,} readings • status: {snapshot['status']}")
+    if not snapshot['features']:
+        return
+    print(f"{'feature':<26} {'PSI':>7} {'KS':>6}  status")
+    for name, f in snapshot['features'].items():
+        print(f"{name:<26} {f['psi']:>7.3f} {f['ks']:>6.3f}  {f['status']}")
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Input drift of scored readings against the training data')
+    parser.add_argument('--model-path', default='models', help='directory with the saved model (default: %(default)s)')
+    parser.add_argument('--build-reference', metavar='CSV',
+                        help='(re)build the reference bins from a training CSV, e.g. for a model trained '
+                             'before they were saved')
+    parser.add_argument('--csv', help='telemetry to compare with the reference')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='readings per observe() call when replaying --csv (default: %(default)s)')
+    parser.add_argument('--limit', type=int, default=20000, help='rows of --csv replayed (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if args.build_reference:
+        model_dir = resolve_model_dir(args.model_path)
+        le_type = joblib.load(os.path.join(model_dir, 'label_encoder_type.pkl'))
+        reference = build_reference(pd.read_csv(args.build_reference), le_type.classes_)
+        summary = f"Reference bins for {len(reference['features'])} features ({reference['n_rows']:,} rows)"
+        if current_version(args.model_path) is None:
+            path = os.path.join(model_dir, REFERENCE_FILE)
+            joblib.dump(reference, path)
+            print(f"✅ {summary} saved: {path}")
+        else:
+            # Published versions are never modified: publish a copy with the reference added
+            version, source = publish_derived(
+                args.model_path, lambda staging: joblib.dump(reference, os.path.join(staging, REFERENCE_FILE)))
+            print(f"✅ {summary} published as version {version} (version {source} plus the reference)")
+
+    if args.csv:
+        reference = load_reference(args.model_path)
+        if reference is None:
+            raise SystemExit(f"No {REFERENCE_FILE} in {args.model_path}; run with --build-reference first")
+        readings = pd.read_csv(args.csv, nrows=args.limit)
+        monitor = DriftMonitor(reference, min_samples=1)
+        start = time.perf_counter()
+        if args.batch_size == 1:
+            for reading in readings[RAW_COLUMNS].itertuples(index=False):
+                monitor.observe_one(list(reading))
+        else:
+            for i in range(0, len(readings), args.batch_size):
+                monitor.observe(readings.iloc[i:i + args.batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ observe: {1e6 * elapsed / len(readings):.1f} µs per reading "
+              f"({args.batch_size} per call)")
+        print_report(monitor.snapshot())
+
+
+if __name__ == "__main__":
+    main()
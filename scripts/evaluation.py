@@ -0,0 +1,107 @@
+"""
+Single-Pass Model Evaluation
+============================
+
+Evaluates classifiers with one predict_proba pass per test set: labels are
+the argmax of the probabilities, and accuracy plus weighted precision,
+recall and F1 are all derived from a single confusion matrix (the same
+definitions as the sklearn *_score functions with average='weighted' and
+zero_division=0).
+
+Test sets can be passed as arrays, evaluated in fixed-size chunks, or as
+an iterable of (X, y) chunks for data that does not fit in memory.
+Several models can be evaluated concurrently on a thread pool; the
+boosting libraries and scikit-learn's tree predictors release the GIL.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+METRIC_NAMES = ['accuracy', 'precision', 'recall', 'f1_score']
+
+
+def metrics_from_confusion(cm):
+    """Accuracy and support-weighted precision/recall/F1 from a confusion matrix (rows = actual)"""
+    cm = np.asarray(cm, dtype=np.float64)
+    true_positives = np.diag(cm)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    total = support.sum()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    if total == 0:
+        return dict.fromkeys(METRIC_NAMES, 0.0)
+
+    weights = support / total
+    return {
+        'accuracy': float(true_positives.sum() / total),
+        'precision': float(weights @ precision),
+        'recall': float(weights @ recall),
+        'f1_score': float(weights @ f1),
+    }
+
+
+def _iter_chunks(X, y, chunk_size):
+    if chunk_size is None or chunk_size >= len(y):
+        yield X, y
+        return
+    for start in range(0, len(y), chunk_size):
+        yield X[start:start + chunk_size], y[start:start + chunk_size]
+
+
+def evaluate_model(model, chunks, n_classes, keep_outputs=True):
+    """
+    Evaluate one fitted classifier in a single probability pass
+
+    Parameters:
+    model: fitted classifier with predict_proba and classes_
+    chunks: iterable of (X, y) pairs; y holds encoded labels 0..n_classes-1
+    n_classes: number of target classes
+    keep_outputs: keep the predicted labels and probabilities (disable for huge test sets)
+
+    Returns:
+    dict with the metrics, 'confusion_matrix' and, if kept, 'predictions'/'probabilities'
+    """
+    classes = np.asarray(model.classes_)
+    cm = np.zeros((n_classes, n_classes), dtype=np.int64)
+    predictions, probabilities = [], []
+
+    for X_chunk, y_chunk in chunks:
+        proba = model.predict_proba(X_chunk)
+        y_pred = classes[proba.argmax(axis=1)]
+        y_true = np.asarray(y_chunk)
+        cm += np.bincount(y_true * n_classes + y_pred,
+                          minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+        if keep_outputs:
+            predictions.append(y_pred)
+            probabilities.append(proba)
+
+    result = metrics_from_confusion(cm)
+    result['confusion_matrix'] = cm
+    if keep_outputs:
+        result['predictions'] = np.concatenate(predictions) if predictions else np.array([], dtype=int)
+        result['probabilities'] = (np.concatenate(probabilities) if probabilities
+                                   else np.empty((0, n_classes)))
+    return result
+
+
+def evaluate_models_concurrently(models, X, y, n_classes, chunk_size=None, max_workers=None, keep_outputs=True):
+    """
+    Evaluate several models on the same in-memory test set concurrently
+
+    Returns:
+    {model name: evaluate_model result}, in the order of `models`
+    """
+    y = np.asarray(y)
+
+    def run(model):
+        return evaluate_model(model, _iter_chunks(X, y, chunk_size), n_classes, keep_outputs)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(models) or 1) as pool:
+        futures = {name: pool.submit(run, model) for name, model in models.items()}
+        return {name: future.result() for name, future in futures.items()}
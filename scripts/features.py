@@ -0,0 +1,94 @@
+"""
+Feature Definitions for Predictive Maintenance
+==============================================
+
+Single source of truth for the raw sensor columns and the engineered
+features derived from them, shared by the training pipeline, incremental
+retraining and the scoring paths.
+"""
+
+NUMERICAL_COLS = ['Air temperature [K]', 'Process temperature [K]',
+                  'Rotational speed [rpm]', 'Torque [Nm]', 'Tool wear [min]']
+
+# Engineered feature name -> function of a DataFrame holding the raw sensors
+ENGINEERED_FEATURES = {
+    'Temp_diff': lambda df: df['Process temperature [K]'] - df['Air temperature [K]'],
+    'Power': lambda df: df['Torque [Nm]'] * df['Rotational speed [rpm]'] / 9549,
+    'Tool_wear_rate': lambda df: df['Tool wear [min]'] / (df['Rotational speed [rpm]'] / 1000),
+    'Temp_ratio': lambda df: df['Process temperature [K]'] / df['Air temperature [K]'],
+    'Stress_indicator': lambda df: (df['Torque [Nm]'] * df['Tool wear [min]']) / df['Rotational speed [rpm]'],
+}
+
+ALL_FEATURES = NUMERICAL_COLS + ['Type_encoded'] + list(ENGINEERED_FEATURES)
+
+# Rolling features over each machine's last readings (computed by streaming_features.py;
+# used when the pipeline is run with --window-features)
+WINDOW_FEATURES = ['Torque_mean', 'Torque_slope', 'Temp_diff_slope', 'Wear_rate']
+
+# Raw reading columns each derived feature is computed from (raw sensors map to themselves)
+FEATURE_SOURCES = {
+    'Type_encoded': ['Type'],
+    'Temp_diff': ['Process temperature [K]', 'Air temperature [K]'],
+    'Power': ['Torque [Nm]', 'Rotational speed [rpm]'],
+    'Tool_wear_rate': ['Tool wear [min]', 'Rotational speed [rpm]'],
+    'Temp_ratio': ['Process temperature [K]', 'Air temperature [K]'],
+    'Stress_indicator': ['Torque [Nm]', 'Tool wear [min]', 'Rotational speed [rpm]'],
+    'Torque_mean': ['Torque [Nm]'],
+    'Torque_slope': ['Torque [Nm]'],
+    'Temp_diff_slope': ['Process temperature [K]', 'Air temperature [K]'],
+    'Wear_rate': ['Tool wear [min]'],
+}
+
+# Columns of a raw reading as it arrives from a machine
+RAW_COLUMNS = ['Type'] + NUMERICAL_COLS
+
+
+def add_engineered_features(df, features=None):
+    """
+    Add engineered feature columns to a DataFrame in place
+
+    Parameters:
+    df: DataFrame with the raw sensor columns
+    features: names of the features that are needed; engineered ones not in
+              this list are skipped (default: all engineered features)
+
+    Returns:
+    the same DataFrame, for chaining
+    """
+    for name, compute in ENGINEERED_FEATURES.items():
+        if features is None or name in features:
+            df[name] = compute(df)
+    return df
+
+
+def encode_type(df, le_type):
+    """Add the Type_encoded column using a fitted product type LabelEncoder"""
+    unknown = set(df['Type'].unique()) - set(le_type.classes_)
+    if unknown:
+        raise ValueError(f"Unknown product types: {unknown}")
+    df['Type_encoded'] = le_type.transform(df['Type'])
+    return df
+
+
+def raw_to_features(df, le_type, feature_names):
+    """
+    Build the model's feature matrix from raw readings
+
+    Parameters:
+    df: DataFrame with the RAW_COLUMNS (left unmodified), plus the
+        WINDOW_FEATURES columns when the model uses them
+    le_type: fitted product type LabelEncoder
+    feature_names: feature columns the model expects, in order
+
+    Returns:
+    DataFrame with exactly feature_names
+    """
+    window = [name for name in WINDOW_FEATURES if name in feature_names]
+    missing = set(RAW_COLUMNS + window) - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    features = df[RAW_COLUMNS + window].copy()
+    encode_type(features, le_type)
+    add_engineered_features(features, features=feature_names)
+    return features[feature_names]
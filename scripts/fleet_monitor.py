@@ -0,0 +1,362 @@
+"""
+Fleet Monitoring
+================
+
+Live failure risk for every machine of a fleet streaming telemetry, for the
+app's Fleet Monitor page.
+
+- A source yields micro-batches of raw readings. SimulatorSource runs
+  telemetry_simulator.Fleet in-process at wall-clock pace. FileTailSource
+  follows a CSV or JSON-lines file that another process appends to, for
+  example `telemetry_simulator.py --output data/telemetry.csv`.
+- Each micro-batch keeps only the newest reading of each machine, because
+  older ones would be overwritten before anyone sees them (for models with
+  window features, every reading still enters its machine's history). The batch is
+  scored in one predict_proba call, so the work per batch is bounded by the
+  fleet size however far behind the source is.
+- FleetStore keeps per-machine state in preallocated numpy columns, indexed
+  through a machine id -> row dict. Memory is a fixed number of bytes per
+  machine and updates are vectorised. Each row records the update at which
+  its prediction last changed, so views can fetch only the changed rows.
+"""
+
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import RAW_COLUMNS
+
+SENSOR_COLUMNS = RAW_COLUMNS[1:]
+
+NO_FAILURE = 'No Failure'
+
+# Per-machine columns of FleetStore: name -> (dtype, trailing shape)
+STORE_COLUMNS = {
+    'types': ('U1', ()),
+    'sensors': (np.float32, (len(SENSOR_COLUMNS),)),
+    'last_seen': (np.float64, ()),
+    'readings': (np.int64, ()),
+    'predicted': (np.int8, ()),
+    'risk': (np.float32, ()),
+    'confidence': (np.float32, ()),
+    'changed_at': (np.int64, ()),
+}
+
+# Columns FleetStore.top() can rank machines by
+TABLE_SORT_KEYS = ['Failure Risk', 'Tool wear [min]', 'Last Seen']
+
+
+class FleetStore:
+    """
+    Latest reading and prediction per machine, in array columns
+
+    Parameters:
+    classes: failure type names in probability column order
+    capacity: machines allocated up front (grows by doubling)
+    risk_tolerance: smallest failure-risk change that marks a row as changed
+    """
+
+    def __init__(self, classes, capacity=1024, risk_tolerance=0.01):
+        self.classes = list(classes)
+        self.no_failure = self.classes.index(NO_FAILURE)
+        self.risk_tolerance = risk_tolerance
+        self.size = 0
+        self.sequence = 0
+        self.machine_ids = np.empty(capacity, dtype=object)
+        self._rows = {}
+        self._columns = {name: np.zeros((capacity,) + shape, dtype=dtype)
+                         for name, (dtype, shape) in STORE_COLUMNS.items()}
+        self.lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return len(self.machine_ids)
+
+    def nbytes(self):
+        """Bytes held by the per-machine columns"""
+        return self.machine_ids.nbytes + sum(column.nbytes for column in self._columns.values())
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.machine_ids = np.concatenate([self.machine_ids,
+                                           np.empty(capacity - self.capacity, dtype=object)])
+        for name, column in self._columns.items():
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:len(column)] = column
+            self._columns[name] = grown
+
+    def _rows_for(self, machine_ids):
+        rows = np.fromiter((self._rows.get(m, -1) for m in machine_ids), dtype=np.int64,
+                           count=len(machine_ids))
+        new = np.flatnonzero(rows < 0)
+        if len(new):
+            if self.size + len(new) > self.capacity:
+                self._grow(self.size + len(new))
+            rows[new] = np.arange(self.size, self.size + len(new))
+            for i in new:
+                self._rows[machine_ids[i]] = rows[i]
+            self.machine_ids[rows[new]] = np.asarray(machine_ids, dtype=object)[new]
+            self.size += len(new)
+        return rows, new
+
+    def update(self, machine_ids, types, sensors, timestamps, probabilities):
+        """
+        Store one scored micro-batch (one reading per machine)
+
+        Returns:
+        number of machines whose prediction changed (new, other failure type,
+        or failure risk moved by at least risk_tolerance)
+        """
+        probabilities = np.asarray(probabilities)
+        predicted = probabilities.argmax(axis=1)
+        risk = 1.0 - probabilities[:, self.no_failure]
+        with self.lock:
+            rows, new = self._rows_for(list(machine_ids))
+            c = self._columns
+            changed = ((c['predicted'][rows] != predicted)
+                       | (np.abs(c['risk'][rows] - risk) >= self.risk_tolerance))
+            changed[new] = True
+            self.sequence += 1
+            c['changed_at'][rows[changed]] = self.sequence
+            c['types'][rows] = types
+            c['sensors'][rows] = sensors
+            c['last_seen'][rows] = timestamps
+            c['readings'][rows] += 1
+            c['predicted'][rows] = predicted
+            c['risk'][rows] = risk
+            c['confidence'][rows] = probabilities.max(axis=1)
+            return int(changed.sum())
+
+    def class_counts(self):
+        """{failure type: machines currently predicted with it}"""
+        with self.lock:
+            counts = np.bincount(self._columns['predicted'][:self.size], minlength=len(self.classes))
+        return dict(zip(self.classes, counts.tolist()))
+
+    def changed_since(self, sequence, limit=None):
+        """
+        Rows changed after update `sequence`, most recently changed first
+
+        Returns:
+        (rows, the store's sequence at the same moment, to pass in next time)
+        """
+        with self.lock:
+            changed_at = self._columns['changed_at'][:self.size]
+            rows = np.flatnonzero(changed_at > sequence)
+            rows = rows[np.argsort(-changed_at[rows], kind='stable')]
+            current = self.sequence
+        return (rows[:limit] if limit is not None else rows), current
+
+    def top(self, n, by='Failure Risk'):
+        """Rows of the n machines with the highest `by` (a TABLE_SORT_KEYS name), highest first"""
+        with self.lock:
+            if by == 'Tool wear [min]':
+                values = self._columns['sensors'][:self.size, SENSOR_COLUMNS.index(by)]
+            else:
+                values = self._columns['risk' if by == 'Failure Risk' else 'last_seen'][:self.size]
+            n = min(n, self.size)
+            if n == 0:
+                return np.array([], dtype=np.int64)
+            rows = np.argpartition(-values, n - 1)[:n]
+            return rows[np.argsort(-values[rows], kind='stable')]
+
+    def table(self, rows):
+        """DataFrame of the given rows for display"""
+        with self.lock:
+            c = self._columns
+            df = pd.DataFrame(c['sensors'][rows], columns=SENSOR_COLUMNS)
+            df.insert(0, 'Product ID', self.machine_ids[rows])
+            df.insert(1, 'Type', c['types'][rows])
+            df['Predicted Failure'] = np.asarray(self.classes, dtype=object)[c['predicted'][rows]]
+            df['Failure Risk'] = c['risk'][rows]
+            df['Confidence'] = c['confidence'][rows]
+            df['Last Seen'] = pd.to_datetime(c['last_seen'][rows], unit='s', utc=True)
+            df['Readings'] = c['readings'][rows]
+        return df
+
+
+class SimulatorSource:
+    """
+    In-process simulated fleet emitting at wall-clock pace
+
+    Parameters:
+    n_machines: fleet size
+    interval: seconds between two readings of one machine
+    tick: simulated seconds per emitted slice of the fleet (interval must be a whole number of ticks)
+    speedup: simulated seconds per wall second
+    seed: fleet seed
+    """
+
+    def __init__(self, n_machines, interval=1.0, tick=0.1, speedup=1.0, seed=42):
+        from telemetry_simulator import Fleet, send_slots
+        self.machines_by_slot = send_slots(n_machines, interval, tick)
+        self.fleet = Fleet(n_machines, seed=seed)
+        self.interval = interval
+        self.tick = tick
+        self.speedup = speedup
+        self.started = time.monotonic()
+        self.sim_start = time.time()
+        self.next_tick = 0
+        self.skipped_ticks = 0
+
+    def describe(self):
+        return f"simulated fleet of {self.fleet.n_machines:,} machines, 1 reading / {self.interval:g}s each"
+
+    def poll(self):
+        """Readings due since the previous poll (at most one interval's worth)"""
+        now = time.monotonic()
+        due = int((now - self.started) * self.speedup / self.tick)
+        n_slots = len(self.machines_by_slot)
+        if due - self.next_tick > n_slots:
+            # Far behind: every machine reports within the last interval anyway
+            self.skipped_ticks += due - self.next_tick - n_slots
+            self.next_tick = due - n_slots
+        batches = []
+        for k in range(self.next_tick, due):
+            machines = self.machines_by_slot[k % n_slots]
+            if len(machines):
+                batches.append(self.fleet.read(machines, self.sim_start + k * self.tick))
+        self.next_tick = max(self.next_tick, due)
+        return pd.concat(batches, ignore_index=True) if batches else None
+
+
+class FileTailSource:
+    """
+    New rows appended to a CSV or JSON-lines telemetry file
+
+    Parameters:
+    path: file to follow (it may not exist yet)
+    fmt: 'csv' or 'jsonl' (default: from the extension)
+    max_bytes: most bytes read per poll, bounding one micro-batch
+    """
+
+    def __init__(self, path, fmt=None, max_bytes=16 * 2**20):
+        self.path = path
+        self.fmt = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+        self.max_bytes = max_bytes
+        self.position = 0
+        self.header = None
+        self._partial = b''
+
+    def describe(self):
+        return f"tail of {self.path}"
+
+    def poll(self):
+        """Complete rows appended since the previous poll"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return None
+        if size < self.position:
+            # Truncated or replaced: start over
+            self.position, self.header, self._partial = 0, None, b''
+        if size == self.position:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(self.position)
+            data = self._partial + f.read(self.max_bytes)
+            self.position = f.tell()
+        complete, _, self._partial = data.rpartition(b'\n')
+        if not complete:
+            self._partial = data
+            return None
+        if self.fmt == 'csv':
+            if self.header is None:
+                self.header, _, complete = complete.partition(b'\n')
+                if not complete:
+                    return None
+            return pd.read_csv(io.BytesIO(self.header + b'\n' + complete + b'\n'))
+        return pd.read_json(io.BytesIO(complete + b'\n'), lines=True)
+
+
+class FleetMonitor:
+    """
+    Polls a source, scores each micro-batch and updates a FleetStore, on a background thread
+
+    Parameters:
+    scorer: LocalScorer (anything with predict_proba(readings) and classes)
+    source: SimulatorSource, FileTailSource or any object with poll()
+    poll_interval: seconds between micro-batches
+    """
+
+    def __init__(self, scorer, source, poll_interval=1.0):
+        self.scorer = scorer
+        self.source = source
+        self.poll_interval = poll_interval
+        self.store = FleetStore(scorer.classes)
+        self.stats = {'batches': 0, 'readings': 0, 'rows_scored': 0, 'rows_changed': 0,
+                      'last_batch_rows': 0, 'last_score_ms': 0.0, 'last_step_ms': 0.0,
+                      'busy_fraction': 0.0, 'errors': 0, 'last_error': None}
+        self.started_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def step(self):
+        """Poll and process one micro-batch; returns the number of machines scored"""
+        start = time.perf_counter()
+        readings = self.source.poll()
+        if readings is None or len(readings) == 0:
+            return 0
+        n_readings = len(readings)
+        readings = readings.dropna(subset=RAW_COLUMNS)
+        # Every reading goes into its machine's history (models with window features)
+        if getattr(self.scorer, 'feature_engine', None) is not None:
+            readings = self.scorer.add_window_features(readings)
+        # Only the newest reading of each machine is worth scoring
+        readings = readings.drop_duplicates('Product ID', keep='last')
+        score_start = time.perf_counter()
+        probabilities = self.scorer.predict_proba(readings)
+        score_ms = 1000 * (time.perf_counter() - score_start)
+        if 'Timestamp' in readings:
+            timestamps = ((pd.to_datetime(readings['Timestamp'], utc=True) - pd.Timestamp(0, tz='UTC'))
+                          .dt.total_seconds().to_numpy())
+        else:
+            timestamps = np.full(len(readings), time.time())
+        changed = self.store.update(readings['Product ID'].astype(str).to_numpy(),
+                                    readings['Type'].astype(str).to_numpy(),
+                                    readings[SENSOR_COLUMNS].to_numpy(dtype=np.float32),
+                                    timestamps, probabilities)
+        step_ms = 1000 * (time.perf_counter() - start)
+        self.stats.update(
+            batches=self.stats['batches'] + 1,
+            readings=self.stats['readings'] + n_readings,
+            rows_scored=self.stats['rows_scored'] + len(readings),
+            rows_changed=self.stats['rows_changed'] + changed,
+            last_batch_rows=len(readings), last_score_ms=score_ms, last_step_ms=step_ms,
+        )
+        return len(readings)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            try:
+                self.step()
+            except Exception as e:
+                # Keep monitoring; a bad batch (e.g. a malformed file row) is reported, not fatal
+                self.stats['errors'] += 1
+                self.stats['last_error'] = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+            self.stats['busy_fraction'] = min(1.0, elapsed / self.poll_interval)
+            self._stop_event.wait(max(0.0, self.poll_interval - elapsed))
+
+    def start(self):
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='fleet-monitor')
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
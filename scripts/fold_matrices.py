@@ -0,0 +1,190 @@
+"""
+Reusable Cross-Validation Matrices for Gradient Boosting
+========================================================
+
+`cross_val_score` hands NumPy arrays to XGBClassifier / LGBMClassifier, so
+every fit rebuilds the library's internal matrix and recomputes histogram
+quantile cuts from scratch. FoldMatrixCache builds the binned training and
+validation matrices (XGBoost QuantileDMatrix, LightGBM Dataset) once per
+fold and trains every candidate parameter set on them with the native APIs.
+
+It also keeps timings so the pipeline can report how much of the tuning
+time went into data preparation. measure_wrapper_path times the path the
+cache replaces (sklearn wrapper fits on arrays, as in cross_val_score) so
+the "before" figure is measured; without it the report estimates it.
+"""
+
+import time
+
+import numpy as np
+import xgboost as xgb
+import lightgbm as lgb
+
+# Histogram resolution, matches the library defaults used by the sklearn wrappers
+XGB_MAX_BIN = 256
+LGB_MAX_BIN = 255
+
+
+def xgb_native_params(params, num_class):
+    """Translate XGBClassifier keyword arguments to xgb.train parameters"""
+    params = dict(params)
+    num_boost_round = params.pop('n_estimators', 100)
+    if 'random_state' in params:
+        params['seed'] = params.pop('random_state')
+    params.update(objective='multi:softprob', num_class=num_class,
+                  tree_method='hist', max_bin=XGB_MAX_BIN)
+    return params, num_boost_round
+
+
+def lgb_native_params(params, num_class):
+    """Translate LGBMClassifier keyword arguments to lgb.train parameters"""
+    params = dict(params)
+    num_boost_round = params.pop('n_estimators', 100)
+    params.update(objective='multiclass', num_class=num_class, max_bin=LGB_MAX_BIN)
+    params.setdefault('verbose', -1)
+    return params, num_boost_round
+
+
+class FoldMatrixCache:
+    """
+    Per-fold training/validation matrices built once and shared by all candidates
+
+    Parameters:
+    X, y: training features and encoded labels
+    cv: a scikit-learn splitter (e.g. StratifiedKFold) defining the folds
+    """
+
+    def __init__(self, X, y, cv):
+        self.X = np.ascontiguousarray(X)
+        self.y = np.asarray(y)
+        self.num_class = len(np.unique(self.y))
+        self.splits = list(cv.split(self.X, self.y))
+
+        self._xgb_folds = None
+        self._lgb_folds = None
+
+        # Timing (seconds) and counters for the data-preparation report
+        self.prep_seconds = {'xgb': 0.0, 'lgb': 0.0}
+        self.fit_seconds = {'xgb': 0.0, 'lgb': 0.0}
+        self.fits = {'xgb': 0, 'lgb': 0}
+        self.wrapper_timings = {}
+
+    def xgb_folds(self):
+        """QuantileDMatrix pairs per fold; validation shares the training cuts"""
+        if self._xgb_folds is None:
+            start = time.perf_counter()
+            self._xgb_folds = []
+            for train_idx, valid_idx in self.splits:
+                dtrain = xgb.QuantileDMatrix(self.X[train_idx], label=self.y[train_idx],
+                                             max_bin=XGB_MAX_BIN)
+                dvalid = xgb.QuantileDMatrix(self.X[valid_idx], label=self.y[valid_idx],
+                                             ref=dtrain)
+                self._xgb_folds.append((dtrain, dvalid, self.y[valid_idx]))
+            self.prep_seconds['xgb'] += time.perf_counter() - start
+        return self._xgb_folds
+
+    def lgb_folds(self):
+        """Constructed (binned) LightGBM Datasets per fold with raw validation features"""
+        if self._lgb_folds is None:
+            start = time.perf_counter()
+            self._lgb_folds = []
+            for train_idx, valid_idx in self.splits:
+                dtrain = lgb.Dataset(self.X[train_idx], label=self.y[train_idx],
+                                     params={'max_bin': LGB_MAX_BIN, 'verbose': -1},
+                                     free_raw_data=False).construct()
+                self._lgb_folds.append((dtrain, self.X[valid_idx], self.y[valid_idx]))
+            self.prep_seconds['lgb'] += time.perf_counter() - start
+        return self._lgb_folds
+
+    def _fit_folds(self, library, params):
+        """(per-fold accuracy, seconds) of one parameter set trained natively on the cached folds"""
+        if library == 'xgb':
+            native, num_boost_round = xgb_native_params(params, self.num_class)
+            folds = self.xgb_folds()
+            train = xgb.train
+        else:
+            native, num_boost_round = lgb_native_params(params, self.num_class)
+            folds = self.lgb_folds()
+            train = lgb.train
+
+        start = time.perf_counter()
+        scores = []
+        for dtrain, valid, y_valid in folds:
+            booster = train(native, dtrain, num_boost_round=num_boost_round)
+            y_pred = booster.predict(valid).argmax(axis=1)
+            scores.append(np.mean(y_pred == y_valid))
+        return np.array(scores), time.perf_counter() - start
+
+    def _cv(self, library, params):
+        scores, seconds = self._fit_folds(library, params)
+        self.fit_seconds[library] += seconds
+        self.fits[library] += len(self.splits)
+        return scores
+
+    def cv_xgb(self, params):
+        """Per-fold accuracy of an XGBClassifier parameter set"""
+        return self._cv('xgb', params)
+
+    def cv_lgb(self, params):
+        """Per-fold accuracy of an LGBMClassifier parameter set"""
+        return self._cv('lgb', params)
+
+    def measure_wrapper_path(self, library, params):
+        """
+        Time the path the cache replaces, for one parameter set on every fold
+
+        Fits and predicts with the sklearn wrapper on the fold's arrays, as
+        cross_val_score does (input validation and a matrix built per fit),
+        and natively on the cached matrices. The difference per fit is the
+        data preparation the wrapper repeats for every candidate. These fits
+        are not counted as candidates.
+        """
+        if library == 'xgb':
+            make_wrapper = lambda: xgb.XGBClassifier(**params)
+        else:
+            make_wrapper = lambda: lgb.LGBMClassifier(**{'verbose': -1, **params})
+
+        start = time.perf_counter()
+        for train_idx, valid_idx in self.splits:
+            make_wrapper().fit(self.X[train_idx], self.y[train_idx]).predict(self.X[valid_idx])
+        wrapper_seconds = time.perf_counter() - start
+        _, native_seconds = self._fit_folds(library, params)
+
+        n_folds = len(self.splits)
+        self.wrapper_timings[library] = {
+            'wrapper_seconds_per_fit': wrapper_seconds / n_folds,
+            'native_seconds_per_fit': native_seconds / n_folds,
+        }
+        return self.wrapper_timings[library]
+
+    def prep_report(self, library):
+        """
+        Data-preparation share of the time spent on one library's candidates
+
+        'before' is what the sklearn wrappers spend on data preparation for
+        the same fits. After measure_wrapper_path it is the measured wrapper
+        time per fit beyond the native fit, times the fits
+        ('before_measured': True). Otherwise it is an estimate: the per-fold
+        matrix build charged to every candidate.
+        """
+        prep = self.prep_seconds[library]
+        fit = self.fit_seconds[library]
+        n_folds = len(self.splits)
+        candidates = self.fits[library] / n_folds if n_folds else 0
+        measured = self.wrapper_timings.get(library)
+        if measured is not None:
+            per_fit = measured['wrapper_seconds_per_fit'] - measured['native_seconds_per_fit']
+            rebuilt = max(per_fit, 0.0) * self.fits[library]
+        else:
+            rebuilt = prep * candidates
+
+        return {
+            'candidates': int(candidates),
+            'prep_seconds': prep,
+            'fit_seconds': fit,
+            'prep_fraction_after': prep / (prep + fit) if prep + fit else 0.0,
+            'prep_seconds_before': rebuilt,
+            'prep_fraction_before': rebuilt / (rebuilt + fit) if rebuilt + fit else 0.0,
+            'before_measured': measured is not None,
+            **(measured or {}),
+        }
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Incremental Retraining from the Deployed Model
+==============================================
+
+Warm-starts the deployed XGBoost booster on a batch of newly labelled
+telemetry instead of rerunning the complete pipeline (SMOTE, 5-fold CV of
+three models and 50 Optuna trials). Only the new rows are touched, so the
+retrain time scales with the size of the weekly batch, not the history.
+
+Two modes are supported:
+- continue: append n_rounds new trees fitted on the new data
+- refresh:  keep the tree structure and re-fit the leaf values on the new data
+
+The newest slice of the batch is held out, both the deployed and the
+retrained model are scored on it, and the new model is only published
+if its accuracy does not regress beyond the configured tolerance.
+
+Usage:
+    python3 scripts/incremental_retrain.py data/new_telemetry.csv --mode continue --rounds 50
+"""
+
+import argparse
+import os
+import time
+import warnings
+from datetime import datetime
+warnings.filterwarnings('ignore')
+
+import joblib
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, f1_score
+
+from features import add_engineered_features, encode_type
+from streaming_features import add_window_features, engine_for
+from model_registry import copy_artifacts, create_version, discard_version, publish_version, resolve_model_dir
+
+
+class IncrementalRetrainer:
+    """Warm-start retraining of the deployed XGBoost model"""
+
+    def __init__(self, new_data_path, model_path='models/', mode='continue', n_rounds=50,
+                 holdout_fraction=0.2, tolerance=0.0, learning_rate=None):
+        if mode not in ('continue', 'refresh'):
+            raise ValueError(f"Unknown retrain mode: {mode}")
+        if not 0 < holdout_fraction < 1:
+            raise ValueError("holdout_fraction must be between 0 and 1")
+
+        self.new_data_path = new_data_path
+        self.model_path = model_path
+        self.mode = mode
+        self.n_rounds = n_rounds
+        self.holdout_fraction = holdout_fraction
+        self.tolerance = tolerance
+        self.learning_rate = learning_rate
+
+        self.model = None
+        self.new_model = None
+        self.validation = {}
+        self.timings = {}
+
+    def load_artifacts(self):
+        """Load the deployed model and preprocessing components"""
+        print("📦 Loading deployed model...")
+
+        self.model_dir = resolve_model_dir(self.model_path)
+        self.metadata = joblib.load(os.path.join(self.model_dir, 'model_metadata.pkl'))
+        model_name = self.metadata['best_model_name']
+        self.model_file = os.path.join(
+            self.model_dir, f'best_model_{model_name.lower().replace(" ", "_")}.pkl')
+
+        self.model = joblib.load(self.model_file)
+        if not isinstance(self.model, xgb.XGBClassifier):
+            raise ValueError(f"Incremental retraining needs an XGBoost model, deployed model is {model_name}")
+
+        self.scaler = joblib.load(os.path.join(self.model_dir, 'feature_scaler.pkl'))
+        self.le_type = joblib.load(os.path.join(self.model_dir, 'label_encoder_type.pkl'))
+        self.le_failure = joblib.load(os.path.join(self.model_dir, 'label_encoder_failure.pkl'))
+        self.feature_names = joblib.load(os.path.join(self.model_dir, 'feature_names.pkl'))
+
+        print(f"Deployed model: {model_name} ({self.model.get_booster().num_boosted_rounds()} boosting rounds)")
+        return self
+
+    def prepare_new_data(self):
+        """Apply the deployed preprocessing to the new batch and split off the holdout window"""
+        print("\n🔧 Preparing new telemetry...")
+
+        df = pd.read_csv(self.new_data_path)
+        if 'UDI' in df.columns:
+            df = df.sort_values('UDI')
+
+        # The model has a fixed set of output classes; rows with other labels cannot be learned
+        known = df['Failure Type'].isin(self.le_failure.classes_)
+        if not known.all():
+            print(f"Warning: dropping {(~known).sum()} rows with unknown failure types")
+            df = df[known]
+
+        encode_type(df, self.le_type)
+        add_engineered_features(df, features=self.feature_names)
+        # Window features start from an empty history at the batch's first reading of each machine
+        engine = engine_for(self.metadata, self.feature_names)
+        if engine is not None:
+            df = add_window_features(df, engine)
+
+        X = self.scaler.transform(df[self.feature_names])
+        y = self.le_failure.transform(df['Failure Type'])
+
+        # Newest rows form the validation window
+        n_holdout = max(1, int(len(df) * self.holdout_fraction))
+        if n_holdout >= len(df):
+            raise ValueError(f"Not enough new rows to hold out a validation window: {len(df)}")
+        self.X_new, self.y_new = X[:-n_holdout], y[:-n_holdout]
+        self.X_holdout, self.y_holdout = X[-n_holdout:], y[-n_holdout:]
+
+        print(f"New training rows: {len(self.y_new):,}")
+        print(f"Holdout window rows: {len(self.y_holdout):,}")
+        return self
+
+    def retrain(self):
+        """Continue boosting, or refresh leaf values, starting from the deployed booster"""
+        print(f"\n🤖 Retraining ({self.mode})...")
+        start = time.perf_counter()
+
+        params = {k: v for k, v in self.model.get_xgb_params().items() if v is not None}
+        params['num_class'] = len(self.le_failure.classes_)
+        if self.learning_rate is not None:
+            params['learning_rate'] = self.learning_rate
+
+        booster = self.model.get_booster()
+        if self.mode == 'refresh':
+            params.update(process_type='update', updater='refresh', refresh_leaf=True)
+            num_boost_round = booster.num_boosted_rounds()
+        else:
+            num_boost_round = self.n_rounds
+
+        # xgb.train copies the booster it starts from, the deployed model is left untouched
+        dtrain = xgb.DMatrix(self.X_new, label=self.y_new)
+        new_booster = xgb.train(params, dtrain, num_boost_round=num_boost_round, xgb_model=booster)
+
+        self.new_model = xgb.XGBClassifier(**self.model.get_params())
+        self.new_model.load_model(bytearray(new_booster.save_raw('ubj')))
+        self.new_model.set_params(n_estimators=new_booster.num_boosted_rounds())
+
+        self.timings['retrain_seconds'] = time.perf_counter() - start
+        print(f"Boosting rounds: {booster.num_boosted_rounds()} -> {new_booster.num_boosted_rounds()}")
+        print(f"Retrain time: {self.timings['retrain_seconds']:.2f}s")
+        return self
+
+    def validate(self):
+        """Score the deployed and retrained models on the holdout window"""
+        print("\n📊 Validating on holdout window...")
+
+        for name, model in (('deployed', self.model), ('retrained', self.new_model)):
+            y_pred = model.predict(self.X_holdout)
+            self.validation[name] = {
+                'accuracy': accuracy_score(self.y_holdout, y_pred),
+                'f1_score': f1_score(self.y_holdout, y_pred, average='weighted'),
+            }
+            print(f"  {name.capitalize()}: accuracy {self.validation[name]['accuracy']:.4f}, "
+                  f"F1 {self.validation[name]['f1_score']:.4f}")
+
+        delta = self.validation['retrained']['accuracy'] - self.validation['deployed']['accuracy']
+        self.accepted = delta >= -self.tolerance
+        print(f"Accuracy change: {delta:+.4f} (tolerance {self.tolerance:.4f})")
+        return self
+
+    def publish(self):
+        """Publish the retrained model as a new version if validation passed, recording the update in its metadata"""
+        print("\n💾 Publishing...")
+
+        if not self.accepted:
+            print("⚠️  Retrained model regressed on the holdout window, keeping the deployed model")
+            return self
+
+        update = {
+            'date': datetime.now().isoformat(),
+            'mode': self.mode,
+            'data_path': self.new_data_path,
+            'new_rows': int(len(self.y_new)),
+            'holdout_rows': int(len(self.y_holdout)),
+            'boosting_rounds': int(self.new_model.get_booster().num_boosted_rounds()),
+            'holdout_accuracy_before': float(self.validation['deployed']['accuracy']),
+            'holdout_accuracy_after': float(self.validation['retrained']['accuracy']),
+            'retrain_seconds': self.timings['retrain_seconds'],
+        }
+        self.metadata.setdefault('incremental_updates', []).append(update)
+
+        # The new version starts as a copy of the deployed one; exported backends are
+        # left out because they were compiled from the old trees
+        version, staging = create_version(self.model_path)
+        try:
+            copy_artifacts(self.model_dir, staging, include_backends=False)
+            joblib.dump(self.new_model, os.path.join(staging, os.path.basename(self.model_file)))
+            self.metadata['version'] = version
+            joblib.dump(self.metadata, os.path.join(staging, 'model_metadata.pkl'))
+        except Exception:
+            discard_version(self.model_path, version)
+            raise
+        publish_version(self.model_path, version)
+
+        print(f"✅ Retrained model published as version {version}")
+        return self
+
+    def run(self, dry_run=False):
+        """Run the complete incremental retrain"""
+        print("🚀 Incremental Retraining")
+        print("=" * 60)
+
+        self.load_artifacts().prepare_new_data().retrain().validate()
+        if dry_run:
+            print("\nDry run: nothing published")
+        else:
+            self.publish()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm-start the deployed model on new labelled telemetry')
+    parser.add_argument('new_data', help='CSV of new labelled readings (same columns as the training data)')
+    parser.add_argument('--model-path', default='models/', help='deployed artifacts (default: %(default)s)')
+    parser.add_argument('--mode', choices=['continue', 'refresh'], default='continue',
+                        help='append new trees, or re-fit leaf values of the existing trees')
+    parser.add_argument('--rounds', type=int, default=50,
+                        help='boosting rounds to add in continue mode (default: %(default)s)')
+    parser.add_argument('--learning-rate', type=float, default=None,
+                        help='learning rate for the new rounds (default: the deployed model\'s)')
+    parser.add_argument('--holdout-fraction', type=float, default=0.2,
+                        help='newest fraction of the batch used for validation (default: %(default)s)')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='allowed drop in holdout accuracy before publishing is refused')
+    parser.add_argument('--dry-run', action='store_true', help='validate without publishing')
+    args = parser.parse_args()
+
+    IncrementalRetrainer(
+        args.new_data, model_path=args.model_path, mode=args.mode, n_rounds=args.rounds,
+        holdout_fraction=args.holdout_fraction, tolerance=args.tolerance,
+        learning_rate=args.learning_rate
+    ).run(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
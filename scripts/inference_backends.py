@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Pluggable Inference Backends
+============================
+
+The saved XGBClassifier can be scored by several runtimes, all taking the
+scaled feature matrix and returning class probabilities:
+
+- sklearn:  the pickled estimator's predict_proba (input validation and a
+            DMatrix built on every call)
+- booster:  the native booster's inplace_predict on contiguous float32
+- onnx:     an ONNX export run with ONNX Runtime (optional: onnxmltools, onnxruntime)
+- treelite: the trees compiled to a shared library (optional: treelite, tl2cgen, a C compiler)
+
+The export step writes the artifacts to models/backends/, checks that every
+backend gives the same labels as the saved model and benchmarks them per
+batch size. The fastest backend for each batch size is recorded in
+models/backends/benchmark.json. The "auto" backend then picks, for each call,
+the winner for the nearest benchmarked batch size. It falls back to the saved model if
+the exports are missing or older than the model.
+
+The training pipeline exports into the version it is staging. Run from the
+command line against published versions, which are never modified, the
+export and benchmark happen in a staged copy of the current version. With
+--export that copy is published as a new version; a benchmark-only run
+prints the ranking and discards the copy.
+
+Usage:
+    python3 scripts/inference_backends.py --export               # export, check labels, benchmark
+    python3 scripts/inference_backends.py --batch-sizes 1 64 4096  # re-benchmark existing exports
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+BACKENDS_DIR = 'backends'
+BENCHMARK_FILE = 'benchmark.json'
+DEFAULT_BATCH_SIZES = [1, 100, 10000]
+EXPORT_FORMATS = ['booster', 'onnx', 'treelite']
+
+# Seconds spent timing each (backend, batch size) pair
+BENCHMARK_SECONDS = 0.5
+
+
+def _require(module, backend):
+    """Import an optional dependency, with an install hint when it is missing"""
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(f"The {backend} backend needs {module.split('.')[0]} (see requirements.txt): {e}") from e
+
+
+def _as_float32(X):
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def _export_booster(model):
+    """The model's booster, cut at the best iteration when early stopping was used"""
+    if not hasattr(model, 'get_booster'):
+        raise TypeError(f"{type(model).__name__} has no XGBoost booster to export")
+    booster = model.get_booster()
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        booster = booster[:best_iteration + 1]
+    return booster
+
+
+class SklearnBackend:
+    """The pickled estimator's own predict_proba"""
+    name = 'sklearn'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+
+class BoosterBackend:
+    """Native XGBoost booster, inplace_predict on contiguous float32 (no DMatrix)"""
+    name = 'booster'
+    artifact = 'model.ubj'
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    @classmethod
+    def export(cls, model, path):
+        _export_booster(model).save_model(path)
+
+    @classmethod
+    def load(cls, path):
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(path)
+        return cls(booster)
+
+    def predict_proba(self, X):
+        proba = self.booster.inplace_predict(_as_float32(X))
+        if proba.ndim == 1:
+            proba = np.column_stack([1 - proba, proba])
+        return proba
+
+
+class OnnxBackend:
+    """ONNX export of the booster run with ONNX Runtime"""
+    name = 'onnx'
+    artifact = 'model.onnx'
+
+    def __init__(self, session):
+        self.session = session
+        self._input = session.get_inputs()[0].name
+        self._output = session.get_outputs()[1].name
+
+    @classmethod
+    def export(cls, model, path):
+        onnxmltools = _require('onnxmltools', cls.name)
+        data_types = _require('onnxmltools.convert.common.data_types', cls.name)
+        # The converter expects the default f0..fN feature names
+        booster = _export_booster(model).copy()
+        booster.feature_names = None
+        onnx_model = onnxmltools.convert_xgboost(
+            booster, initial_types=[('input', data_types.FloatTensorType([None, booster.num_features()]))],
+            target_opset=15)
+        with open(path, 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+
+    @classmethod
+    def load(cls, path):
+        ort = _require('onnxruntime', cls.name)
+        return cls(ort.InferenceSession(path, providers=['CPUExecutionProvider']))
+
+    def predict_proba(self, X):
+        return self.session.run([self._output], {self._input: _as_float32(X)})[0]
+
+
+class TreeliteBackend:
+    """Trees compiled to native code with Treelite/TL2cgen, loaded as a shared library"""
+    name = 'treelite'
+    artifact = 'model_treelite' + ('.dll' if os.name == 'nt' else '.dylib' if sys.platform == 'darwin' else '.so')
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self._tl2cgen = _require('tl2cgen', self.name)
+
+    @classmethod
+    def export(cls, model, path):
+        treelite = _require('treelite', cls.name)
+        tl2cgen = _require('tl2cgen', cls.name)
+        toolchain = 'msvc' if os.name == 'nt' else 'clang' if sys.platform == 'darwin' else 'gcc'
+        # Trees split over several translation units, so the compiler stays within memory
+        tl2cgen.export_lib(treelite.frontend.from_xgboost(_export_booster(model)), toolchain=toolchain,
+                           libpath=path, params={'parallel_comp': 8})
+
+    @classmethod
+    def load(cls, path):
+        tl2cgen = _require('tl2cgen', cls.name)
+        return cls(tl2cgen.Predictor(path))
+
+    def predict_proba(self, X):
+        X = _as_float32(X)
+        return self.predictor.predict(self._tl2cgen.DMatrix(X)).reshape(len(X), -1)
+
+
+BACKENDS = {cls.name: cls for cls in (SklearnBackend, BoosterBackend, OnnxBackend, TreeliteBackend)}
+
+
+class AutoBackend:
+    """
+    Per call, the backend that was fastest for the nearest benchmarked batch size
+
+    Parameters:
+    by_batch_size: list of (batch size, backend)
+    """
+    name = 'auto'
+
+    def __init__(self, by_batch_size):
+        self.by_batch_size = sorted(by_batch_size, key=lambda item: item[0])
+        self._log_sizes = np.log([size for size, _ in self.by_batch_size])
+
+    def backend_for(self, n_rows):
+        i = int(np.abs(self._log_sizes - np.log(max(n_rows, 1))).argmin())
+        return self.by_batch_size[i][1]
+
+    def predict_proba(self, X):
+        return self.backend_for(len(X)).predict_proba(X)
+
+
+def model_fingerprint(model_file):
+    """SHA-256 of the saved model, so exports of an older model are not used"""
+    digest = hashlib.sha256()
+    with open(model_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def model_file_for(model_path):
+    metadata = joblib.load(os.path.join(model_path, 'model_metadata.pkl'))
+    return os.path.join(model_path, f"best_model_{metadata['best_model_name'].lower().replace(' ', '_')}.pkl")
+
+
+def load_backend(name, model_path='models', model=None):
+    """
+    A backend for the model saved in model_path
+
+    Parameters:
+    name: 'sklearn', 'booster', 'onnx', 'treelite' or 'auto'
+    model: the already loaded estimator (loaded from model_path when needed and not given)
+
+    'auto' uses the benchmark ranking; without a current benchmark it is the sklearn backend.
+    """
+    if name == 'sklearn' or name == 'auto':
+        model = model if model is not None else joblib.load(model_file_for(model_path))
+        sklearn_backend = SklearnBackend(model)
+        if name == 'sklearn':
+            return sklearn_backend
+        return _load_auto(model_path, sklearn_backend)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}; choose from {sorted(BACKENDS) + ['auto']}")
+    cls = BACKENDS[name]
+    path = os.path.join(model_path, BACKENDS_DIR, cls.artifact)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No {name} export at {path}; run scripts/inference_backends.py --export")
+    return cls.load(path)
+
+
+def _load_auto(model_path, sklearn_backend):
+    try:
+        with open(os.path.join(model_path, BACKENDS_DIR, BENCHMARK_FILE)) as f:
+            benchmark = json.load(f)
+    except FileNotFoundError:
+        return sklearn_backend
+    if benchmark.get('model_sha256') != model_fingerprint(model_file_for(model_path)):
+        print(f"⚠️ Backend exports in {model_path} are older than the model, using sklearn")
+        return sklearn_backend
+
+    loaded = {'sklearn': sklearn_backend}
+    by_batch_size = []
+    for size, ranking in benchmark['ranking'].items():
+        for name in ranking:
+            if name not in loaded:
+                try:
+                    loaded[name] = load_backend(name, model_path)
+                except (ImportError, OSError) as e:
+                    print(f"⚠️ Skipping the {name} backend: {e}")
+                    loaded[name] = None
+            if loaded[name] is not None:
+                by_batch_size.append((int(size), loaded[name]))
+                break
+    return AutoBackend(by_batch_size) if by_batch_size else sklearn_backend
+
+
+def export_backends(model, model_path='models', formats=EXPORT_FORMATS):
+    """
+    Write each format's artifact to model_path/backends/
+
+    Returns:
+    {format: artifact path} of the exports that succeeded; formats whose
+    optional dependencies are missing are skipped with a message
+    """
+    directory = os.path.join(model_path, BACKENDS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    exported = {}
+    for name in formats:
+        cls = BACKENDS[name]
+        path = os.path.join(directory, cls.artifact)
+        # Written beside the artifact and renamed over it, so a process using the old one is unaffected
+        root, ext = os.path.splitext(path)
+        temporary = f'{root}.tmp{ext}'
+        start = time.perf_counter()
+        try:
+            cls.export(model, temporary)
+        except ImportError as e:
+            print(f"⏭️ {name}: {e}")
+            continue
+        os.replace(temporary, path)
+        exported[name] = path
+        print(f"✅ {name}: {path} ({time.perf_counter() - start:.1f}s)")
+    return exported
+
+
+def label_mismatches(backends, X):
+    """Rows where each backend's label differs from the sklearn backend's"""
+    reference = backends['sklearn'].predict_proba(X).argmax(axis=1)
+    return {name: int((backend.predict_proba(X).argmax(axis=1) != reference).sum())
+            for name, backend in backends.items()}
+
+
+def benchmark_backends(backends, X, batch_sizes=DEFAULT_BATCH_SIZES, seconds=BENCHMARK_SECONDS):
+    """
+    Median latency of predict_proba per backend and batch size
+
+    Batches are consecutive slices of X (repeated when X is shorter than the batch).
+
+    Returns:
+    list of {backend, batch_size, calls, median_ms, rows_per_second}
+    """
+    results = []
+    for batch_size in batch_sizes:
+        batch = np.resize(X, (batch_size, X.shape[1])) if batch_size > len(X) else X[:batch_size]
+        for name, backend in backends.items():
+            backend.predict_proba(batch)  # warm-up
+            times = []
+            deadline = time.perf_counter() + seconds
+            while len(times) < 5 or time.perf_counter() < deadline:
+                start = time.perf_counter()
+                backend.predict_proba(batch)
+                times.append(time.perf_counter() - start)
+            median = statistics.median(times)
+            results.append({'backend': name, 'batch_size': batch_size, 'calls': len(times),
+                            'median_ms': 1000 * median, 'rows_per_second': batch_size / median})
+    return results
+
+
+def rank_backends(results, excluded=()):
+    """{batch size: backend names, fastest first}, leaving out excluded backends"""
+    ranking = {}
+    for row in sorted(results, key=lambda r: r['median_ms']):
+        if row['backend'] not in excluded:
+            ranking.setdefault(str(row['batch_size']), []).append(row['backend'])
+    return ranking
+
+
+def select_backends(model, X, model_path='models', batch_sizes=DEFAULT_BATCH_SIZES, model_file=None):
+    """
+    Check labels and benchmark every exported backend, then save the ranking
+
+    Backends whose labels differ from the saved model on X are never selected.
+
+    Returns:
+    the benchmark report written to model_path/backends/benchmark.json
+    """
+    backends = {'sklearn': SklearnBackend(model)}
+    for name in EXPORT_FORMATS:
+        try:
+            backends[name] = load_backend(name, model_path)
+        except (ImportError, OSError) as e:
+            print(f"⏭️ {name}: {e}")
+
+    mismatches = label_mismatches(backends, X)
+    results = benchmark_backends(backends, X, batch_sizes)
+    report = {
+        'created': datetime.now().isoformat(),
+        'model_sha256': model_fingerprint(model_file or model_file_for(model_path)),
+        'rows_checked': int(len(X)),
+        'label_mismatches': mismatches,
+        'ranking': rank_backends(results, excluded=[name for name, n in mismatches.items() if n]),
+        'results': results,
+    }
+    with open(os.path.join(model_path, BACKENDS_DIR, BENCHMARK_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report):
+    print(f"\nLabels vs. the saved model on {report['rows_checked']:,} rows:")
+    for name, n in report['label_mismatches'].items():
+        print(f"  {name:<10} {'identical' if n == 0 else f'{n} rows differ (not selected)'}")
+    print(f"\n{'backend':<10} {'batch':>7} {'median ms':>10} {'rows/s':>12}")
+    for row in report['results']:
+        print(f"{row['backend']:<10} {row['batch_size']:>7} {row['median_ms']:>10.3f} {row['rows_per_second']:>12,.0f}")
+    print("\nFastest per batch size: " +
+          ", ".join(f"{size}: {ranking[0]}" for size, ranking in report['ranking'].items()))
+
+
+def main(argv=None):
+    import pandas as pd
+    from features import raw_to_features
+    from model_registry import (copy_artifacts, create_version, current_version, discard_version, publish_derived,
+                                resolve_model_dir)
+    from streaming_features import add_window_features, engine_for
+
+    parser = argparse.ArgumentParser(description='Export, verify and benchmark inference backends')
+    parser.add_argument('--model-path', default='models', help='saved artifacts (default: %(default)s)')
+    parser.add_argument('--export', action='store_true', help='(re)export the backends before benchmarking')
+    parser.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=EXPORT_FORMATS,
+                        help='backends to export (default: all)')
+    parser.add_argument('--csv', default='data/predictive_maintenance.csv',
+                        help='readings used for the label check and the benchmark (default: %(default)s)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES,
+                        help='batch sizes benchmarked (default: %(default)s)')
+    args = parser.parse_args(argv)
+    # Exports belong to one published version (see model_registry.py)
+    model_dir = resolve_model_dir(args.model_path)
+
+    model_file = model_file_for(model_dir)
+    model = joblib.load(model_file)
+    scaler = joblib.load(os.path.join(model_dir, 'feature_scaler.pkl'))
+    le_type = joblib.load(os.path.join(model_dir, 'label_encoder_type.pkl'))
+    feature_names = joblib.load(os.path.join(model_dir, 'feature_names.pkl'))
+    readings = pd.read_csv(args.csv)
+    engine = engine_for(joblib.load(os.path.join(model_dir, 'model_metadata.pkl')), feature_names)
+    if engine is not None:
+        readings = add_window_features(readings, engine)
+    X = scaler.transform(raw_to_features(readings, le_type, feature_names))
+
+    def export_and_benchmark(path):
+        if args.export:
+            export_backends(model, path, args.formats)
+        return select_backends(model, X, path, args.batch_sizes, model_file)
+
+    if current_version(args.model_path) is None:
+        report = export_and_benchmark(model_dir)
+    elif args.export:
+        # Published versions are never modified: export and benchmark in a staged copy, then publish it
+        reports = []
+        version, source = publish_derived(args.model_path, lambda staging: reports.append(export_and_benchmark(staging)),
+                                          include_backends=False)
+        report = reports[0]
+        print(f"✅ Published version {version}: version {source} with newly exported backends")
+    else:
+        # Benchmark only: run on a staged copy that is thrown away, so CURRENT and the
+        # rollback history are left alone
+        version, staging = create_version(args.model_path)
+        try:
+            copy_artifacts(model_dir, staging)
+            report = export_and_benchmark(staging)
+        finally:
+            discard_version(args.model_path, version)
+        print(f"ℹ️ Ranking not saved: version {current_version(args.model_path)} keeps its own "
+              f"(--export publishes a version with a new one)")
+
+    print_report(report)
+    if any(report['label_mismatches'].values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Scoring Load Test
+=================
+
+Replays raw readings (a telemetry_simulator.py or training-format CSV)
+against a scoring target at a fixed arrival rate and reports throughput,
+latency percentiles and error rate over time.
+
+Targets:
+- inprocess:  models/predict_failure.py called in this process
+- http:       POST of the app's WML payload to --url (e.g. a local stand-in server)
+- subprocess: one process per request, `cli.py score` by default (--command)
+
+Traffic is open-loop: request i is due at start + i / qps (or after
+exponential gaps with --arrival poisson) whether or not earlier requests
+have finished, up to --concurrency requests in flight. Latency is measured
+from the due time, so queueing behind a slow target is counted instead of
+hidden (no coordinated omission); service time is reported separately.
+
+Usage:
+    python3 scripts/load_test.py --csv data/telemetry.csv --target inprocess --qps 50 --duration 30
+    python3 scripts/load_test.py --csv data/telemetry.csv --target http \\
+        --url http://127.0.0.1:8000/ml/v4/deployments/local/predictions --qps 200
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from features import RAW_COLUMNS, raw_to_features
+from model_registry import resolve_model_dir
+from streaming_features import add_window_features, engine_for
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Placeholders of the subprocess command -> raw reading column
+COMMAND_PLACEHOLDERS = {
+    'type': 'Type',
+    'air_temp': 'Air temperature [K]',
+    'process_temp': 'Process temperature [K]',
+    'rpm': 'Rotational speed [rpm]',
+    'torque': 'Torque [Nm]',
+    'tool_wear': 'Tool wear [min]',
+}
+
+DEFAULT_COMMAND = (f'{shlex.quote(sys.executable)} {shlex.quote(os.path.join(SCRIPTS_DIR, "cli.py"))} '
+                   'score --type {type} --air-temp {air_temp} --process-temp {process_temp} '
+                   '--rpm {rpm} --torque {torque} --tool-wear {tool_wear}')
+
+PERCENTILES = [50, 95, 99]
+
+
+class InProcessTarget:
+    """Call predict_failure from the saved models directory in this process"""
+
+    def __init__(self, model_path='models/'):
+        import joblib
+        self.model_path = os.path.join(model_path, '')
+        model_dir = os.path.join(resolve_model_dir(model_path), '')
+        # The version's own prediction script (a flat models/ directory keeps it at the top)
+        sys.path.insert(0, self.model_path)
+        sys.path.insert(0, model_dir)
+        from predict_failure import predict_failure
+        self.predict_failure = predict_failure
+        self.le_type = joblib.load(f'{model_dir}label_encoder_type.pkl')
+        self.feature_names = joblib.load(f'{model_dir}feature_names.pkl')
+        # Replayed readings build up each machine's history, as in live scoring
+        self.feature_engine = engine_for(joblib.load(f'{model_dir}model_metadata.pkl'), self.feature_names)
+
+    def __call__(self, readings):
+        if self.feature_engine is not None:
+            readings = add_window_features(readings, self.feature_engine)
+        features = raw_to_features(readings, self.le_type, self.feature_names)
+        return self.predict_failure(features, model_path=self.model_path)
+
+
+class HttpTarget:
+    """WML scoring requests through the app's pooled WMLClient"""
+
+    def __init__(self, url, api_key=None, iam_url=None, timeout=10.0, pool_size=64, retries=0, hedge_after=None):
+        from scoring_client import IAM_URL, WMLClient
+        self.client = WMLClient(url, api_key=api_key, iam_url=iam_url or IAM_URL, timeout=timeout,
+                                pool_size=pool_size, retries=retries, hedge_after=hedge_after).warm_up()
+
+    def __call__(self, readings):
+        return self.client.predict(readings[RAW_COLUMNS].values.tolist())
+
+
+class SubprocessTarget:
+    """Run a command per request, filling COMMAND_PLACEHOLDERS from the request's first reading"""
+
+    def __init__(self, command=DEFAULT_COMMAND, timeout=60.0):
+        self.command = command
+        self.timeout = timeout
+
+    def __call__(self, readings):
+        row = readings.iloc[0]
+        values = {name: row[column] for name, column in COMMAND_PLACEHOLDERS.items()}
+        args = [part.format(**values) for part in shlex.split(self.command)]
+        result = subprocess.run(args, capture_output=True, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else
+                               f'exit code {result.returncode}')
+        return result.stdout
+
+
+def arrival_offsets(n_requests, qps, arrival='constant', seed=42):
+    """Due time of each request in seconds from the start"""
+    if arrival == 'poisson':
+        gaps = np.random.default_rng(seed).exponential(1.0 / qps, n_requests)
+        return np.cumsum(gaps) - gaps[0]
+    return np.arange(n_requests) / qps
+
+
+def latency_stats(latencies):
+    """Percentiles and max of a list of latencies in seconds, reported in ms"""
+    if len(latencies) == 0:
+        return {f'p{p}_ms': None for p in PERCENTILES} | {'max_ms': None}
+    values = np.asarray(latencies) * 1000
+    stats = {f'p{p}_ms': float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    stats['max_ms'] = float(values.max())
+    return stats
+
+
+def run_load_test(target, readings, qps, duration, batch_size=1, concurrency=64,
+                  arrival='constant', window=5.0, seed=42, log=sys.stdout):
+    """
+    Replay readings against target at an open-loop arrival rate
+
+    Parameters:
+    target: callable taking a DataFrame of raw readings
+    readings: DataFrame with the RAW_COLUMNS; replayed cyclically
+    qps: requests per second
+    duration: seconds of traffic to generate
+    batch_size: readings per request
+    concurrency: maximum requests in flight
+    arrival: 'constant' or 'poisson' inter-arrival times
+    window: seconds per time-series window in the report
+
+    Returns:
+    report dict with overall and per-window statistics
+    """
+    n_requests = max(1, int(qps * duration))
+    due = arrival_offsets(n_requests, qps, arrival, seed)
+    readings = readings[RAW_COLUMNS].reset_index(drop=True)
+
+    records = []  # (due offset, latency, service time, error)
+    lock = threading.Lock()
+
+    def send(i, start):
+        begin = time.perf_counter()
+        lo = (i * batch_size) % len(readings)
+        batch = readings.iloc[lo:lo + batch_size]
+        error = None
+        try:
+            target(batch)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        end = time.perf_counter()
+        with lock:
+            records.append((due[i], end - (start + due[i]), end - begin, error))
+
+    print(f"🚦 {n_requests:,} requests at {qps:g}/s ({arrival}), batch {batch_size}, "
+          f"up to {concurrency} in flight", file=log)
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    start = time.perf_counter()
+    try:
+        for i in range(n_requests):
+            delay = start + due[i] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, i, start)
+    finally:
+        pool.shutdown(wait=True)
+    wall = time.perf_counter() - start
+
+    records.sort(key=lambda r: r[0])
+    due_times = np.array([r[0] for r in records])
+    latencies = np.array([r[1] for r in records])
+    service = np.array([r[2] for r in records])
+    errors = [r[3] for r in records if r[3]]
+
+    windows = []
+    for w_start in np.arange(0, max(duration, 1e-9), window):
+        in_window = (due_times >= w_start) & (due_times < w_start + window)
+        ok = in_window & np.array([r[3] is None for r in records])
+        n = int(in_window.sum())
+        windows.append({
+            'start_s': float(w_start),
+            'requests': n,
+            'offered_qps': n / window,
+            'error_rate': (1 - ok.sum() / n) if n else 0.0,
+            **latency_stats(latencies[ok]),
+        })
+
+    report = {
+        'started_at': datetime.now().isoformat(),
+        'settings': {'qps': qps, 'duration': duration, 'batch_size': batch_size,
+                     'concurrency': concurrency, 'arrival': arrival},
+        'requests': len(records),
+        'errors': len(errors),
+        'error_rate': len(errors) / len(records) if records else 0.0,
+        'wall_seconds': wall,
+        'throughput_rps': len(records) / wall if wall > 0 else 0.0,
+        'throughput_readings_per_s': len(records) * batch_size / wall if wall > 0 else 0.0,
+        'latency': latency_stats(latencies),
+        'service_time': latency_stats(service),
+        'windows': windows,
+        'sample_errors': sorted(set(errors))[:5],
+    }
+    return report
+
+
+def print_report(report, log=sys.stdout):
+    print(f"\n{'Window s':>9}{'Req':>7}{'Err %':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}",
+          file=log)
+
+    def cell(value):
+        return f'{value:>9.1f}' if value is not None else f"{'-':>9}"
+
+    for w in report['windows']:
+        print(f"{w['start_s']:>9.0f}{w['requests']:>7}{100 * w['error_rate']:>7.1f}"
+              + ''.join(cell(w[k]) for k in ['p50_ms', 'p95_ms', 'p99_ms', 'max_ms']), file=log)
+
+    lat, svc = report['latency'], report['service_time']
+    print(f"\n✅ {report['requests']:,} requests in {report['wall_seconds']:.1f}s: "
+          f"{report['throughput_rps']:,.1f} req/s, error rate {100 * report['error_rate']:.2f}%", file=log)
+    print("   latency      " + '  '.join(f"{k[:-3]} {cell(v).strip()} ms" for k, v in lat.items()), file=log)
+    print("   service time " + '  '.join(f"{k[:-3]} {cell(v).strip()} ms" for k, v in svc.items()), file=log)
+    for error in report['sample_errors']:
+        print(f"   ⚠️ {error}", file=log)
+
+
+def build_target(args):
+    if args.target == 'inprocess':
+        return InProcessTarget(args.model_path)
+    if args.target == 'http':
+        if not args.url:
+            raise SystemExit('--url is required for the http target')
+        return HttpTarget(args.url, api_key=args.api_key, iam_url=args.iam_url,
+                          timeout=args.timeout, pool_size=args.concurrency, retries=args.retries,
+                          hedge_after=args.hedge_after)
+    return SubprocessTarget(args.command, timeout=args.timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Open-loop load test of a scoring target')
+    parser.add_argument('--csv', required=True, help='raw readings to replay (Type plus the five sensors)')
+    parser.add_argument('--target', choices=['inprocess', 'http', 'subprocess'], default='inprocess')
+    parser.add_argument('--qps', type=float, default=20.0, help='requests per second (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=30.0,
+                        help='seconds of traffic (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=1, help='readings per request (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=64,
+                        help='maximum requests in flight (default: %(default)s)')
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant',
+                        help='inter-arrival distribution (default: %(default)s)')
+    parser.add_argument('--window', type=float, default=5.0,
+                        help='seconds per report window (default: %(default)s)')
+    parser.add_argument('--model-path', default='models', help='inprocess: saved artifacts (default: %(default)s)')
+    parser.add_argument('--url', help='http: scoring endpoint')
+    parser.add_argument('--api-key', help='http: API key exchanged for a bearer token (default: no auth)')
+    parser.add_argument('--iam-url', help='http: token endpoint (default: IBM IAM)')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='http: client retries of transient failures (default: %(default)s)')
+    parser.add_argument('--hedge-after', type=float, default=None,
+                        help='http: duplicate requests slower than this many seconds (default: no hedging)')
+    parser.add_argument('--command', default=DEFAULT_COMMAND,
+                        help='subprocess: command with {type} {air_temp} {process_temp} {rpm} {torque} '
+                             '{tool_wear} placeholders (default: cli.py score)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout for http/subprocess')
+    parser.add_argument('--max-rows', type=int, default=100_000, help='readings loaded from the CSV')
+    parser.add_argument('--seed', type=int, default=42, help='poisson arrival seed (default: %(default)s)')
+    parser.add_argument('--output', help='write the full report as JSON')
+    args = parser.parse_args(argv)
+
+    readings = pd.read_csv(args.csv, nrows=args.max_rows)
+    target = build_target(args)
+    report = run_load_test(target, readings, args.qps, args.duration, batch_size=args.batch_size,
+                           concurrency=args.concurrency, arrival=args.arrival, window=args.window,
+                           seed=args.seed)
+    report['settings'].update(target=args.target, csv=args.csv)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
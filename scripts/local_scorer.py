@@ -0,0 +1,209 @@
+"""
+In-Process Model Scoring
+========================
+
+Loads the saved models/ artifacts once and scores raw sensor readings
+(Type plus the five sensors) in-process: engineered features, scaling and
+predict_proba, with no network round trip. Used by the Streamlit app's
+local backend and by the mock WML server. explain() breaks predictions down
+into per-sensor contributions (scripts/explanations.py).
+
+The model is run by an inference backend (scripts/inference_backends.py);
+the default "auto" uses the exported runtime that benchmarked fastest for
+each batch size, or the saved model itself when nothing has been exported.
+
+Artifacts are read from the published version named by models/CURRENT
+(scripts/model_registry.py). HotSwapScorer, for long-running processes,
+follows that pointer: a newly published version is loaded and warmed up on
+a background thread, and requests switch to it only once it is ready.
+"""
+
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from explanations import Explainer
+from features import RAW_COLUMNS, WINDOW_FEATURES, raw_to_features
+from inference_backends import load_backend
+from model_registry import current_version, resolve_model_dir, version_dir
+from streaming_features import add_window_features, engine_for
+
+
+class LocalScorer:
+    """
+    Saved model artifacts, loaded once
+
+    Parameters:
+    model_path: models/ directory (its current version is used) or one version's directory
+    backend: inference backend name ('auto', 'sklearn', 'booster', 'onnx', 'treelite')
+    """
+
+    def __init__(self, model_path='models', backend='auto'):
+        self.model_dir = resolve_model_dir(model_path)
+        model_path = os.path.join(self.model_dir, '')
+        self.metadata = joblib.load(f'{model_path}model_metadata.pkl')
+        model_name = self.metadata['best_model_name'].lower().replace(' ', '_')
+        self.model = joblib.load(f'{model_path}best_model_{model_name}.pkl')
+        self.scaler = joblib.load(f'{model_path}feature_scaler.pkl')
+        self.le_type = joblib.load(f'{model_path}label_encoder_type.pkl')
+        self.le_failure = joblib.load(f'{model_path}label_encoder_failure.pkl')
+        self.feature_names = joblib.load(f'{model_path}feature_names.pkl')
+        self.classes = list(self.le_failure.classes_)
+        self._model_classes = np.asarray(self.model.classes_)
+        self.backend = load_backend(backend, model_path, model=self.model)
+        self._explainer = None
+        # Per-machine history, for models trained with window features
+        self.feature_engine = engine_for(self.metadata, self.feature_names)
+
+    def add_window_features(self, readings):
+        """
+        Readings with the model's window features, updating each machine's history
+
+        Readings are taken as new and in arrival order. Without a Product ID
+        they get first-reading values. No-op for models without window features.
+        """
+        if self.feature_engine is None:
+            return readings
+        return add_window_features(readings, self.feature_engine)
+
+    def predict_proba(self, readings):
+        """
+        Class probabilities for a DataFrame of raw readings
+
+        Readings without window feature columns are added to their machines'
+        history first (see add_window_features).
+
+        Returns:
+        array of shape (rows, len(self.classes)), columns in self.classes order
+        """
+        if self.feature_engine is not None and not set(WINDOW_FEATURES) <= set(readings.columns):
+            readings = self.add_window_features(readings)
+        X = self.scaler.transform(raw_to_features(readings, self.le_type, self.feature_names))
+        proba = self.backend.predict_proba(X)
+        full = np.zeros((len(X), len(self.classes)))
+        full[:, self._model_classes] = proba
+        return full
+
+    def predict(self, readings):
+        """(failure type names, probabilities) for a DataFrame of raw readings"""
+        probabilities = self.predict_proba(readings)
+        return np.asarray(self.classes, dtype=object)[probabilities.argmax(axis=1)], probabilities
+
+    def predict_one(self, reading):
+        """
+        Score one [Type, air, process, rpm, torque, wear] reading
+
+        Returns:
+        (failure type name, {failure type: probability})
+        """
+        probabilities = self.predict_proba(pd.DataFrame([reading], columns=RAW_COLUMNS))[0]
+        return self.classes[int(probabilities.argmax())], dict(zip(self.classes, probabilities.tolist()))
+
+    def explain(self, readings, target=None, by_sensor=True, approximate=False):
+        """
+        Per-sensor (or per-feature) contributions behind each prediction
+
+        See explanations.Explainer.explain; explanations are cached per reading
+        for as long as this model is loaded.
+        """
+        if self._explainer is None:
+            self._explainer = Explainer(self)
+        return self._explainer.explain(readings, target=target, by_sensor=by_sensor, approximate=approximate)
+
+
+class HotSwapScorer:
+    """
+    LocalScorer that follows the published version without interrupting requests
+
+    A watcher thread checks models/CURRENT every poll_interval seconds. A new
+    version is loaded and warmed up (first calls of every backend at the
+    batch sizes in warm_batch_sizes) on that thread; the scorer serving
+    requests is replaced only afterwards, so no request waits for a load or
+    sees a half-loaded model. A version that fails to load is skipped and the
+    previous one keeps serving. Machine histories for window features carry
+    over when the new version uses the same window. Other attributes
+    (classes, metadata, ...) are those of the scorer currently serving.
+
+    Parameters:
+    model_path: models/ directory holding CURRENT
+    poll_interval: seconds between checks of the pointer
+    backend: inference backend name passed to LocalScorer
+    warm_batch_sizes: batch sizes scored once before a new version takes over
+    """
+
+    def __init__(self, model_path='models', poll_interval=2.0, backend='auto', warm_batch_sizes=(1, 100)):
+        self.model_path = model_path
+        self.poll_interval = poll_interval
+        self.backend_name = backend
+        self.warm_batch_sizes = warm_batch_sizes
+        self.version = current_version(model_path)
+        self._scorer = LocalScorer(model_path, backend)
+        self.swaps = []
+        self.last_error = None
+        self._failed_version = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        if name == '_scorer':
+            raise AttributeError(name)
+        return getattr(self._scorer, name)
+
+    def predict_proba(self, readings):
+        return self._scorer.predict_proba(readings)
+
+    def predict(self, readings):
+        return self._scorer.predict(readings)
+
+    def predict_one(self, reading):
+        return self._scorer.predict_one(reading)
+
+    def explain(self, readings, target=None, by_sensor=True, approximate=False):
+        return self._scorer.explain(readings, target=target, by_sensor=by_sensor, approximate=approximate)
+
+    def add_window_features(self, readings):
+        return self._scorer.add_window_features(readings)
+
+    def _warm_up(self, scorer):
+        types = list(scorer.le_type.classes_)
+        for batch_size in self.warm_batch_sizes:
+            rows = [[types[i % len(types)], 300.0, 310.0, 1500.0, 40.0, 100.0] for i in range(batch_size)]
+            scorer.predict_proba(pd.DataFrame(rows, columns=RAW_COLUMNS))
+
+    def check(self):
+        """Load and switch to the published version if it changed; True when a switch happened"""
+        version = current_version(self.model_path)
+        if version is None or version == self.version or version == self._failed_version:
+            return False
+        start = time.perf_counter()
+        try:
+            scorer = LocalScorer(version_dir(self.model_path, version), self.backend_name)
+            self._warm_up(scorer)
+        except Exception as e:
+            self._failed_version = version
+            self.last_error = f"{version}: {e}"
+            print(f"⚠️ Could not load model version {version}, still serving {self.version}: {e}")
+            return False
+        current = self._scorer.feature_engine
+        if (scorer.feature_engine is not None and current is not None
+                and (scorer.feature_engine.window, scorer.feature_engine.max_bytes_per_machine)
+                == (current.window, current.max_bytes_per_machine)):
+            # Same window: the machines' history carries over to the new version
+            scorer.feature_engine = current
+        previous, self._scorer, self.version = self.version, scorer, version
+        self.swaps.append({'from': previous, 'to': version, 'load_seconds': time.perf_counter() - start,
+                           'at': time.time()})
+        print(f"🔄 Now serving model version {version} (was {previous})")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
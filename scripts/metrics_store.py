@@ -0,0 +1,134 @@
+"""
+Scoring Telemetry Store
+=======================
+
+Constant-memory, thread-safe metrics for the scoring paths: end-to-end and
+backend latency histograms, request, error and cache-hit counts.
+
+Latencies go into log-spaced histogram buckets (about 5% wide, 0.01 ms to
+10 min), so percentiles are accurate to a bucket regardless of traffic.
+Counts are kept per time slot in a ring (default 60 slots of 10 s), so
+"last N minutes" views cost one sum over the ring and memory never grows.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# Histogram buckets: upper bounds growing by 5% from 0.01 ms to 10 minutes
+BUCKET_GROWTH = 1.05
+BUCKET_BOUNDS_MS = 0.01 * BUCKET_GROWTH ** np.arange(
+    int(np.ceil(np.log(600_000 / 0.01) / np.log(BUCKET_GROWTH))) + 1)
+
+LATENCY_SERIES = ['end_to_end', 'backend']
+COUNTERS = ['requests', 'errors', 'cache_hits', 'rows']
+
+
+def histogram_percentiles(counts, percentiles):
+    """Percentiles in ms from bucket counts (upper bucket bound; None when empty)"""
+    total = counts.sum()
+    if total == 0:
+        return [None] * len(percentiles)
+    cumulative = np.cumsum(counts)
+    ranks = np.ceil(np.asarray(percentiles) / 100 * total)
+    indexes = np.searchsorted(cumulative, np.maximum(ranks, 1))
+    return [float(BUCKET_BOUNDS_MS[min(i, len(BUCKET_BOUNDS_MS) - 1)]) for i in indexes]
+
+
+class MetricsStore:
+    """
+    Rolling scoring metrics per request kind (e.g. 'interactive', 'bulk')
+
+    Parameters:
+    slot_seconds: width of one time slot
+    n_slots: slots kept; the longest window is slot_seconds x n_slots
+    """
+
+    def __init__(self, slot_seconds=10, n_slots=60):
+        self.slot_seconds = slot_seconds
+        self.n_slots = n_slots
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._kinds = {}
+        self._totals = {}
+
+    def _new_kind(self):
+        return {
+            'slot_ids': np.full(self.n_slots, -1, dtype=np.int64),
+            'latency': {name: np.zeros((self.n_slots, len(BUCKET_BOUNDS_MS)), dtype=np.int64)
+                        for name in LATENCY_SERIES},
+            'counters': {name: np.zeros(self.n_slots, dtype=np.int64) for name in COUNTERS},
+        }
+
+    def record(self, kind, end_to_end_ms, backend_ms=None, error=False, cache_hit=False, rows=1,
+               now=None):
+        """Record one request"""
+        slot_id = int((time.time() if now is None else now) // self.slot_seconds)
+        slot = slot_id % self.n_slots
+        with self._lock:
+            series = self._kinds.get(kind)
+            if series is None:
+                series = self._kinds[kind] = self._new_kind()
+                self._totals[kind] = dict.fromkeys(COUNTERS, 0)
+            if series['slot_ids'][slot] != slot_id:
+                # Slot reused for a new interval: clear what it held
+                series['slot_ids'][slot] = slot_id
+                for hist in series['latency'].values():
+                    hist[slot] = 0
+                for counter in series['counters'].values():
+                    counter[slot] = 0
+
+            for name, value in (('end_to_end', end_to_end_ms), ('backend', backend_ms)):
+                if value is not None and not error:
+                    bucket = min(int(np.searchsorted(BUCKET_BOUNDS_MS, value)), len(BUCKET_BOUNDS_MS) - 1)
+                    series['latency'][name][slot, bucket] += 1
+            increments = {'requests': 1, 'errors': int(error), 'cache_hits': int(cache_hit), 'rows': rows}
+            for name, n in increments.items():
+                series['counters'][name][slot] += n
+                self._totals[kind][name] += n
+
+    def snapshot(self, kind, window_seconds=300, percentiles=(50, 95, 99), now=None):
+        """
+        Metrics of one request kind over the last window_seconds
+
+        Returns:
+        dict with request/error/cache-hit counts and rates, rows per second,
+        '<series>_p<q>_ms' latency percentiles and lifetime totals
+        """
+        now = time.time() if now is None else now
+        current = int(now // self.slot_seconds)
+        n_window = max(1, min(self.n_slots, int(np.ceil(window_seconds / self.slot_seconds))))
+        with self._lock:
+            series = self._kinds.get(kind)
+            totals = dict(self._totals.get(kind, dict.fromkeys(COUNTERS, 0)))
+            if series is None:
+                in_window = None
+            else:
+                in_window = series['slot_ids'] > current - n_window
+                counters = {name: int(c[in_window].sum()) for name, c in series['counters'].items()}
+                latency = {name: h[in_window].sum(axis=0) for name, h in series['latency'].items()}
+
+        if in_window is None:
+            counters = dict.fromkeys(COUNTERS, 0)
+            latency = {name: np.zeros(len(BUCKET_BOUNDS_MS), dtype=np.int64) for name in LATENCY_SERIES}
+
+        requests = counters['requests']
+        span = min(window_seconds, now - self.started_at) or 1.0
+        result = {
+            'window_seconds': window_seconds,
+            'requests': requests,
+            'errors': counters['errors'],
+            'error_rate': counters['errors'] / requests if requests else 0.0,
+            'cache_hit_rate': counters['cache_hits'] / requests if requests else 0.0,
+            'rows_per_second': counters['rows'] / span,
+            'totals': totals,
+        }
+        for name, counts in latency.items():
+            for q, value in zip(percentiles, histogram_percentiles(counts, percentiles)):
+                result[f'{name}_p{q}_ms'] = value
+        return result
+
+    def kinds(self):
+        with self._lock:
+            return list(self._kinds)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in for IBM IAM and Watson ML
+========================================
+
+Serves the two APIs app.py talks to, for development and load tests
+without cloud credentials:
+
+- POST /identity/token: IAM API-key grant returning a bearer token that
+  expires after --token-ttl seconds
+- POST /ml/v4/deployments/<id>/predictions: WML scoring with the local
+  models/ artifacts (rows of [prediction code, probabilities]); requests
+  need a valid, unexpired token unless --no-auth is given
+- GET /stats: counters of token grants, predictions and TCP connections
+  accepted, to check that clients reuse connections and tokens, and the
+  model version being served
+- GET/POST /faults: read or change the injected faults while running,
+  e.g. {"error_rate": 1.0} to take the deployment "down"
+
+The model follows models/CURRENT: a newly published version is loaded in
+the background and takes over without failing or delaying requests.
+
+--latency adds a fixed delay to every response to emulate a remote service.
+Fault injection on the predictions endpoint, for testing client timeouts,
+retries, circuit breaking and hedging: --error-rate answers that fraction of
+requests with 503, and --slow-rate delays that fraction by --slow-latency
+seconds (a heavy latency tail). --token-error-rate answers that fraction of
+token requests with 503 (an IAM outage).
+
+Usage:
+    python3 scripts/mock_wml_server.py --port 8000 --token-ttl 120
+    export WML_ENDPOINT_URL=http://127.0.0.1:8000/ml/v4/deployments/local/predictions
+    export WML_IAM_URL=http://127.0.0.1:8000/identity/token WML_API_KEY=local
+    python3 scripts/mock_wml_server.py --error-rate 0.2 --slow-rate 0.05 --slow-latency 2
+    curl -X POST -d '{"error_rate": 1.0}' http://127.0.0.1:8000/faults
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from local_scorer import HotSwapScorer
+
+PREDICTIONS_PATH = re.compile(r'^/ml/v4/deployments/[^/]+/predictions$')
+
+
+FAULT_SETTINGS = ['latency', 'error_rate', 'slow_rate', 'slow_latency', 'token_error_rate']
+
+
+class MockState:
+    def __init__(self, scorer, token_ttl, latency, require_auth, error_rate=0.0, slow_rate=0.0,
+                 slow_latency=1.0, token_error_rate=0.0, seed=None):
+        self.scorer = scorer
+        self.token_ttl = token_ttl
+        self.latency = latency
+        self.require_auth = require_auth
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.token_error_rate = token_error_rate
+        self.random = random.Random(seed)
+        self.tokens = {}
+        self.stats = {'connections': 0, 'token_requests': 0, 'prediction_requests': 0,
+                      'rows_scored': 0, 'unauthorized': 0, 'injected_errors': 0, 'injected_delays': 0,
+                      'injected_token_errors': 0}
+        self.lock = threading.Lock()
+
+    def faults(self):
+        with self.lock:
+            return {name: getattr(self, name) for name in FAULT_SETTINGS}
+
+    def set_faults(self, settings):
+        with self.lock:
+            for name in FAULT_SETTINGS:
+                if name in settings:
+                    setattr(self, name, float(settings[name]))
+
+    def draw_faults(self):
+        """(fail with 503, extra delay in seconds) for one prediction request"""
+        with self.lock:
+            fail = self.random.random() < self.error_rate
+            delay = self.slow_latency if self.random.random() < self.slow_rate else 0.0
+        return fail, delay
+
+    def draw_token_fault(self):
+        """Whether to fail one token request with 503"""
+        with self.lock:
+            return self.random.random() < self.token_error_rate
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def issue_token(self):
+        token = secrets.token_urlsafe(32)
+        with self.lock:
+            now = time.time()
+            self.tokens = {t: exp for t, exp in self.tokens.items() if exp > now}
+            self.tokens[token] = now + self.token_ttl
+        return token
+
+    def token_valid(self, token):
+        with self.lock:
+            return self.tokens.get(token, 0) > time.time()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    state = None
+
+    def setup(self):
+        super().setup()
+        self.state.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or hedged duplicate): expected under fault injection
+            self.close_connection = True
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.state.lock:
+                self._send_json(200, dict(self.state.stats, model_version=self.state.scorer.version,
+                                          model_swaps=len(self.state.scorer.swaps)))
+        elif self.path == '/faults':
+            self._send_json(200, self.state.faults())
+        else:
+            self._send_json(404, {'errors': [{'message': 'not found'}]})
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        if self.path == '/identity/token':
+            self._token(body)
+        elif self.path == '/faults':
+            try:
+                self.state.set_faults(json.loads(body or b'{}'))
+            except (TypeError, ValueError) as e:
+                self._send_json(400, {'errors': [{'message': f'invalid faults: {e}'}]})
+                return
+            self._send_json(200, self.state.faults())
+        elif PREDICTIONS_PATH.match(self.path.split('?')[0]):
+            self._predict(body)
+        else:
+            self._send_json(404, {'errors': [{'message': 'not found'}]})
+
+    def _token(self, body):
+        form = parse_qs(body.decode())
+        if not form.get('apikey'):
+            self._send_json(400, {'errorMessage': 'apikey is required'})
+            return
+        self.state.count('token_requests')
+        if self.state.draw_token_fault():
+            self.state.count('injected_token_errors')
+            self._send_json(503, {'errorMessage': 'injected fault'})
+            return
+        now = int(time.time())
+        self._send_json(200, {
+            'access_token': self.state.issue_token(),
+            'token_type': 'Bearer',
+            'expires_in': self.state.token_ttl,
+            'expiration': now + self.state.token_ttl,
+        })
+
+    def _predict(self, body):
+        fail, delay = self.state.draw_faults()
+        if delay:
+            self.state.count('injected_delays')
+            time.sleep(delay)
+        if fail:
+            self.state.count('injected_errors')
+            self._send_json(503, {'errors': [{'code': 'service_unavailable', 'message': 'injected fault'}]})
+            return
+        if self.state.require_auth:
+            auth = self.headers.get('Authorization', '')
+            if not (auth.startswith('Bearer ') and self.state.token_valid(auth[len('Bearer '):])):
+                self.state.count('unauthorized')
+                self._send_json(401, {'errors': [{'code': 'authentication_token_expired'}]})
+                return
+        try:
+            data = json.loads(body)['input_data'][0]
+            readings = pd.DataFrame(data['values'], columns=data['fields'])
+            probabilities = self.state.scorer.predict_proba(readings)
+            values = [[int(probs.argmax()), probs.tolist()] for probs in probabilities]
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._send_json(400, {'errors': [{'message': f'invalid input_data: {e}'}]})
+            return
+        self.state.count('prediction_requests')
+        self.state.count('rows_scored', len(values))
+        self._send_json(200, {'predictions': [{'fields': ['prediction', 'probability'],
+                                               'values': values}]})
+
+
+def make_server(host='127.0.0.1', port=8000, model_path='models', token_ttl=3600, latency=0.0,
+                require_auth=True, error_rate=0.0, slow_rate=0.0, slow_latency=1.0, token_error_rate=0.0,
+                seed=None):
+    """Mock server (not started); call serve_forever() on it, e.g. in a thread"""
+    handler = type('MockHandler', (Handler,), {
+        'state': MockState(HotSwapScorer(model_path), token_ttl, latency, require_auth,
+                           error_rate=error_rate, slow_rate=slow_rate, slow_latency=slow_latency,
+                           token_error_rate=token_error_rate, seed=seed)
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the IAM and WML scoring APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model-path', default='models', help='saved artifacts (default: %(default)s)')
+    parser.add_argument('--token-ttl', type=int, default=3600,
+                        help='token lifetime in seconds (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every response (default: %(default)s)')
+    parser.add_argument('--no-auth', action='store_true', help='accept predictions without a token')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of predictions answered with 503 (default: %(default)s)')
+    parser.add_argument('--slow-rate', type=float, default=0.0,
+                        help='fraction of predictions delayed by --slow-latency (default: %(default)s)')
+    parser.add_argument('--slow-latency', type=float, default=1.0,
+                        help='seconds added to slow predictions (default: %(default)s)')
+    parser.add_argument('--token-error-rate', type=float, default=0.0,
+                        help='fraction of token requests answered with 503 (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the fault draws')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.model_path, args.token_ttl, args.latency,
+                         require_auth=not args.no_auth, error_rate=args.error_rate,
+                         slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                         token_error_rate=args.token_error_rate, seed=args.seed)
+    host, port = server.server_address[:2]
+    print(f"🧪 Mock IAM/WML server on http://{host}:{port}")
+    print(f"   token:       POST http://{host}:{port}/identity/token")
+    print(f"   predictions: POST http://{host}:{port}/ml/v4/deployments/local/predictions")
+    print(f"   faults:      GET/POST http://{host}:{port}/faults {server.RequestHandlerClass.state.faults()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
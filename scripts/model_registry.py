@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Versioned Model Publishing
+==========================
+
+Every trained or retrained model is published into its own directory,
+models/versions/<version>/, that is never modified afterwards. The file
+models/CURRENT names the version in use. Publishing writes the artifacts
+into a staging directory first, renames it into place, and then replaces
+CURRENT in one atomic step. A reader therefore sees either the old
+complete set of artifacts or the new one, never a mix.
+
+Scorers resolve the directory through CURRENT when they load. Long-running
+ones (local_scorer.HotSwapScorer) watch it and switch over to a new version
+after loading it in the background. A models/ directory without CURRENT
+still works: its artifacts are read from models/ directly.
+
+Usage:
+    python3 scripts/model_registry.py list
+    python3 scripts/model_registry.py rollback          # back to the previous version
+    python3 scripts/model_registry.py activate 20260101-120000
+    python3 scripts/model_registry.py publish models    # import a flat models/ directory as a version
+"""
+
+import argparse
+import os
+import shutil
+from datetime import datetime
+
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+STAGING_SUFFIX = '.staging'
+
+# Published versions kept on disk (the current one is never removed)
+KEEP_VERSIONS = 5
+
+# Standalone predict_failure() script saved with every version
+PREDICTION_SCRIPT = 'predict_failure.py'
+
+# Files a version needs before it can be activated
+REQUIRED_ARTIFACTS = ['model_metadata.pkl', 'feature_scaler.pkl', 'label_encoder_type.pkl',
+                      'label_encoder_failure.pkl', 'feature_names.pkl']
+
+
+def current_version(model_path='models'):
+    """Version named by CURRENT, or None for a flat (unversioned) models/ directory"""
+    try:
+        with open(os.path.join(model_path, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_dir(model_path, version):
+    return os.path.join(model_path, VERSIONS_DIR, version)
+
+
+def resolve_model_dir(model_path='models'):
+    """Directory holding the artifacts in use: the current version's, or model_path itself"""
+    version = current_version(model_path)
+    return version_dir(model_path, version) if version else model_path
+
+
+def list_versions(model_path='models'):
+    """Published versions, oldest first (staging directories are left out)"""
+    try:
+        names = os.listdir(os.path.join(model_path, VERSIONS_DIR))
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names
+                  if not name.endswith(STAGING_SUFFIX) and os.path.isdir(version_dir(model_path, name)))
+
+
+def create_version(model_path='models'):
+    """
+    Start a new version
+
+    Returns:
+    (version, staging directory to write the artifacts into before publish_version)
+    """
+    base = datetime.now().strftime('%Y%m%d-%H%M%S')
+    version, n = base, 0
+    while (os.path.exists(version_dir(model_path, version))
+           or os.path.exists(version_dir(model_path, version + STAGING_SUFFIX))):
+        n += 1
+        version = f'{base}-{n}'
+    staging = version_dir(model_path, version + STAGING_SUFFIX)
+    os.makedirs(staging)
+    return version, staging
+
+
+def _fsync_tree(path):
+    """Flush every file under path (and the directories) to disk"""
+    for root, _, files in os.walk(path):
+        for name in files:
+            with open(os.path.join(root, name), 'rb') as f:
+                os.fsync(f.fileno())
+        _fsync_dir(root)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def activate(model_path, version):
+    """Point CURRENT at a published version (atomic replace)"""
+    if version not in list_versions(model_path):
+        raise ValueError(f"Version {version!r} is not published in {model_path}")
+    missing = [name for name in REQUIRED_ARTIFACTS
+               if not os.path.exists(os.path.join(version_dir(model_path, version), name))]
+    if missing:
+        raise ValueError(f"Version {version!r} is incomplete (missing {', '.join(missing)})")
+    pointer = os.path.join(model_path, CURRENT_FILE)
+    temporary = f'{pointer}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, pointer)
+    _fsync_dir(model_path)
+    return version
+
+
+def publish_version(model_path, version, keep=KEEP_VERSIONS):
+    """
+    Make a staged version visible and current
+
+    The staging directory is flushed and renamed into versions/, then CURRENT
+    is switched, then versions beyond the newest `keep` are removed.
+    """
+    staging = version_dir(model_path, version + STAGING_SUFFIX)
+    _fsync_tree(staging)
+    os.rename(staging, version_dir(model_path, version))
+    _fsync_dir(os.path.join(model_path, VERSIONS_DIR))
+    activate(model_path, version)
+    prune(model_path, keep)
+    return version
+
+
+def discard_version(model_path, version):
+    """Remove a staged version that will not be published"""
+    shutil.rmtree(version_dir(model_path, version + STAGING_SUFFIX), ignore_errors=True)
+
+
+def prune(model_path='models', keep=KEEP_VERSIONS):
+    """Delete the oldest versions beyond `keep`; the current version always stays"""
+    current = current_version(model_path)
+    removable = [v for v in list_versions(model_path) if v != current]
+    for version in removable[:max(0, len(list_versions(model_path)) - keep)]:
+        shutil.rmtree(version_dir(model_path, version))
+
+
+def rollback(model_path='models'):
+    """Activate the version published before the current one"""
+    versions = list_versions(model_path)
+    current = current_version(model_path)
+    older = [v for v in versions if current is None or v < current]
+    if not older:
+        raise ValueError(f"No version older than {current} to roll back to")
+    return activate(model_path, older[-1])
+
+
+def copy_artifacts(source, destination, include_backends=True):
+    """Copy a model's artifacts (*.pkl, the prediction script and optionally backends/) to another directory"""
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if (name.endswith('.pkl') or name == PREDICTION_SCRIPT) and os.path.isfile(path):
+            shutil.copy2(path, destination)
+    backends = os.path.join(source, 'backends')
+    if include_backends and os.path.isdir(backends):
+        shutil.copytree(backends, os.path.join(destination, 'backends'))
+
+
+def publish_directory(source, model_path='models', keep=KEEP_VERSIONS):
+    """Publish the artifacts found in `source` (e.g. a flat models/ directory) as a new version"""
+    version, staging = create_version(model_path)
+    try:
+        copy_artifacts(source, staging)
+    except Exception:
+        discard_version(model_path, version)
+        raise
+    return publish_version(model_path, version, keep)
+
+
+def publish_derived(model_path, add_artifacts, include_backends=True, keep=KEEP_VERSIONS):
+    """
+    Publish a copy of the current version with artifacts added or replaced
+
+    Published versions are never modified: add_artifacts(staging) writes the
+    new files into a staged copy of the current version's artifacts, which is
+    then published as a new version.
+
+    Returns:
+    (the new version, the version it was derived from)
+    """
+    source_version = current_version(model_path)
+    version, staging = create_version(model_path)
+    try:
+        copy_artifacts(version_dir(model_path, source_version), staging, include_backends)
+        add_artifacts(staging)
+    except Exception:
+        discard_version(model_path, version)
+        raise
+    return publish_version(model_path, version, keep), source_version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Published model versions')
+    parser.add_argument('--model-path', default='models', help='model directory (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='show the published versions')
+    commands.add_parser('rollback', help='switch back to the version published before the current one')
+    activate_parser = commands.add_parser('activate', help='switch to a published version')
+    activate_parser.add_argument('version')
+    publish_parser = commands.add_parser('publish', help='publish the artifacts in a directory as a new version')
+    publish_parser.add_argument('source', help='directory with the model artifacts, e.g. a flat models/')
+    publish_parser.add_argument('--keep', type=int, default=KEEP_VERSIONS,
+                                help='versions kept on disk (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        current = current_version(args.model_path)
+        versions = list_versions(args.model_path)
+        if not versions:
+            print(f"No published versions in {args.model_path} (artifacts are read from it directly)")
+        for version in versions:
+            print(f"{'*' if version == current else ' '} {version}")
+        return
+
+    try:
+        if args.command == 'rollback':
+            previous = current_version(args.model_path)
+            version = rollback(args.model_path)
+            print(f"⏪ Rolled back: {previous} -> {version}")
+        elif args.command == 'activate':
+            print(f"✅ Current version: {activate(args.model_path, args.version)}")
+        elif args.command == 'publish':
+            print(f"✅ Published and activated: {publish_directory(args.source, args.model_path, args.keep)}")
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
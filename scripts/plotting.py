@@ -0,0 +1,365 @@
+"""
+Figure Rendering for the Predictive Maintenance Pipeline
+========================================================
+
+Plot functions used by the EDA and evaluation stages, plus a renderer that
+can draw them headless in worker processes and skip figures whose input
+data has not changed since the previous run.
+
+Every plot function takes plain data (DataFrames / arrays) and an output
+path so it can be pickled to a worker process and drawn there.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from features import NUMERICAL_COLS
+
+# Bump when a plot function changes so cached figures are redrawn
+RENDER_VERSION = 1
+
+CACHE_MANIFEST = '.render_cache.json'
+
+def _pyplot(headless):
+    """Import pyplot, switching to the non-interactive backend when headless"""
+    import matplotlib
+    if headless:
+        matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    plt.style.use('seaborn-v0_8')
+    return plt
+
+
+def _finish(plt, fig, output_path, dpi, show):
+    """Save a matplotlib figure and either show or close it"""
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close(fig)
+    return output_path
+
+
+def stratified_sample(df, label_col, max_points, random_state=42):
+    """
+    Downsample a DataFrame to at most max_points rows, keeping every class
+
+    The budget is shared equally between classes; classes smaller than their
+    share are kept whole and the leftover budget goes to the larger ones, so
+    rare failure types stay visible in the plot.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    counts = df[label_col].value_counts().sort_values()
+    quotas = {}
+    budget = max_points
+    remaining = len(counts)
+    for label, count in counts.items():
+        share = budget // remaining
+        quotas[label] = min(count, share)
+        budget -= quotas[label]
+        remaining -= 1
+
+    parts = [
+        group.sample(n=quotas[label], random_state=random_state)
+        for label, group in df.groupby(label_col, sort=False)
+        if quotas.get(label, 0) > 0
+    ]
+    return pd.concat(parts).sort_index()
+
+
+def plot_feature_distributions(df, output_path, dpi=300, show=False, headless=True):
+    """Histograms of the sensor readings plus the failure type pie chart"""
+    import seaborn as sns
+    plt = _pyplot(headless)
+
+    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    axes = axes.ravel()
+
+    for i, col in enumerate(NUMERICAL_COLS):
+        sns.histplot(data=df, x=col, kde=True, ax=axes[i])
+        axes[i].set_title(f'Distribution of {col}')
+        axes[i].tick_params(axis='x', rotation=45)
+
+    failure_counts = df['Failure Type'].value_counts()
+    axes[5].pie(failure_counts.values, labels=failure_counts.index, autopct='%1.1f%%')
+    axes[5].set_title('Failure Type Distribution')
+
+    return _finish(plt, fig, output_path, dpi, show)
+
+
+def plot_correlation_heatmap(correlation_matrix, output_path, dpi=300, show=False, headless=True):
+    """Annotated heatmap of a precomputed correlation matrix"""
+    import seaborn as sns
+    plt = _pyplot(headless)
+
+    fig = plt.figure(figsize=(12, 10))
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0,
+                square=True, linewidths=0.5)
+    plt.title('Feature Correlation Heatmap')
+    plt.xticks(rotation=45, ha='right')
+    plt.yticks(rotation=0)
+
+    return _finish(plt, fig, output_path, dpi, show)
+
+
+def plot_feature_by_failure(df, output_path, dpi=300, show=False, headless=True):
+    """Box plots of each sensor split by machine failure, plus product types"""
+    import seaborn as sns
+    plt = _pyplot(headless)
+
+    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    axes = axes.ravel()
+
+    for i, col in enumerate(NUMERICAL_COLS):
+        sns.boxplot(data=df, x='Machine failure', y=col, ax=axes[i])
+        axes[i].set_title(f'{col} by Machine Failure')
+
+    type_counts = df['Type'].value_counts()
+    axes[5].bar(type_counts.index, type_counts.values)
+    axes[5].set_title('Product Type Distribution')
+
+    return _finish(plt, fig, output_path, dpi, show)
+
+
+def plot_3d_scatter(df, output_path, max_points=None):
+    """Interactive Plotly 3D scatter, stratified-downsampled to max_points rows"""
+    import plotly.express as px
+
+    sample = stratified_sample(df, 'Failure Type', max_points)
+    title = '3D Scatter: Temperature vs Torque by Failure Type'
+    if len(sample) < len(df):
+        title += f' ({len(sample):,} of {len(df):,} points)'
+
+    fig = px.scatter_3d(sample,
+                        x='Air temperature [K]',
+                        y='Process temperature [K]',
+                        z='Torque [Nm]',
+                        color='Failure Type',
+                        title=title,
+                        opacity=0.7)
+    fig.write_html(output_path)
+    return output_path
+
+
+def plot_confusion_matrix(cm, class_names, model_name, output_path, dpi=300, show=False, headless=True):
+    """Annotated confusion matrix heatmap"""
+    import seaborn as sns
+    plt = _pyplot(headless)
+
+    fig = plt.figure(figsize=(10, 8))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                xticklabels=class_names,
+                yticklabels=class_names)
+    plt.title(f'Confusion Matrix - {model_name}')
+    plt.xlabel('Predicted')
+    plt.ylabel('Actual')
+    plt.xticks(rotation=45, ha='right')
+    plt.yticks(rotation=0)
+
+    return _finish(plt, fig, output_path, dpi, show)
+
+
+def plot_feature_importance(feature_importance, model_name, output_path, dpi=300, show=False, headless=True):
+    """Bar chart of the ten most important features"""
+    import seaborn as sns
+    plt = _pyplot(headless)
+
+    fig = plt.figure(figsize=(12, 8))
+    sns.barplot(data=feature_importance.head(10), x='importance', y='feature')
+    plt.title(f'Top 10 Feature Importance - {model_name}')
+    plt.xlabel('Importance Score')
+
+    return _finish(plt, fig, output_path, dpi, show)
+
+
+def plot_model_comparison(results_df, output_path, dpi=300, show=False, headless=True):
+    """Side-by-side accuracy and F1-score bars for every evaluated model"""
+    plt = _pyplot(headless)
+
+    fig, axes = plt.subplots(1, 2, figsize=(15, 6))
+    model_names = list(results_df.index)
+    colors = ['skyblue', 'lightgreen', 'lightcoral', 'gold'][:len(model_names)]
+
+    for ax, metric, title in ((axes[0], 'accuracy', 'Accuracy'),
+                              (axes[1], 'f1_score', 'F1-Score')):
+        values = results_df[metric].values.astype(float)
+        bars = ax.bar(model_names, values, color=colors)
+        ax.set_title(f'Model {title} Comparison')
+        ax.set_ylabel(title)
+        ax.set_ylim(0.9, 1.0)
+        ax.tick_params(axis='x', rotation=45)
+
+        for bar, value in zip(bars, values):
+            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.001,
+                    f'{value:.4f}', ha='center', va='bottom')
+
+    return _finish(plt, fig, output_path, dpi, show)
+
+
+def _hash_value(digest, value):
+    """Feed a plot argument into a running hash"""
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(pickle.dumps(value, protocol=4))
+
+
+def figure_key(plot_func, args, kwargs):
+    """Content hash identifying one rendering of a figure"""
+    digest = hashlib.sha256()
+    digest.update(f'{plot_func.__module__}.{plot_func.__name__}:{RENDER_VERSION}'.encode())
+    for value in args:
+        _hash_value(digest, value)
+    for name in sorted(kwargs):
+        digest.update(name.encode())
+        _hash_value(digest, kwargs[name])
+    return digest.hexdigest()
+
+
+def _init_worker():
+    """Make sure worker processes never try to open a window"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+class FigureRenderer:
+    """
+    Render pipeline figures, optionally headless and in parallel
+
+    In interactive mode (headless=False) figures are drawn in-process and
+    shown one after another, which is what the pipeline always did. In
+    headless mode they are submitted to a pool of worker processes and the
+    caller continues immediately; call wait() to collect them.
+
+    Each output file is recorded in a manifest with the hash of the data
+    and settings it was drawn from, and is skipped next time if unchanged.
+    """
+
+    def __init__(self, output_dir='visualizations', dpi=300, fmt='png',
+                 headless=False, max_workers=None, use_cache=True):
+        self.output_dir = output_dir
+        self.dpi = dpi
+        self.fmt = fmt
+        self.headless = headless
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+
+        self._pool = None
+        self._pending = {}
+        # Pipeline stages running concurrently may submit figures at the same time
+        self._lock = threading.Lock()
+        self.rendered = []
+        self.skipped = []
+
+        os.makedirs(output_dir, exist_ok=True)
+        self._manifest_path = os.path.join(output_dir, CACHE_MANIFEST)
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not self.use_cache or not os.path.exists(self._manifest_path):
+            return {}
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        if not self.use_cache:
+            return
+        tmp_path = self._manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def path_for(self, name, ext=None):
+        """Output path for a figure name in the configured format"""
+        return os.path.join(self.output_dir, f'{name}.{ext or self.fmt}')
+
+    def render(self, name, plot_func, *args, ext=None, **kwargs):
+        """
+        Draw one figure unless an identical rendering is already on disk
+
+        Parameters:
+        name: output file stem inside output_dir
+        plot_func: one of the module-level plot functions
+        args/kwargs: data passed to plot_func; output_path/dpi are added here
+        ext: file extension override (e.g. 'html' for Plotly figures)
+
+        Returns:
+        path of the output file (it may still be rendering in headless mode)
+        """
+        output_path = self.path_for(name, ext)
+        kwargs = dict(kwargs, output_path=output_path)
+        if ext is None:
+            kwargs['dpi'] = self.dpi
+
+        key = figure_key(plot_func, args, kwargs)
+        if (self.use_cache and self._manifest.get(output_path) == key
+                and os.path.exists(output_path)):
+            print(f"⏭️  {output_path} unchanged, skipping render")
+            self.skipped.append(output_path)
+            return output_path
+
+        if self.headless:
+            if ext is None:
+                kwargs['headless'] = True
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker
+                    )
+                self._pending[output_path] = (key, self._pool.submit(plot_func, *args, **kwargs))
+        else:
+            if ext is None:
+                kwargs.update(show=True, headless=False)
+            plot_func(*args, **kwargs)
+            self._record(output_path, key)
+
+        return output_path
+
+    def _record(self, output_path, key):
+        self._manifest[output_path] = key
+        self.rendered.append(output_path)
+
+    def wait(self):
+        """Block until every submitted figure is written, then save the cache manifest"""
+        errors = []
+        for output_path, (key, future) in self._pending.items():
+            try:
+                future.result()
+                self._record(output_path, key)
+            except Exception as e:
+                errors.append(f"{output_path}: {e}")
+        self._pending.clear()
+        self._save_manifest()
+
+        for error in errors:
+            print(f"⚠️  Figure rendering failed - {error}")
+        return self
+
+    def close(self):
+        """Wait for outstanding figures and shut the worker pool down"""
+        self.wait()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        return self
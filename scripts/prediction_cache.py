@@ -0,0 +1,45 @@
+"""
+Prediction Cache
+================
+
+Small thread-safe LRU cache for scoring results keyed by the exact input,
+so repeated requests for the same reading skip the model or the network.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Least-recently-used cache with hit/miss counters
+
+    Parameters:
+    maxsize: entries kept before the least recently used is evicted
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
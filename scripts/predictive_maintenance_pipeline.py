@@ -14,17 +14,14 @@ Features:
 - Hyperparameter optimization
 - Model evaluation and comparison
 - Model saving and deployment preparation
+- Stages run as a dependency graph, independent ones concurrently
 
 Target: ≥98% test accuracy
 """
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import argparse
 import warnings
 import os
 from datetime import datetime
@@ -33,9 +30,9 @@ warnings.filterwarnings('ignore')
 # Machine Learning libraries
 from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV, cross_val_score
 from sklearn.preprocessing import StandardScaler, LabelEncoder, MinMaxScaler
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, roc_auc_score
-from sklearn.metrics import precision_score, recall_score, f1_score, roc_curve, auc
+from sklearn.metrics import accuracy_score
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.decomposition import PCA
 from imblearn.over_sampling import SMOTE
 
@@ -48,20 +45,145 @@ import optuna
 import joblib
 import pickle
 
-# Set style and random seed
-plt.style.use('seaborn-v0_8')
+# Binned CV matrices reused across folds and tuning trials
+from fold_matrices import FoldMatrixCache
+
+# Feature definitions shared with the scoring paths
+from features import ENGINEERED_FEATURES, ALL_FEATURES, WINDOW_FEATURES, add_engineered_features
+
+# Rolling per-machine features, replayed from the history exactly as scorers compute them live
+from streaming_features import DEFAULT_MAX_BYTES_PER_MACHINE, StreamingFeatureEngine, replay_window_features
+
+# Exported inference runtimes (native booster, ONNX Runtime, Treelite)
+from inference_backends import EXPORT_FORMATS, export_backends, print_report, select_backends
+
+# Versioned publishing: artifacts are staged, then made current atomically
+from model_registry import PREDICTION_SCRIPT, create_version, discard_version, publish_version, resolve_model_dir
+
+# Reference bins for input drift monitoring at scoring time
+from drift_monitor import REFERENCE_FILE, build_reference
+
+# Per-stage instrumentation
+from run_profiler import StageProfiler, profiled_stage
+
+# Stages run as a dependency graph, independent ones concurrently
+from stage_graph import Stage, StageGraph, print_report as print_stage_report
+
+# Single-pass, concurrent model evaluation
+from evaluation import METRIC_NAMES, evaluate_models_concurrently
+
+# Figure rendering
+from plotting import (FigureRenderer, plot_feature_distributions, plot_correlation_heatmap,
+                      plot_feature_by_failure, plot_3d_scatter, plot_confusion_matrix,
+                      plot_feature_importance, plot_model_comparison)
+
+# Set random seed
 np.random.seed(42)
 optuna.logging.set_verbosity(optuna.logging.WARNING)
 
+# Models compared by cross-validation (in report order): estimator class and settings
+MODELS = {
+    'Random Forest': (RandomForestClassifier, dict(
+        n_estimators=200, max_depth=15, min_samples_split=5,
+        min_samples_leaf=2, random_state=42, n_jobs=-1
+    )),
+    'XGBoost': (xgb.XGBClassifier, dict(
+        n_estimators=200, max_depth=8, learning_rate=0.1,
+        subsample=0.8, colsample_bytree=0.8, random_state=42,
+        eval_metric='mlogloss'
+    )),
+    'LightGBM': (lgb.LGBMClassifier, dict(
+        n_estimators=200, max_depth=8, learning_rate=0.1,
+        subsample=0.8, colsample_bytree=0.8, random_state=42, verbose=-1
+    )),
+}
+
+def make_model(name):
+    """Unfitted estimator of one of MODELS"""
+    model_class, params = MODELS[name]
+    return model_class(**params)
+
+# What every stage reads and writes; StageGraph derives the dependencies from it.
+# Stages replace the attributes they write instead of changing them in place:
+# EDA keeps reading df_processed while feature engineering builds df_features,
+# and cross-validation reads the folds in fold_cache while select_features
+# replaces the training arrays.
+PIPELINE_STAGES = [
+    Stage('load_data', inputs=['data_path'], outputs=['df']),
+    Stage('preprocess_data', inputs=['df'], outputs=['df_processed', 'le_type', 'le_failure']),
+    Stage('exploratory_data_analysis', inputs=['df_processed'], outputs=['eda_figures']),
+    Stage('feature_engineering', inputs=['df', 'df_processed', 'window_features'],
+          outputs=['df_features', 'feature_cols', 'window_features']),
+    Stage('prepare_data_for_modeling', inputs=['df_features', 'feature_cols'],
+          outputs=['X_train', 'X_test', 'y_train', 'y_test', 'scaler', 'X_train_scaled', 'X_test_scaled',
+                   'fold_cache']),
+    Stage('cross_validate_random_forest', inputs=['fold_cache'], outputs=['cv[Random Forest]']),
+    Stage('cross_validate_xgboost', inputs=['fold_cache'], outputs=['cv[XGBoost]']),
+    Stage('cross_validate_lightgbm', inputs=['fold_cache'], outputs=['cv[LightGBM]']),
+    Stage('compare_models', inputs=[f'cv[{name}]' for name in MODELS], outputs=['cv_scores']),
+    Stage('select_features', inputs=['feature_cols', 'X_train', 'X_test', 'X_train_scaled', 'y_train'],
+          outputs=['feature_cols', 'X_train', 'X_test', 'scaler', 'X_train_scaled', 'X_test_scaled',
+                   'feature_selection_report']),
+    Stage('train_models', inputs=['X_train_scaled', 'y_train'], outputs=['models']),
+    Stage('optimize_best_model', inputs=['X_train_scaled', 'y_train'],
+          outputs=['tuned_model', 'tuning_prep_report']),
+    Stage('evaluate_models', inputs=['models', 'tuned_model', 'X_test_scaled', 'y_test', 'le_failure'],
+          outputs=['models', 'test_results', 'best_model', 'best_model_name']),
+    Stage('create_visualizations', inputs=['test_results', 'best_model', 'feature_cols', 'le_failure'],
+          outputs=['evaluation_figures']),
+    Stage('save_models_and_artifacts',
+          inputs=['best_model', 'test_results', 'scaler', 'le_type', 'le_failure', 'feature_cols',
+                  'feature_selection_report', 'window_features', 'df', 'df_features'],
+          outputs=['version', 'version_dir']),
+    Stage('export_inference_backends', inputs=['best_model', 'X_test_scaled', 'version_dir'],
+          outputs=['backend_report']),
+    Stage('create_prediction_function', inputs=['version_dir'], outputs=['prediction_script']),
+    # Publishing goes last: a run failing anywhere else leaves the version in use current
+    Stage('publish_model', inputs=['version', 'backend_report', 'prediction_script', 'cv_scores'],
+          outputs=['published_version']),
+    Stage('wait_for_figures', inputs=['eda_figures', 'evaluation_figures'], outputs=['figures']),
+]
+
 class PredictiveMaintenanceML:
     """Complete ML Pipeline for Predictive Maintenance"""
     
-    def __init__(self, data_path='data/predictive_maintenance.csv'):
+    def __init__(self, data_path='data/predictive_maintenance.csv', headless=False,
+                 plot_dpi=300, plot_format='png', plot_workers=None, max_scatter_points=20000,
+                 plot_cache=True, flamegraph_dir=None, n_trials=50,
+                 feature_selection=True, feature_tolerance=0.002, importance_method='gain',
+                 eval_chunk_size=None, backend_export=False, window_features=None,
+                 window_memory=DEFAULT_MAX_BYTES_PER_MACHINE, stage_workers=None, measure_baseline=False):
         self.data_path = data_path
+        self.backend_export = backend_export
+        self.backend_report = None
+        self.version = None
+        self.version_dir = None
+        self.n_trials = n_trials
+        # Time the sklearn-wrapper CV path on the first candidate for the data-preparation report
+        self.measure_baseline = measure_baseline
+        self.eval_chunk_size = eval_chunk_size
+        
+        # Window features over each machine's last `window_features` readings (None: off);
+        # the engine refuses windows whose state exceeds window_memory bytes per machine
+        if window_features:
+            StreamingFeatureEngine(window_features, window_memory, capacity=1)
+        self.window_features = window_features
+        self.window_memory = window_memory
+        
+        # Importance-driven feature pruning after train_models
+        if importance_method not in ('gain', 'permutation'):
+            raise ValueError(f"Unknown importance method: {importance_method}")
+        self.feature_selection = feature_selection
+        self.feature_tolerance = feature_tolerance
+        self.importance_method = importance_method
+        self.feature_selection_report = None
         self.df = None
         self.df_processed = None
+        self.df_features = None
         self.models = {}
         self.cv_scores = {}
+        self.cv_results = {}
+        self.tuned_model = None
         self.test_results = {}
         self.best_model = None
         self.best_model_name = None
@@ -72,6 +194,24 @@ class PredictiveMaintenanceML:
         self.le_failure = None
         self.feature_cols = None
         
+        # Figure rendering (headless mode draws in worker processes, no plt.show())
+        self.max_scatter_points = max_scatter_points
+        self.renderer = FigureRenderer('visualizations', dpi=plot_dpi, fmt=plot_format,
+                                       headless=headless, max_workers=plot_workers,
+                                       use_cache=plot_cache)
+        
+        # Per-stage wall/CPU time and peak memory, optional flamegraphs
+        self.profiler = StageProfiler(flamegraph_dir=flamegraph_dir)
+        
+        # Independent stages run concurrently (on one CPU they would only take turns);
+        # interactive figures must be shown on the main thread
+        if stage_workers is None:
+            stage_workers = min(4, os.cpu_count() or 1) if headless else 1
+        if stage_workers > 1 and not headless:
+            raise ValueError("Running stages concurrently needs headless figure rendering")
+        self.stage_workers = stage_workers
+        self.stage_graph = StageGraph(PIPELINE_STAGES)
+        
         # Create output directories
         os.makedirs('visualizations', exist_ok=True)
         os.makedirs('models', exist_ok=True)
@@ -79,6 +219,16 @@ class PredictiveMaintenanceML:
         print("🚀 Predictive Maintenance ML Pipeline Initialized")
         print("=" * 60)
     
+    def data_shape(self):
+        """(rows, features) of the data the pipeline currently works on"""
+        if getattr(self, 'X_train_scaled', None) is not None:
+            return len(self.X_train_scaled) + len(self.X_test_scaled), self.X_train_scaled.shape[1]
+        for df in (self.df_features, self.df_processed, self.df):
+            if df is not None:
+                return df.shape
+        return 0, 0
+    
+    @profiled_stage
     def load_data(self):
         """Load and perform initial data exploration"""
         print("📊 Loading and exploring data...")
@@ -102,6 +252,7 @@ class PredictiveMaintenanceML:
         
         return self
     
+    @profiled_stage
     def preprocess_data(self):
         """Clean and preprocess the data"""
         print("\n🔧 Preprocessing data...")
@@ -145,6 +296,7 @@ class PredictiveMaintenanceML:
         
         return self
     
+    @profiled_stage
     def exploratory_data_analysis(self):
         """Perform comprehensive EDA with visualizations"""
         print("\n📈 Performing Exploratory Data Analysis...")
@@ -152,108 +304,68 @@ class PredictiveMaintenanceML:
         numerical_cols = ['Air temperature [K]', 'Process temperature [K]', 
                          'Rotational speed [rpm]', 'Torque [Nm]', 'Tool wear [min]']
         
-        # 1. Distribution plots
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        axes = axes.ravel()
-        
-        for i, col in enumerate(numerical_cols):
-            sns.histplot(data=self.df_processed, x=col, kde=True, ax=axes[i])
-            axes[i].set_title(f'Distribution of {col}')
-            axes[i].tick_params(axis='x', rotation=45)
-        
-        # Failure type distribution
-        failure_counts = self.df_processed['Failure Type'].value_counts()
-        axes[5].pie(failure_counts.values, labels=failure_counts.index, autopct='%1.1f%%')
-        axes[5].set_title('Failure Type Distribution')
+        # Only ship the columns each figure needs to the renderer
+        plot_cols = numerical_cols + ['Type', 'Machine failure', 'Failure Type']
+        plot_df = self.df_processed[plot_cols]
         
-        plt.tight_layout()
-        plt.savefig('visualizations/feature_distributions.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        # 1. Distribution plots
+        self.renderer.render('feature_distributions', plot_feature_distributions, plot_df)
         
         # 2. Correlation heatmap
-        plt.figure(figsize=(12, 10))
         correlation_cols = numerical_cols + ['Type_encoded', 'Machine failure', 'Failure_Type_encoded']
         correlation_matrix = self.df_processed[correlation_cols].corr()
-        
-        sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0, 
-                    square=True, linewidths=0.5)
-        plt.title('Feature Correlation Heatmap')
-        plt.xticks(rotation=45, ha='right')
-        plt.yticks(rotation=0)
-        plt.tight_layout()
-        plt.savefig('visualizations/correlation_heatmap.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self.renderer.render('correlation_heatmap', plot_correlation_heatmap, correlation_matrix)
         
         # 3. Box plots by failure type
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        axes = axes.ravel()
-        
-        for i, col in enumerate(numerical_cols):
-            sns.boxplot(data=self.df_processed, x='Machine failure', y=col, ax=axes[i])
-            axes[i].set_title(f'{col} by Machine Failure')
-        
-        # Product type distribution
-        type_counts = self.df_processed['Type'].value_counts()
-        axes[5].bar(type_counts.index, type_counts.values)
-        axes[5].set_title('Product Type Distribution')
-        
-        plt.tight_layout()
-        plt.savefig('visualizations/feature_by_failure.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
-        # 4. Interactive 3D plot with Plotly
-        fig = px.scatter_3d(self.df_processed, 
-                            x='Air temperature [K]', 
-                            y='Process temperature [K]', 
-                            z='Torque [Nm]',
-                            color='Failure Type',
-                            title='3D Scatter: Temperature vs Torque by Failure Type',
-                            opacity=0.7)
-        fig.write_html('visualizations/3d_scatter_plot.html')
+        self.renderer.render('feature_by_failure', plot_feature_by_failure, plot_df)
+        
+        # 4. Interactive 3D plot with Plotly (stratified sample of large datasets)
+        scatter_cols = ['Air temperature [K]', 'Process temperature [K]', 'Torque [Nm]', 'Failure Type']
+        self.renderer.render('3d_scatter_plot', plot_3d_scatter, self.df_processed[scatter_cols],
+                             ext='html', max_points=self.max_scatter_points)
         print("3D interactive plot saved as HTML")
         
         return self
     
+    @profiled_stage
     def feature_engineering(self):
         """Create engineered features"""
         print("\n⚙️ Engineering features...")
         
-        # Create engineered features
-        self.df_processed['Temp_diff'] = (self.df_processed['Process temperature [K]'] - 
-                                         self.df_processed['Air temperature [K]'])
-        
-        self.df_processed['Power'] = (self.df_processed['Torque [Nm]'] * 
-                                     self.df_processed['Rotational speed [rpm]'] / 9549)
-        
-        self.df_processed['Tool_wear_rate'] = (self.df_processed['Tool wear [min]'] / 
-                                              (self.df_processed['Rotational speed [rpm]'] / 1000))
-        
-        self.df_processed['Temp_ratio'] = (self.df_processed['Process temperature [K]'] / 
-                                          self.df_processed['Air temperature [K]'])
-        
-        self.df_processed['Stress_indicator'] = ((self.df_processed['Torque [Nm]'] * 
-                                                 self.df_processed['Tool wear [min]']) / 
-                                                self.df_processed['Rotational speed [rpm]'])
+        # Create engineered features on a new frame; df_processed stays as EDA reads it
+        self.df_features = add_engineered_features(self.df_processed.copy(deep=False))
         
         # Define all feature columns
-        numerical_cols = ['Air temperature [K]', 'Process temperature [K]', 
-                         'Rotational speed [rpm]', 'Torque [Nm]', 'Tool wear [min]']
-        new_features = ['Temp_diff', 'Power', 'Tool_wear_rate', 'Temp_ratio', 'Stress_indicator']
-        self.feature_cols = numerical_cols + ['Type_encoded'] + new_features
+        new_features = list(ENGINEERED_FEATURES)
+        self.feature_cols = ALL_FEATURES.copy()
+        
+        if self.window_features:
+            # Replayed over the full history (outlier rows included), as a live scorer sees it
+            if 'Product ID' not in self.df or self.df['Product ID'].is_unique:
+                print("Warning: every machine has a single reading, skipping window features")
+                self.window_features = None
+            else:
+                window = replay_window_features(self.df, self.window_features, self.window_memory)
+                self.df_features[WINDOW_FEATURES] = window.loc[self.df_features.index]
+                new_features += WINDOW_FEATURES
+                self.feature_cols += WINDOW_FEATURES
+                print(f"Window features over the last {self.window_features} readings of "
+                      f"{self.df['Product ID'].nunique():,} machines")
         
         print(f"Total features after engineering: {len(self.feature_cols)}")
         print("New features statistics:")
-        print(self.df_processed[new_features].describe())
+        print(self.df_features[new_features].describe())
         
         return self
     
+    @profiled_stage
     def prepare_data_for_modeling(self):
         """Prepare final datasets for modeling"""
         print("\n📋 Preparing data for modeling...")
         
         # Prepare features and target
-        X = self.df_processed[self.feature_cols]
-        y = self.df_processed['Failure_Type_encoded']  # Multiclass classification
+        X = self.df_features[self.feature_cols]
+        y = self.df_features['Failure_Type_encoded']  # Multiclass classification
         
         print(f"Feature matrix shape: {X.shape}")
         print(f"Class distribution: {pd.Series(y).value_counts().to_dict()}")
@@ -294,67 +406,124 @@ class PredictiveMaintenanceML:
         print(f"Training set shape: {self.X_train_scaled.shape}")
         print(f"Test set shape: {self.X_test_scaled.shape}")
         
+        # Stratified K-Fold cross-validation folds shared by every model; the binned
+        # per-fold matrices for the boosting models are built once and reused
+        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        self.fold_cache = FoldMatrixCache(self.X_train_scaled, self.y_train, skf)
+        
         return self
     
-    def train_models(self):
-        """Train multiple ML models"""
-        print("\n🤖 Training ML models...")
+    def _record_cv(self, name, scores):
+        """Keep one model's per-fold CV accuracy for compare_models"""
+        self.cv_results[name] = scores
+        print(f"{name} CV Accuracy: {scores.mean():.4f} (+/- {scores.std() * 2:.4f})")
+        return self
+    
+    @profiled_stage
+    def cross_validate_random_forest(self):
+        """5-fold CV accuracy of the Random Forest"""
+        print("\n🤖 Cross-validating Random Forest...")
+        scores = cross_val_score(make_model('Random Forest'), self.fold_cache.X, self.fold_cache.y,
+                                 cv=self.fold_cache.splits, scoring='accuracy')
+        return self._record_cv('Random Forest', scores)
+    
+    @profiled_stage
+    def cross_validate_xgboost(self):
+        """5-fold CV accuracy of XGBoost on the cached fold matrices"""
+        print("\n🤖 Cross-validating XGBoost...")
+        return self._record_cv('XGBoost', self.fold_cache.cv_xgb(MODELS['XGBoost'][1]))
+    
+    @profiled_stage
+    def cross_validate_lightgbm(self):
+        """5-fold CV accuracy of LightGBM on the cached fold matrices"""
+        print("\n🤖 Cross-validating LightGBM...")
+        return self._record_cv('LightGBM', self.fold_cache.cv_lgb(MODELS['LightGBM'][1]))
+    
+    @profiled_stage
+    def compare_models(self):
+        """Collect the CV scores in MODELS order"""
+        self.cv_scores = {name: self.cv_results[name] for name in MODELS}
+        best_cv_model = max(self.cv_scores.items(), key=lambda x: x[1].mean())
+        print(f"\nBest CV model: {best_cv_model[0]} with accuracy: {best_cv_model[1].mean():.4f}")
+        return self
+    
+    @profiled_stage
+    def select_features(self):
+        """Prune features by importance, keeping the smallest set within the accuracy tolerance"""
+        if not self.feature_selection:
+            return self
         
-        # Stratified K-Fold cross-validation
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        print(f"\n✂️ Selecting features by {self.importance_method} importance...")
         
-        # 1. Random Forest
-        print("Training Random Forest...")
-        rf_model = RandomForestClassifier(
-            n_estimators=200, max_depth=15, min_samples_split=5,
-            min_samples_leaf=2, random_state=42, n_jobs=-1
-        )
-        rf_scores = cross_val_score(rf_model, self.X_train_scaled, self.y_train, 
-                                   cv=skf, scoring='accuracy')
-        self.models['Random Forest'] = rf_model
-        self.cv_scores['Random Forest'] = rf_scores
-        print(f"Random Forest CV Accuracy: {rf_scores.mean():.4f} (+/- {rf_scores.std() * 2:.4f})")
-        
-        # 2. XGBoost
-        print("Training XGBoost...")
-        xgb_model = xgb.XGBClassifier(
-            n_estimators=200, max_depth=8, learning_rate=0.1,
-            subsample=0.8, colsample_bytree=0.8, random_state=42,
-            eval_metric='mlogloss'
-        )
-        xgb_scores = cross_val_score(xgb_model, self.X_train_scaled, self.y_train,
-                                    cv=skf, scoring='accuracy')
-        self.models['XGBoost'] = xgb_model
-        self.cv_scores['XGBoost'] = xgb_scores
-        print(f"XGBoost CV Accuracy: {xgb_scores.mean():.4f} (+/- {xgb_scores.std() * 2:.4f})")
-        
-        # 3. LightGBM
-        print("Training LightGBM...")
-        lgb_model = lgb.LGBMClassifier(
-            n_estimators=200, max_depth=8, learning_rate=0.1,
-            subsample=0.8, colsample_bytree=0.8, random_state=42, verbose=-1
+        # Rank and score subsets on a split of the training data so the test set stays unseen
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            self.X_train_scaled, self.y_train, test_size=0.2, random_state=42, stratify=self.y_train
         )
-        lgb_scores = cross_val_score(lgb_model, self.X_train_scaled, self.y_train,
-                                    cv=skf, scoring='accuracy')
-        self.models['LightGBM'] = lgb_model
-        self.cv_scores['LightGBM'] = lgb_scores
-        print(f"LightGBM CV Accuracy: {lgb_scores.mean():.4f} (+/- {lgb_scores.std() * 2:.4f})")
+        params = MODELS['XGBoost'][1]
         
-        # Train all models on full training set
-        print("Training models on full training set...")
-        for name, model in self.models.items():
-            model.fit(self.X_train_scaled, self.y_train)
+        def holdout_accuracy(columns):
+            model = xgb.XGBClassifier(**params).fit(X_fit[:, columns], y_fit)
+            return accuracy_score(y_val, model.predict(X_val[:, columns])), model
+        
+        all_columns = list(range(len(self.feature_cols)))
+        baseline, full_model = holdout_accuracy(all_columns)
+        
+        if self.importance_method == 'permutation':
+            importance = permutation_importance(full_model, X_val, y_val, scoring='accuracy',
+                                                n_repeats=5, random_state=42).importances_mean
+        else:
+            gain = full_model.get_booster().get_score(importance_type='gain')
+            importance = np.array([gain.get(f'f{i}', 0.0) for i in all_columns])
+        ranking = list(np.argsort(-importance, kind='stable'))
+        
+        # Nested subsets of the top-k features, smallest first; stop at the first within tolerance
+        scores = {len(all_columns): baseline}
+        selected = all_columns
+        for k in range(1, len(all_columns)):
+            columns = sorted(ranking[:k])
+            scores[k], _ = holdout_accuracy(columns)
+            print(f"  Top {k:>2} features: accuracy {scores[k]:.4f}")
+            if scores[k] >= baseline - self.feature_tolerance:
+                selected = columns
+                break
+        
+        self.feature_selection_report = {
+            'method': self.importance_method,
+            'tolerance': self.feature_tolerance,
+            'ranking': [self.feature_cols[i] for i in ranking],
+            'importance': {self.feature_cols[i]: float(importance[i]) for i in all_columns},
+            'holdout_accuracy_by_k': scores,
+            'selected': [self.feature_cols[i] for i in selected],
+        }
+        print(f"All {len(all_columns)} features: accuracy {baseline:.4f}")
+        print(f"Selected {len(selected)} features: {self.feature_selection_report['selected']}")
+        
+        if len(selected) == len(all_columns):
+            return self
+        
+        # Shrink the datasets and scaler; train_models fits on the pruned feature set
+        self.feature_cols = self.feature_selection_report['selected']
+        self.X_train = self.X_train[self.feature_cols]
+        self.X_test = self.X_test[self.feature_cols]
+        self.scaler = StandardScaler()
+        self.X_train_scaled = self.scaler.fit_transform(self.X_train)
+        self.X_test_scaled = self.scaler.transform(self.X_test)
+        
+        return self
+    
+    @profiled_stage
+    def train_models(self):
+        """Train every model on the full (feature-selected) training set"""
+        print("\n🤖 Training models on full training set...")
+        self.models = {name: make_model(name).fit(self.X_train_scaled, self.y_train) for name in MODELS}
         
         return self
     
+    @profiled_stage
     def optimize_best_model(self):
-        """Hyperparameter optimization using Optuna"""
+        """Hyperparameter optimization of XGBoost using Optuna"""
         print("\n🔍 Performing hyperparameter optimization...")
         
-        # Find best CV model
-        best_cv_model = max(self.cv_scores.items(), key=lambda x: x[1].mean())
-        print(f"Best CV model: {best_cv_model[0]} with accuracy: {best_cv_model[1].mean():.4f}")
-        
         def objective(trial):
             params = {
                 'n_estimators': trial.suggest_int('n_estimators', 100, 500),
@@ -365,58 +534,71 @@ class PredictiveMaintenanceML:
                 'random_state': 42,
                 'eval_metric': 'mlogloss'
             }
+            if not first_params:
+                first_params.update(params)
             
-            model = xgb.XGBClassifier(**params)
-            scores = cross_val_score(model, self.X_train_scaled, self.y_train, cv=3, scoring='accuracy')
+            scores = tuning_folds.cv_xgb(params)
             return scores.mean()
         
+        # Same 3 folds as cross_val_score(cv=3); matrices are built on the first trial only
+        tuning_folds = FoldMatrixCache(self.X_train_scaled, self.y_train, StratifiedKFold(n_splits=3))
+        first_params = {}
+        
         # Run optimization
         study = optuna.create_study(direction='maximize', sampler=optuna.samplers.TPESampler(seed=42))
-        study.optimize(objective, n_trials=50)
+        study.optimize(objective, n_trials=self.n_trials)
         
         print(f"Best trial accuracy: {study.best_value:.4f}")
         print(f"Best parameters: {study.best_params}")
         
+        # Share of tuning time spent building training matrices
+        if self.measure_baseline and first_params:
+            tuning_folds.measure_wrapper_path('xgb', first_params)
+        self.tuning_prep_report = tuning_folds.prep_report('xgb')
+        report = self.tuning_prep_report
+        print(f"Data preparation: {report['prep_seconds']:.2f}s of "
+              f"{report['prep_seconds'] + report['fit_seconds']:.2f}s tuning "
+              f"({report['prep_fraction_after']:.1%}); the sklearn wrappers would spend "
+              f"{report['prep_seconds_before']:.2f}s ({report['prep_fraction_before']:.1%}, "
+              f"{'measured on the first trial' if report['before_measured'] else 'estimated; --measure-baseline times it'})")
+        
         # Train optimized model
         best_xgb_model = xgb.XGBClassifier(**study.best_params)
         best_xgb_model.fit(self.X_train_scaled, self.y_train)
-        self.models['XGBoost_Optimized'] = best_xgb_model
+        self.tuned_model = best_xgb_model
         
         return self
     
+    def results_summary(self):
+        """Test-set metrics per model as a DataFrame"""
+        return pd.DataFrame(
+            {name: {metric: result[metric] for metric in METRIC_NAMES}
+             for name, result in self.test_results.items()}
+        ).T
+    
+    @profiled_stage
     def evaluate_models(self):
         """Evaluate all models on test set"""
         print("\n📊 Evaluating models on test set...")
         
-        for name, model in self.models.items():
-            # Predictions
-            y_pred = model.predict(self.X_test_scaled)
-            y_pred_proba = model.predict_proba(self.X_test_scaled)
-            
-            # Metrics
-            accuracy = accuracy_score(self.y_test, y_pred)
-            precision = precision_score(self.y_test, y_pred, average='weighted')
-            recall = recall_score(self.y_test, y_pred, average='weighted')
-            f1 = f1_score(self.y_test, y_pred, average='weighted')
-            
-            self.test_results[name] = {
-                'accuracy': accuracy,
-                'precision': precision,
-                'recall': recall,
-                'f1_score': f1,
-                'predictions': y_pred,
-                'probabilities': y_pred_proba
-            }
-            
+        # The tuned model competes with the ones train_models fitted
+        self.models = {**self.models, 'XGBoost_Optimized': self.tuned_model}
+        
+        # One predict_proba pass per model, all metrics from one confusion matrix
+        self.test_results = evaluate_models_concurrently(
+            self.models, self.X_test_scaled, self.y_test, len(self.le_failure.classes_),
+            chunk_size=self.eval_chunk_size
+        )
+        
+        for name, result in self.test_results.items():
             print(f"\n{name} Results:")
-            print(f"  Accuracy: {accuracy:.4f}")
-            print(f"  Precision: {precision:.4f}")
-            print(f"  Recall: {recall:.4f}")
-            print(f"  F1-Score: {f1:.4f}")
+            print(f"  Accuracy: {result['accuracy']:.4f}")
+            print(f"  Precision: {result['precision']:.4f}")
+            print(f"  Recall: {result['recall']:.4f}")
+            print(f"  F1-Score: {result['f1_score']:.4f}")
         
         # Results summary
-        results_df = pd.DataFrame(self.test_results).T
-        results_df = results_df.drop(['predictions', 'probabilities'], axis=1)
+        results_df = self.results_summary()
         
         print("\n" + "="*60)
         print("MODEL COMPARISON SUMMARY")
@@ -433,26 +615,15 @@ class PredictiveMaintenanceML:
         
         return self
     
+    @profiled_stage
     def create_visualizations(self):
         """Create evaluation visualizations"""
         print("\n📈 Creating evaluation visualizations...")
         
-        best_predictions = self.test_results[self.best_model_name]['predictions']
-        
-        # 1. Confusion Matrix
-        plt.figure(figsize=(10, 8))
-        cm = confusion_matrix(self.y_test, best_predictions)
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                    xticklabels=self.le_failure.classes_,
-                    yticklabels=self.le_failure.classes_)
-        plt.title(f'Confusion Matrix - {self.best_model_name}')
-        plt.xlabel('Predicted')
-        plt.ylabel('Actual')
-        plt.xticks(rotation=45, ha='right')
-        plt.yticks(rotation=0)
-        plt.tight_layout()
-        plt.savefig('visualizations/confusion_matrix.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        # 1. Confusion Matrix (computed once by evaluate_models)
+        cm = self.test_results[self.best_model_name]['confusion_matrix']
+        self.renderer.render('confusion_matrix', plot_confusion_matrix,
+                             cm, self.le_failure.classes_.tolist(), self.best_model_name)
         
         # 2. Feature importance
         if hasattr(self.best_model, 'feature_importances_'):
@@ -460,71 +631,40 @@ class PredictiveMaintenanceML:
                 'feature': self.feature_cols,
                 'importance': self.best_model.feature_importances_
             }).sort_values('importance', ascending=False)
-            
-            plt.figure(figsize=(12, 8))
-            sns.barplot(data=feature_importance.head(10), x='importance', y='feature')
-            plt.title(f'Top 10 Feature Importance - {self.best_model_name}')
-            plt.xlabel('Importance Score')
-            plt.tight_layout()
-            plt.savefig('visualizations/feature_importance.png', dpi=300, bbox_inches='tight')
-            plt.show()
+            self.renderer.render('feature_importance', plot_feature_importance,
+                                 feature_importance, self.best_model_name)
         
         # 3. Model comparison
-        results_df = pd.DataFrame(self.test_results).T.drop(['predictions', 'probabilities'], axis=1)
-        
-        fig, axes = plt.subplots(1, 2, figsize=(15, 6))
-        
-        # Accuracy comparison
-        model_names = list(results_df.index)
-        accuracies = results_df['accuracy'].values
-        
-        bars1 = axes[0].bar(model_names, accuracies, 
-                           color=['skyblue', 'lightgreen', 'lightcoral', 'gold'][:len(model_names)])
-        axes[0].set_title('Model Accuracy Comparison')
-        axes[0].set_ylabel('Accuracy')
-        axes[0].set_ylim(0.9, 1.0)
-        axes[0].tick_params(axis='x', rotation=45)
-        
-        for bar, acc in zip(bars1, accuracies):
-            axes[0].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.001,
-                        f'{acc:.4f}', ha='center', va='bottom')
-        
-        # F1-Score comparison
-        f1_scores = results_df['f1_score'].values
-        bars2 = axes[1].bar(model_names, f1_scores,
-                           color=['skyblue', 'lightgreen', 'lightcoral', 'gold'][:len(model_names)])
-        axes[1].set_title('Model F1-Score Comparison')
-        axes[1].set_ylabel('F1-Score')
-        axes[1].set_ylim(0.9, 1.0)
-        axes[1].tick_params(axis='x', rotation=45)
-        
-        for bar, f1 in zip(bars2, f1_scores):
-            axes[1].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.001,
-                        f'{f1:.4f}', ha='center', va='bottom')
-        
-        plt.tight_layout()
-        plt.savefig('visualizations/model_comparison.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        results_df = self.results_summary()
+        self.renderer.render('model_comparison', plot_model_comparison, results_df)
         
         return self
     
+    @profiled_stage
     def save_models_and_artifacts(self):
-        """Save trained models and preprocessing artifacts"""
+        """Save trained models and preprocessing artifacts into a new, not yet published version"""
         print("\n💾 Saving models and artifacts...")
         
+        # Nothing in use is overwritten: publish_model switches scorers over in one step
+        self.version, self.version_dir = create_version('models')
+        
         # Save the best model
-        model_filename = f'models/best_model_{self.best_model_name.lower().replace(" ", "_")}.pkl'
+        model_filename = os.path.join(self.version_dir, f'best_model_{self.best_model_name.lower().replace(" ", "_")}.pkl')
         joblib.dump(self.best_model, model_filename)
         print(f"✅ Best model saved: {model_filename}")
         
         # Save preprocessing components
-        joblib.dump(self.scaler, 'models/feature_scaler.pkl')
-        joblib.dump(self.le_type, 'models/label_encoder_type.pkl')
-        joblib.dump(self.le_failure, 'models/label_encoder_failure.pkl')
-        joblib.dump(self.feature_cols, 'models/feature_names.pkl')
+        joblib.dump(self.scaler, os.path.join(self.version_dir, 'feature_scaler.pkl'))
+        joblib.dump(self.le_type, os.path.join(self.version_dir, 'label_encoder_type.pkl'))
+        joblib.dump(self.le_failure, os.path.join(self.version_dir, 'label_encoder_failure.pkl'))
+        joblib.dump(self.feature_cols, os.path.join(self.version_dir, 'feature_names.pkl'))
+        
+        # Per-feature bins of the real training rows (before SMOTE) for drift monitoring
+        joblib.dump(build_reference(self.df_features, self.le_type.classes_),
+                    os.path.join(self.version_dir, REFERENCE_FILE))
         
         # Save model metadata
-        results_df = pd.DataFrame(self.test_results).T.drop(['predictions', 'probabilities'], axis=1)
+        results_df = self.results_summary()
         metadata = {
             'best_model_name': self.best_model_name,
             'accuracy': results_df.loc[self.best_model_name, 'accuracy'],
@@ -532,21 +672,51 @@ class PredictiveMaintenanceML:
             'recall': results_df.loc[self.best_model_name, 'recall'],
             'f1_score': results_df.loc[self.best_model_name, 'f1_score'],
             'feature_names': self.feature_cols,
+            'feature_selection': self.feature_selection_report,
             'target_classes': self.le_failure.classes_.tolist(),
             'training_date': datetime.now().isoformat(),
-            'dataset_shape': self.df.shape
+            'dataset_shape': self.df.shape,
+            'window_features': ({'window': self.window_features, 'max_bytes_per_machine': self.window_memory}
+                                if self.window_features else None),
+            'version': self.version
         }
         
-        joblib.dump(metadata, 'models/model_metadata.pkl')
-        print("✅ All artifacts saved successfully!")
+        joblib.dump(metadata, os.path.join(self.version_dir, 'model_metadata.pkl'))
+        print(f"✅ All artifacts saved successfully! (version {self.version}, not yet published)")
+        
+        return self
+    
+    @profiled_stage
+    def export_inference_backends(self):
+        """Export the best model to the faster runtimes, check their labels and rank them by batch size"""
+        if not self.backend_export or not hasattr(self.best_model, 'get_booster'):
+            return self
+        
+        print("\n🏎️ Exporting inference backends...")
+        model_file = os.path.join(self.version_dir, f'best_model_{self.best_model_name.lower().replace(" ", "_")}.pkl')
+        export_backends(self.best_model, self.version_dir, EXPORT_FORMATS)
+        self.backend_report = select_backends(self.best_model, self.X_test_scaled, self.version_dir,
+                                              model_file=model_file)
+        print_report(self.backend_report)
+        mismatched = [name for name, n in self.backend_report['label_mismatches'].items() if n]
+        if mismatched:
+            print(f"⚠️  Labels differ on the test set for {mismatched}; they will not be selected")
         
         return self
     
+    @profiled_stage
+    def publish_model(self):
+        """Make the saved version the current one (scorers watching models/CURRENT switch to it)"""
+        publish_version('models', self.version)
+        print(f"✅ Published model version {self.version} (roll back: python3 scripts/model_registry.py rollback)")
+        return self
+    
+    @profiled_stage
     def create_prediction_function(self):
-        """Create a standalone prediction function"""
+        """Create a standalone prediction function, saved with the version's artifacts"""
         print("\n🔮 Creating prediction function...")
         
-        def predict_failure(new_data, model_path='models/', return_probabilities=False):
+        def predict_failure(new_data, model_path='models/', return_probabilities=False, backend=None):
             """
             Predict machinery failure type for new data
             
@@ -554,12 +724,20 @@ class PredictiveMaintenanceML:
             new_data: pandas DataFrame with required features
             model_path: path to saved models
             return_probabilities: whether to return prediction probabilities
+            backend: inference backend to run the model (see scripts/inference_backends.py;
+                     default: the saved model's own predict_proba)
             
             Returns:
             predictions and optionally probabilities
             """
-            # Load components
-            model = joblib.load(f'{model_path}best_model_{self.best_model_name.lower().replace(" ", "_")}.pkl')
+            # Published versions: read the one models/CURRENT names
+            if os.path.exists(f'{model_path}CURRENT'):
+                with open(f'{model_path}CURRENT') as f:
+                    model_path = f'{model_path}versions/{f.read().strip()}/'
+            
+            # Load components (the best model's file is named in the version's metadata)
+            metadata = joblib.load(f'{model_path}model_metadata.pkl')
+            model = joblib.load(f'{model_path}best_model_{metadata["best_model_name"].lower().replace(" ", "_")}.pkl')
             scaler = joblib.load(f'{model_path}feature_scaler.pkl')
             le_failure = joblib.load(f'{model_path}label_encoder_failure.pkl')
             feature_names = joblib.load(f'{model_path}feature_names.pkl')
@@ -573,21 +751,22 @@ class PredictiveMaintenanceML:
             X_new = new_data[feature_names]
             X_new_scaled = scaler.transform(X_new)
             
-            # Make predictions
-            predictions_encoded = model.predict(X_new_scaled)
+            # Make predictions (one probability pass; labels are its argmax)
+            probabilities = (backend or model).predict_proba(X_new_scaled)
+            predictions_encoded = model.classes_[probabilities.argmax(axis=1)]
             predictions = le_failure.inverse_transform(predictions_encoded)
             
             if return_probabilities:
-                probabilities = model.predict_proba(X_new_scaled)
                 return predictions, probabilities
             
             return predictions
         
         # Save prediction function as a separate script instead of pickle
-        prediction_script = f'''import joblib
-import pandas as pd
+        prediction_script = f'''import os
 
-def predict_failure(new_data, model_path='models/', return_probabilities=False):
+import joblib
+
+def predict_failure(new_data, model_path='models/', return_probabilities=False, backend=None):
     """
     Predict machinery failure type for new data
     
@@ -595,12 +774,20 @@ def predict_failure(new_data, model_path='models/', return_probabilities=False):
     new_data: pandas DataFrame with required features
     model_path: path to saved models
     return_probabilities: whether to return prediction probabilities
+    backend: inference backend to run the model (see scripts/inference_backends.py;
+             default: the saved model's own predict_proba)
     
     Returns:
     predictions and optionally probabilities
     """
-    # Load components
-    model = joblib.load(f'{{model_path}}best_model_{self.best_model_name.lower().replace(" ", "_")}.pkl')
+    # Published versions: read the one models/CURRENT names
+    if os.path.exists(f'{{model_path}}CURRENT'):
+        with open(f'{{model_path}}CURRENT') as f:
+            model_path = f'{{model_path}}versions/{{f.read().strip()}}/'
+    
+    # Load components (the best model's file is named in the version's metadata)
+    metadata = joblib.load(f'{{model_path}}model_metadata.pkl')
+    model = joblib.load(f'{{model_path}}best_model_{{metadata["best_model_name"].lower().replace(" ", "_")}}.pkl')
     scaler = joblib.load(f'{{model_path}}feature_scaler.pkl')
     le_failure = joblib.load(f'{{model_path}}label_encoder_failure.pkl')
     feature_names = joblib.load(f'{{model_path}}feature_names.pkl')
@@ -614,44 +801,69 @@ def predict_failure(new_data, model_path='models/', return_probabilities=False):
     X_new = new_data[feature_names]
     X_new_scaled = scaler.transform(X_new)
     
-    # Make predictions
-    predictions_encoded = model.predict(X_new_scaled)
+    # Make predictions (one probability pass; labels are its argmax)
+    probabilities = (backend or model).predict_proba(X_new_scaled)
+    predictions_encoded = model.classes_[probabilities.argmax(axis=1)]
     predictions = le_failure.inverse_transform(predictions_encoded)
     
     if return_probabilities:
-        probabilities = model.predict_proba(X_new_scaled)
         return predictions, probabilities
     
     return predictions
 '''
         
-        with open('models/predict_failure.py', 'w') as f:
+        # Written into the staging directory, so it is published together with the model
+        script_path = os.path.join(self.version_dir, PREDICTION_SCRIPT)
+        with open(script_path, 'w') as f:
             f.write(prediction_script)
-        print("✅ Prediction function saved as script!")
+        print(f"✅ Prediction function saved as script: {script_path}")
         
         return predict_failure
     
+    @profiled_stage
+    def wait_for_figures(self):
+        """Collect figures still rendering in worker processes"""
+        self.renderer.close()
+        return self
+    
+    def save_run_report(self, path='models/run_report.json', error=None):
+        """Write the per-stage profile next to model_metadata.pkl"""
+        extra = {
+            'data_path': self.data_path,
+            'best_model_name': self.best_model_name,
+            'figures_rendered': self.renderer.rendered,
+            'figures_cached': self.renderer.skipped,
+        }
+        if self.feature_selection_report is not None:
+            extra['feature_selection'] = self.feature_selection_report
+        if self.backend_report is not None:
+            extra['inference_backends'] = {key: self.backend_report[key]
+                                           for key in ('label_mismatches', 'ranking')}
+        if getattr(self, 'tuning_prep_report', None) is not None:
+            extra['tuning_data_preparation'] = self.tuning_prep_report
+        if self.stage_graph.timings:
+            extra['stage_graph'] = self.stage_graph.report()
+        if error is not None:
+            extra['error'] = error
+        
+        self.profiler.save(path, **extra)
+        self.profiler.print_summary()
+        print(f"📄 Run report saved: {path}")
+        return self
+    
     def run_complete_pipeline(self):
         """Run the complete ML pipeline"""
         print("🚀 Starting Complete Predictive Maintenance ML Pipeline")
         print("=" * 80)
         
         try:
-            (self.load_data()
-             .preprocess_data()
-             .exploratory_data_analysis()
-             .feature_engineering()
-             .prepare_data_for_modeling()
-             .train_models()
-             .optimize_best_model()
-             .evaluate_models()
-             .create_visualizations()
-             .save_models_and_artifacts())
-            
-            predict_func = self.create_prediction_function()
+            # Every stage starts as soon as the stages it depends on are done (see PIPELINE_STAGES)
+            self.stage_graph.run(lambda name: getattr(self, name)(), max_workers=self.stage_workers)
+            print_stage_report(self.stage_graph.report())
+            self.save_run_report()
             
             # Final summary
-            results_df = pd.DataFrame(self.test_results).T.drop(['predictions', 'probabilities'], axis=1)
+            results_df = self.results_summary()
             best_accuracy = results_df.loc[self.best_model_name, 'accuracy']
             
             print("\n" + "=" * 80)
@@ -681,20 +893,85 @@ def predict_failure(new_data, model_path='models/', return_probabilities=False):
             
         except Exception as e:
             print(f"\n❌ Pipeline failed with error: {str(e)}")
+            if self.version is not None and self.version_dir is not None and os.path.isdir(self.version_dir):
+                # Saved but never published: the version in use stays current
+                discard_version('models', self.version)
+            self.save_run_report(error=str(e))
             raise
 
-def main():
+def parse_args(argv=None):
+    """Command-line options for the pipeline run"""
+    parser = argparse.ArgumentParser(description='Predictive maintenance training pipeline')
+    parser.add_argument('--data', default='data/predictive_maintenance.csv',
+                        help='input CSV (default: %(default)s)')
+    parser.add_argument('--headless', action='store_true',
+                        help='render figures in background worker processes without plt.show()')
+    parser.add_argument('--plot-dpi', type=int, default=300,
+                        help='resolution of saved figures (default: %(default)s)')
+    parser.add_argument('--plot-format', default='png', choices=['png', 'svg', 'pdf', 'jpg'],
+                        help='file format of saved figures (default: %(default)s)')
+    parser.add_argument('--plot-workers', type=int, default=None,
+                        help='worker processes for headless rendering (default: CPU count)')
+    parser.add_argument('--max-scatter-points', type=int, default=20000,
+                        help='stratified sample size for the 3D scatter (default: %(default)s)')
+    parser.add_argument('--no-plot-cache', action='store_true',
+                        help='redraw every figure even if its input data is unchanged')
+    parser.add_argument('--n-trials', type=int, default=50,
+                        help='Optuna trials for hyperparameter optimization (default: %(default)s)')
+    parser.add_argument('--measure-baseline', action='store_true',
+                        help='time sklearn-wrapper CV fits of the first trial to measure the data '
+                             'preparation the fold cache saves (default: estimate it)')
+    parser.add_argument('--no-feature-selection', action='store_true',
+                        help='keep all engineered features instead of pruning by importance')
+    parser.add_argument('--feature-tolerance', type=float, default=0.002,
+                        help='accuracy the pruned feature set may lose (default: %(default)s)')
+    parser.add_argument('--importance', choices=['gain', 'permutation'], default='gain',
+                        help='feature ranking used for pruning (default: %(default)s)')
+    parser.add_argument('--eval-chunk-size', type=int, default=None,
+                        help='rows per predict_proba call when evaluating (default: whole test set)')
+    parser.add_argument('--export-backends', action='store_true',
+                        help='export the best model for the booster/ONNX/Treelite runtimes and benchmark them')
+    parser.add_argument('--window-features', type=int, metavar='N', default=None,
+                        help='add rolling features over each machine\'s last N readings '
+                             '(needs a history with repeated Product IDs, e.g. from telemetry_simulator.py)')
+    parser.add_argument('--window-memory', type=int, default=DEFAULT_MAX_BYTES_PER_MACHINE,
+                        help='bytes of window state allowed per machine (default: %(default)s)')
+    parser.add_argument('--stage-workers', type=int, default=None,
+                        help='pipeline stages run concurrently (default: up to 4 CPUs with --headless, '
+                             'otherwise 1)')
+    parser.add_argument('--flamegraphs', metavar='DIR', default=None,
+                        help='sample call stacks and save a flamegraph per stage into DIR')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
+    
     # Initialize and run pipeline
-    pipeline = PredictiveMaintenanceML('data/predictive_maintenance.csv')
+    pipeline = PredictiveMaintenanceML(args.data, headless=args.headless,
+                                       plot_dpi=args.plot_dpi, plot_format=args.plot_format,
+                                       plot_workers=args.plot_workers,
+                                       max_scatter_points=args.max_scatter_points,
+                                       plot_cache=not args.no_plot_cache,
+                                       flamegraph_dir=args.flamegraphs,
+                                       n_trials=args.n_trials,
+                                       feature_selection=not args.no_feature_selection,
+                                       feature_tolerance=args.feature_tolerance,
+                                       importance_method=args.importance,
+                                       eval_chunk_size=args.eval_chunk_size,
+                                       backend_export=args.export_backends,
+                                       window_features=args.window_features,
+                                       window_memory=args.window_memory,
+                                       stage_workers=args.stage_workers,
+                                       measure_baseline=args.measure_baseline)
     pipeline.run_complete_pipeline()
     
     # Test the saved model
     print("\n🧪 Testing saved model with sample predictions...")
     
-    # Load prediction function and test
+    # Load the prediction function of the version just published and test
     import sys
-    sys.path.append('models')
+    sys.path.insert(0, resolve_model_dir('models'))
     from predict_failure import predict_failure
     predict_func = predict_failure
     
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Remote Scoring Self-Check
+=========================
+
+Runs scoring_client.WMLClient against scripts/mock_wml_server.py with
+injected faults and checks that the client's resilience features behave
+as documented:
+
+- retries: with --error-rate 0.5, failed attempts are retried and the calls succeed
+- deadline: with every response slower than the deadline, DeadlineExceeded is raised in time
+- breaker: with --error-rate 1, the circuit opens, rejects calls, goes
+  half-open after its reset timeout and closes on a successful trial call
+- hedging: with --slow-rate 0.5, duplicate requests win over slow ones
+- IAM outage: token requests answered with 503 are retried and open the circuit
+- tokens: with a 2 s --token-ttl, the token is refreshed in the background
+  (a bounded number of fetches, none on the request path, no expired token
+  sent) and the predictions reuse their keep-alive connection (GET /stats)
+
+Every check starts its own mock server in a subprocess, on a free port.
+
+Usage:
+    python3 scripts/remote_scoring_check.py
+    python3 scripts/cli.py bench remote --checks breaker hedging
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from scoring_client import CircuitBreaker, CircuitOpenError, DeadlineExceeded, RemoteUnavailable, WMLClient
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+READING = ['L', 300.5, 310.2, 1500.0, 45.3, 120.0]
+
+# Seconds allowed for the mock server to load the model and start listening
+STARTUP_TIMEOUT = 60
+
+
+class CheckFailed(Exception):
+    """A self-check found behaviour that differs from the documented one"""
+
+
+def expect(condition, message):
+    if not condition:
+        raise CheckFailed(message)
+
+
+class MockServer:
+    """
+    mock_wml_server.py running in a subprocess on a free port
+
+    Parameters:
+    model_path: artifacts the server scores with
+    args: extra mock_wml_server.py options, e.g. ['--error-rate', '0.5']
+    """
+
+    def __init__(self, model_path, *args):
+        self.process = subprocess.Popen(
+            [sys.executable, '-u', os.path.join(SCRIPTS_DIR, 'mock_wml_server.py'), '--port', '0',
+             '--model-path', model_path, *args],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        output = []
+        while time.monotonic() < deadline:
+            line = self.process.stdout.readline()
+            if not line:
+                break
+            output.append(line)
+            match = re.search(r'server on (http://\S+)', line)
+            if match:
+                self.url = match.group(1)
+                return
+        self.close()
+        raise CheckFailed(f"mock server did not start:\n{''.join(output)[-2000:]}")
+
+    @property
+    def endpoint(self):
+        return f'{self.url}/ml/v4/deployments/local/predictions'
+
+    @property
+    def iam_url(self):
+        return f'{self.url}/identity/token'
+
+    def client(self, **kwargs):
+        return WMLClient(self.endpoint, api_key='self-check', iam_url=self.iam_url, **kwargs)
+
+    def stats(self):
+        with urllib.request.urlopen(f'{self.url}/stats') as response:
+            return json.load(response)
+
+    def set_faults(self, **faults):
+        request = urllib.request.Request(f'{self.url}/faults', data=json.dumps(faults).encode(), method='POST')
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _predict_many(client, n):
+    """(successes, {error type: count}) of n predictions"""
+    successes, errors = 0, {}
+    for _ in range(n):
+        try:
+            client.predict_one(READING)
+            successes += 1
+        except RemoteUnavailable as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+    return successes, errors
+
+
+def check_retries(model_path):
+    with MockServer(model_path, '--error-rate', '0.5', '--seed', '1') as server:
+        client = server.client(timeout=5.0, retries=4, backoff=0.01)
+        successes, errors = _predict_many(client, 20)
+        client.close()
+        injected = server.stats()['injected_errors']
+    expect(injected > 0, "the server injected no errors")
+    expect(client.stats['retries'] > 0, "no attempt was retried")
+    expect(successes >= 16, f"only {successes}/20 predictions succeeded ({errors})")
+    return f"{injected} injected 503s, {client.stats['retries']} retries, {successes}/20 succeeded"
+
+
+def check_deadline(model_path):
+    with MockServer(model_path, '--slow-rate', '1', '--slow-latency', '2') as server:
+        client = server.client(timeout=0.3, deadline=0.8, retries=5, backoff=0.01)
+        client.warm_up()
+        start = time.perf_counter()
+        try:
+            client.predict_one(READING)
+            raised = None
+        except RemoteUnavailable as e:
+            raised = e
+        elapsed = time.perf_counter() - start
+        client.close()
+    expect(isinstance(raised, DeadlineExceeded), f"expected DeadlineExceeded, got {raised!r}")
+    expect(elapsed < 0.8 + 0.3, f"gave up after {elapsed:.2f}s, past the 0.8s deadline")
+    expect(client.stats['attempts'] >= 2, "the deadline left room for only one attempt")
+    return f"DeadlineExceeded after {elapsed:.2f}s and {client.stats['attempts']} attempts"
+
+
+def check_breaker(model_path):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.5)
+    with MockServer(model_path, '--error-rate', '1') as server:
+        client = server.client(timeout=5.0, retries=0, breaker=breaker)
+        successes, errors = _predict_many(client, 3)
+        expect(successes == 0 and breaker.state == breaker.OPEN,
+               f"circuit {breaker.state} after 3 failures ({errors})")
+        try:
+            client.predict_one(READING)
+            raise CheckFailed("an open circuit let a call through")
+        except CircuitOpenError:
+            pass
+        sent = server.stats()['prediction_requests'] + server.stats()['injected_errors']
+        expect(sent == 3, f"the server saw {sent} requests instead of 3")
+
+        time.sleep(breaker.reset_timeout + 0.1)
+        expect(breaker.state == breaker.HALF_OPEN, f"circuit {breaker.state} after the reset timeout")
+        _predict_many(client, 1)  # failing trial call
+        expect(breaker.state == breaker.OPEN and breaker.times_opened == 2,
+               f"circuit {breaker.state} after a failed trial call")
+
+        server.set_faults(error_rate=0.0)
+        time.sleep(breaker.reset_timeout + 0.1)
+        successes, errors = _predict_many(client, 1)
+        client.close()
+    expect(successes == 1 and breaker.state == breaker.CLOSED,
+           f"circuit {breaker.state} after a successful trial call ({errors})")
+    return (f"opened after 3 failures, rejected {client.stats['short_circuited']} call(s), "
+            f"half-open after {breaker.reset_timeout:g}s, closed on recovery")
+
+
+def check_hedging(model_path):
+    with MockServer(model_path, '--slow-rate', '0.5', '--slow-latency', '1', '--seed', '2') as server:
+        client = server.client(timeout=5.0, hedge_after=0.1)
+        client.warm_up()
+        start = time.perf_counter()
+        successes, errors = _predict_many(client, 30)
+        elapsed = time.perf_counter() - start
+        client.close()
+        delayed = server.stats()['injected_delays']
+    expect(successes == 30, f"only {successes}/30 predictions succeeded ({errors})")
+    expect(client.stats['hedges'] > 0, "no slow request was hedged")
+    expect(client.stats['hedge_wins'] > 0, "no hedged duplicate answered first")
+    return (f"{delayed} delayed responses, {client.stats['hedges']} hedges, "
+            f"{client.stats['hedge_wins']} won; 30 calls in {elapsed:.1f}s")
+
+
+def check_iam_outage(model_path):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    with MockServer(model_path, '--token-error-rate', '1') as server:
+        client = server.client(timeout=5.0, retries=1, backoff=0.01, breaker=breaker)
+        successes, errors = _predict_many(client, 4)
+        client.close()
+        token_errors = server.stats()['injected_token_errors']
+    expect(successes == 0, "a prediction succeeded without a token")
+    expect(client.stats['retries'] == 3, f"{client.stats['retries']} retries of 3 token failures, expected 3")
+    expect(breaker.state == breaker.OPEN and errors.get('CircuitOpenError') == 1,
+           f"circuit {breaker.state} after 3 token failures ({errors})")
+    return f"{token_errors} token 503s retried, circuit opened after 3 calls ({errors})"
+
+
+def check_tokens(model_path, ttl=2, seconds=5.0):
+    with MockServer(model_path, '--token-ttl', str(ttl)) as server:
+        client = server.client(timeout=5.0)
+        fetch_threads = []
+        request_token = client.tokens._request_token
+
+        def recording_request_token():
+            fetch_threads.append(threading.current_thread().name)
+            return request_token()
+
+        client.tokens._request_token = recording_request_token
+        predictions = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            client.predict_one(READING)
+            predictions += 1
+        client.close()
+        stats = server.stats()
+    connections = stats['connections'] - 1  # the GET /stats itself
+
+    # One fetch up front, then one refresh per 4/5 of the lifetime
+    max_fetches = 2 + int(seconds / (0.8 * ttl))
+    expect(stats['token_requests'] >= 3, f"{stats['token_requests']} token fetches: the token was not refreshed")
+    expect(stats['token_requests'] <= max_fetches,
+           f"{stats['token_requests']} token fetches in {seconds:g}s, at most {max_fetches} expected")
+    on_request_path = [name for name in fetch_threads[1:] if name != 'wml-token-refresh']
+    expect(not on_request_path, f"{len(on_request_path)} refreshes ran on the request path")
+    expect(stats['unauthorized'] == 0, f"{stats['unauthorized']} predictions were sent with an expired token")
+    # The refresher may need a second pooled connection while a prediction is in flight
+    expect(connections <= 2, f"{connections} TCP connections for {predictions} predictions")
+    return (f"{predictions} predictions in {seconds:g}s with a {ttl}s token: {stats['token_requests']} fetches "
+            f"(all refreshes in the background), {connections} connection(s)")
+
+
+CHECKS = {
+    'retries': check_retries,
+    'deadline': check_deadline,
+    'breaker': check_breaker,
+    'hedging': check_hedging,
+    'iam-outage': check_iam_outage,
+    'tokens': check_tokens,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check WMLClient against the fault-injecting mock server')
+    parser.add_argument('--model-path', default='models', help='artifacts the mock server scores with '
+                                                               '(default: %(default)s)')
+    parser.add_argument('--checks', nargs='+', choices=list(CHECKS), default=list(CHECKS),
+                        help='checks to run (default: all)')
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'Check':<14}  Result")
+    for name in args.checks:
+        try:
+            result = f"ok: {CHECKS[name](args.model_path)}"
+        except CheckFailed as e:
+            failed = True
+            result = f"FAILED: {e}"
+        print(f"{name:<14}  {result}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Pipeline Run Profiler
+=====================
+
+Per-stage instrumentation for PredictiveMaintenanceML: wall time, CPU time,
+peak RSS and row/feature counts in and out of every stage, collected into a
+machine-readable run report.
+
+Stages may run concurrently (see stage_graph.py). A stage that ran alone
+is charged the CPU time of the whole process, including the native worker
+threads it starts (OpenMP in XGBoost/LightGBM, joblib threads). A stage
+that overlapped another one is marked as overlapped and charged only the
+CPU time of the thread running it (time.thread_time), without its native
+workers; the report keeps both figures (process_cpu_seconds,
+thread_cpu_seconds) and names the one used in cpu_scope. RSS can only be
+measured for the whole process, so overlapped stages share their peak.
+
+An opt-in sampling profiler records the call stacks of the thread running
+each stage and writes them as folded stacks (flamegraph.pl / speedscope
+input) plus a self-contained SVG flamegraph per stage.
+"""
+
+import functools
+import html
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # optional, /proc or getrusage are used instead
+    psutil = None
+
+REPORT_VERSION = 1
+
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the lifetime peak (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _MemorySampler(threading.Thread):
+    """Background thread tracking the peak RSS while a stage runs"""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss())
+        return self.peak
+
+
+class _StackSampler(threading.Thread):
+    """Sampling profiler collecting folded call stacks of one thread"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+def write_flamegraph_svg(stacks, path, title, width=1200, row_height=16):
+    """Render folded stacks as a static SVG flamegraph (hover a frame for details)"""
+    root = {'name': 'all', 'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['count'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'name': name, 'count': 0, 'children': {}})
+            node['count'] += count
+
+    rects = []
+    max_depth = 0
+
+    def layout(node, x, depth):
+        nonlocal max_depth
+        max_depth = max(max_depth, depth)
+        rects.append((node, x, depth))
+        for child in sorted(node['children'].values(), key=lambda n: n['name']):
+            layout(child, x, depth + 1)
+            x += child['count']
+
+    layout(root, 0, 0)
+
+    total = max(root['count'], 1)
+    scale = width / total
+    height = (max_depth + 1) * row_height + 30
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="16" font-size="13">{html.escape(title)} ({root["count"]} samples)</text>',
+    ]
+    for node, x, depth in rects:
+        w = node['count'] * scale
+        if w < 0.5:
+            continue
+        y = height - (depth + 1) * row_height
+        hue = 20 + (zlib.crc32(node['name'].encode()) % 40)
+        label = html.escape(node['name'])
+        pct = 100.0 * node['count'] / total
+        parts.append(
+            f'<g><title>{label} ({node["count"]} samples, {pct:.1f}%)</title>'
+            f'<rect x="{x * scale:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>'
+        )
+        if w > 40:
+            max_chars = int(w / 7)
+            text = label if len(label) <= max_chars else label[:max(max_chars - 2, 0)] + '..'
+            parts.append(f'<text x="{x * scale + 3:.1f}" y="{y + row_height - 4}">{text}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(parts))
+
+
+class StageProfiler:
+    """
+    Collect per-stage resource usage for a pipeline run
+
+    Parameters:
+    flamegraph_dir: directory for per-stage flamegraphs (None disables the sampling profiler)
+    memory_interval: seconds between RSS samples
+    sample_interval: seconds between stack samples when flamegraphs are enabled
+    """
+
+    def __init__(self, flamegraph_dir=None, memory_interval=0.01, sample_interval=0.005):
+        self.flamegraph_dir = flamegraph_dir
+        self.memory_interval = memory_interval
+        self.sample_interval = sample_interval
+        self.stages = []
+        self._running = []  # records of the stages in progress
+        self._lock = threading.Lock()
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+        if flamegraph_dir:
+            os.makedirs(flamegraph_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name, shape_fn=None):
+        """
+        Measure one stage
+
+        shape_fn: optional callable returning (rows, features) of the data
+                  the stage works on; it is called on entry and on exit
+        """
+        record = {'stage': name, 'overlapped': False}
+        with self._lock:
+            for other in self._running:
+                other['overlapped'] = record['overlapped'] = True
+            self._running.append(record)
+        if shape_fn is not None:
+            record['rows_in'], record['features_in'] = shape_fn()
+
+        memory = _MemorySampler(self.memory_interval)
+        memory.start()
+        stacks = None
+        if self.flamegraph_dir:
+            stacks = _StackSampler(threading.get_ident(), self.sample_interval)
+            stacks.start()
+
+        rss_before = current_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        process_cpu_start = time.process_time()
+        try:
+            yield record
+            record['status'] = 'ok'
+        except Exception as e:
+            record['status'] = f'failed: {e}'
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['thread_cpu_seconds'] = time.thread_time() - cpu_start
+            record['process_cpu_seconds'] = time.process_time() - process_cpu_start
+            record['rss_before_mb'] = rss_before / 2**20
+            record['peak_rss_mb'] = memory.stop() / 2**20
+            if shape_fn is not None:
+                record['rows_out'], record['features_out'] = shape_fn()
+            if stacks is not None:
+                record['flamegraph'] = self._write_flamegraph(name, stacks.stop())
+            with self._lock:
+                self._running.remove(record)
+                # Other stages' CPU is in the process time only if they ran at the same time
+                record['cpu_scope'] = 'thread' if record['overlapped'] else 'process'
+                record['cpu_seconds'] = record[f"{record['cpu_scope']}_cpu_seconds"]
+                self.stages.append(record)
+
+    def _write_flamegraph(self, name, stacks):
+        base = os.path.join(self.flamegraph_dir, name)
+        with open(f'{base}.folded', 'w') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f'{stack} {count}\n')
+        write_flamegraph_svg(stacks, f'{base}.svg', title=name)
+        return f'{base}.svg'
+
+    def report(self, **extra):
+        """Run report as a JSON-serialisable dict"""
+        return {
+            'report_version': REPORT_VERSION,
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(),
+            'total_wall_seconds': time.perf_counter() - self._start,
+            'total_cpu_seconds': time.process_time() - self._cpu_start,
+            'peak_rss_mb': max((s['peak_rss_mb'] for s in self.stages), default=0.0),
+            'stage_rss_scope': 'process',
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'stages': self.stages,
+            **extra,
+        }
+
+    def save(self, path, **extra):
+        """Write the run report as JSON"""
+        report = self.report(**extra)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return report
+
+    def print_summary(self):
+        """Print a per-stage table (~: the stage overlapped another one, see the module docstring)"""
+        print(f"\n{'Stage':<28}{'Wall s':>9}{'CPU s':>10}{'Peak MB':>10}{'Rows in':>10}{'Rows out':>10}")
+        for s in self.stages:
+            mark = '~' if s.get('overlapped') else ' '
+            print(f"{s['stage']:<28}{s['wall_seconds']:>9.2f}{s['cpu_seconds']:>9.2f}{mark}"
+                  f"{s['peak_rss_mb']:>9.1f}{mark}{s.get('rows_in', ''):>10}{s.get('rows_out', ''):>10}")
+        print("CPU s: whole process while the stage ran (native worker threads included)")
+        if any(s.get('overlapped') for s in self.stages):
+            print("~ overlapped another stage: CPU s is the stage's own thread only (no native worker "
+                  "threads) and Peak MB is shared")
+
+
+def profiled_stage(method):
+    """Run a PredictiveMaintenanceML stage under the instance's profiler, if it has one"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = getattr(self, 'profiler', None)
+        if profiler is None:
+            return method(self, *args, **kwargs)
+        with profiler.stage(method.__name__, shape_fn=self.data_shape):
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,476 @@
+"""
+Remote Scoring Client
+=====================
+
+Client for the IBM Watson ML deployment used by app.py (or any server with
+the same API, such as scripts/mock_wml_server.py).
+
+- One pooled keep-alive requests.Session per client, so repeated predictions
+  reuse the TCP/TLS connection instead of handshaking on every call.
+- TokenProvider fetches the IAM bearer token once and refreshes it in a
+  background thread before its `expires_in` runs out, so predictions never
+  wait for a token round trip after the first one.
+- Every prediction has a deadline covering all of its attempts. Transient
+  failures (connection errors, timeouts, 429 and 5xx responses, from the
+  scoring or the IAM endpoint) are retried with jittered exponential
+  backoff; scoring has no side effects, so retries are safe.
+- A CircuitBreaker stops calling an unhealthy deployment for a while after
+  consecutive failures, so callers fail fast (and can fall back to the local
+  model) instead of waiting out the deadline on every request.
+- Optional hedging sends a second copy of a request that has not answered
+  within `hedge_after` seconds and uses whichever answers first, trimming
+  tail latency at the cost of a little extra load.
+
+Endpoints come from the arguments or the WML_ENDPOINT_URL, WML_API_KEY and
+WML_IAM_URL environment variables, so a local stand-in server can be used.
+
+Usage (against the mock server):
+    python3 scripts/mock_wml_server.py --port 8000 &
+    python3 scripts/scoring_client.py --endpoint http://127.0.0.1:8000/ml/v4/deployments/local/predictions \\
+        --iam-url http://127.0.0.1:8000/identity/token --api-key test --requests 50
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+IAM_URL = "https://iam.cloud.ibm.com/identity/token"
+
+# Column order of the WML scoring payload (same as the training CSV)
+WML_FIELDS = ["Type", "Air temperature [K]", "Process temperature [K]", "Rotational speed [rpm]",
+              "Torque [Nm]", "Tool wear [min]"]
+
+# Refresh this long before expiry (capped at a fifth of the token lifetime)
+REFRESH_MARGIN = 300
+
+# A token this close to expiry is treated as expired (capped at a tenth of its lifetime)
+EXPIRY_SKEW = 30
+
+# HTTP statuses worth retrying: throttling and server-side failures
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RemoteUnavailable(RuntimeError):
+    """The deployment could not answer: retries exhausted, deadline passed or circuit open"""
+
+
+class DeadlineExceeded(RemoteUnavailable):
+    """The prediction's deadline passed before any attempt succeeded"""
+
+
+class CircuitOpenError(RemoteUnavailable):
+    """The circuit breaker is open; the deployment is not being called"""
+
+
+class TokenUnavailable(RemoteUnavailable):
+    """The IAM endpoint refused or garbled the token request (not worth retrying)"""
+
+
+class _RetryableResponse(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code} from {response.url}")
+        self.response = response
+
+
+def build_payload(rows):
+    """WML scoring payload for a list of [Type, air, process, rpm, torque, wear] rows"""
+    return {"input_data": [{"fields": WML_FIELDS, "values": [list(row) for row in rows]}]}
+
+
+class TokenProvider:
+    """
+    IAM bearer token with proactive background refresh
+
+    Parameters:
+    api_key: IBM Cloud API key
+    iam_url: IAM token endpoint
+    session: requests.Session to use (default: a new one)
+    refresh_margin: seconds before expiry at which the token is refreshed
+    timeout: seconds allowed for a token request
+    """
+
+    def __init__(self, api_key, iam_url=IAM_URL, session=None, refresh_margin=REFRESH_MARGIN,
+                 timeout=10.0):
+        self.api_key = api_key
+        self.iam_url = iam_url
+        self.session = session or requests.Session()
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+
+        self.refreshes = 0
+        self.last_error = None
+        self._token = None
+        self._issued_at = 0.0
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def token(self):
+        """Current token; only blocks when there is no valid token yet"""
+        with self._lock:
+            if self._token is None or time.time() >= self._usable_until():
+                self._fetch_locked()
+            token = self._token
+        self._ensure_refresher()
+        return token
+
+    def invalidate(self):
+        """Drop the current token (e.g. after a 401) so the next call fetches a new one"""
+        with self._lock:
+            self._token = None
+
+    def _request_token(self):
+        response = self.session.post(
+            self.iam_url,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": self.api_key},
+            timeout=self.timeout,
+        )
+        if response.status_code in RETRYABLE_STATUSES:
+            raise _RetryableResponse(response)
+        response.raise_for_status()
+        body = response.json()
+        return body["access_token"], float(body.get("expires_in", 3600))
+
+    def _store(self, token, expires_in):
+        now = time.time()
+        self._token = token
+        self._issued_at = now
+        self._expires_at = now + expires_in
+        self.refreshes += 1
+
+    def _fetch_locked(self):
+        self._store(*self._request_token())
+
+    def _usable_until(self):
+        lifetime = self._expires_at - self._issued_at
+        return self._expires_at - min(EXPIRY_SKEW, lifetime / 10)
+
+    def _refresh_at(self):
+        lifetime = self._expires_at - self._issued_at
+        return self._expires_at - min(self.refresh_margin, lifetime / 5)
+
+    def _ensure_refresher(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._refresh_loop, daemon=True,
+                                                    name='wml-token-refresh')
+                    self._thread.start()
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                wait = self._refresh_at() - time.time()
+            if self._stop_event.wait(max(wait, 0)):
+                return
+            try:
+                # Requests keep using the old token while the new one is fetched
+                token, expires_in = self._request_token()
+                with self._lock:
+                    self._store(token, expires_in)
+                self.last_error = None
+            except (requests.RequestException, _RetryableResponse, KeyError, ValueError) as e:
+                # Keep the old token while it is valid and retry shortly
+                self.last_error = str(e)
+                with self._lock:
+                    remaining = self._expires_at - time.time()
+                self._stop_event.wait(min(30.0, max(remaining / 2, 1.0)))
+
+    def close(self):
+        self._stop_event.set()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Closed: calls go through. After `failure_threshold` failed calls in a row
+    it opens and rejects calls for `reset_timeout` seconds. Then it lets one
+    trial call through (half-open): success closes it, failure re-opens it.
+
+    Parameters:
+    failure_threshold: consecutive failures that open the circuit
+    reset_timeout: seconds the circuit stays open before a trial call
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a call may go out now (in half-open state, only one trial call)"""
+        with self._lock:
+            state = self._state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class WMLClient:
+    """
+    Pooled, authenticated client for a WML online deployment
+
+    Parameters:
+    endpoint_url: deployment predictions URL
+    api_key: IBM Cloud API key (None for an unauthenticated local server)
+    iam_url: IAM token endpoint
+    timeout: seconds allowed for one HTTP attempt
+    pool_size: keep-alive connections kept per host
+    deadline: seconds allowed for a prediction including retries (default: timeout x (retries + 1))
+    retries: extra attempts after a transient failure
+    backoff: base delay in seconds; attempt n waits a random time up to backoff x 2**n
+    max_backoff: cap on one backoff delay
+    breaker: CircuitBreaker shared by all calls (None to disable)
+    hedge_after: seconds after which a slow attempt is duplicated (None to disable hedging)
+    """
+
+    def __init__(self, endpoint_url, api_key=None, iam_url=IAM_URL, timeout=10.0, pool_size=10,
+                 refresh_margin=REFRESH_MARGIN, deadline=None, retries=2, backoff=0.1, max_backoff=2.0,
+                 breaker=None, hedge_after=None):
+        self.endpoint_url = endpoint_url
+        self.timeout = timeout
+        self.deadline = deadline if deadline is not None else timeout * (retries + 1)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker
+        self.hedge_after = hedge_after
+        self.stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0,
+                      'failures': 0, 'short_circuited': 0}
+        self._stats_lock = threading.Lock()
+        self._hedge_pool = (ThreadPoolExecutor(max_workers=2 * pool_size, thread_name_prefix='wml-hedge')
+                            if hedge_after is not None else None)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.tokens = (TokenProvider(api_key, iam_url, session=self.session,
+                                     refresh_margin=refresh_margin, timeout=timeout)
+                       if api_key else None)
+
+    @classmethod
+    def from_env(cls, endpoint_url=None, api_key=None, iam_url=None, **kwargs):
+        """Client configured from arguments, falling back to the WML_* environment variables"""
+        return cls(endpoint_url or os.environ["WML_ENDPOINT_URL"],
+                   api_key=api_key or os.environ.get("WML_API_KEY"),
+                   iam_url=iam_url or os.environ.get("WML_IAM_URL", IAM_URL), **kwargs)
+
+    def warm_up(self):
+        """Fetch the token ahead of the first prediction"""
+        if self.tokens is not None:
+            self.tokens.token()
+        return self
+
+    def _headers(self):
+        """Request headers; token failures other than transient ones raise TokenUnavailable"""
+        headers = {'Content-Type': 'application/json'}
+        if self.tokens is not None:
+            try:
+                headers['Authorization'] = f'Bearer {self.tokens.token()}'
+            except (requests.HTTPError, KeyError, ValueError) as e:
+                raise TokenUnavailable(f"no token from {self.tokens.iam_url}: {e}") from e
+        return headers
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _attempt(self, payload, timeout):
+        """One scoring request (re-authenticating once on a 401); raises on retryable failures"""
+        self._count('attempts')
+        response = self.session.post(self.endpoint_url, headers=self._headers(), json=payload,
+                                     timeout=timeout)
+        if response.status_code == 401 and self.tokens is not None:
+            # Token revoked or expired early: fetch a new one and retry once
+            self.tokens.invalidate()
+            response = self.session.post(self.endpoint_url, headers=self._headers(), json=payload,
+                                         timeout=timeout)
+        if response.status_code in RETRYABLE_STATUSES:
+            raise _RetryableResponse(response)
+        # Other client errors (bad input) are the caller's problem: no retry
+        response.raise_for_status()
+        return response.json()['predictions'][0]['values']
+
+    def _hedged_attempt(self, payload, timeout):
+        """_attempt, plus a duplicate request if the first has not answered after hedge_after"""
+        first = self._hedge_pool.submit(self._attempt, payload, timeout)
+        done, _ = wait([first], timeout=min(self.hedge_after, timeout))
+        if done:
+            return first.result()
+        self._count('hedges')
+        second = self._hedge_pool.submit(self._attempt, payload, max(timeout - self.hedge_after, 0.001))
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def predict(self, rows, deadline=None):
+        """
+        Score raw reading rows
+
+        Transient failures are retried with jittered exponential backoff until
+        the deadline (seconds, default: the client's) runs out.
+
+        Returns:
+        the deployment's `values` rows, one per input row ([prediction, ...])
+
+        Raises:
+        RemoteUnavailable (DeadlineExceeded, CircuitOpenError) when no attempt succeeded
+        """
+        self._count('calls')
+        if self.breaker is not None and not self.breaker.allow():
+            self._count('short_circuited')
+            raise CircuitOpenError(f"circuit open after {self.breaker.failures} consecutive failures; "
+                                   f"retrying the deployment in up to {self.breaker.reset_timeout:.0f}s")
+
+        payload = build_payload(rows)
+        send = self._hedged_attempt if self.hedge_after is not None else self._attempt
+        expires = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._count('retries')
+            try:
+                values = send(payload, min(self.timeout, remaining))
+            except (requests.ConnectionError, requests.Timeout, _RetryableResponse) as e:
+                last_error = e
+            except TokenUnavailable:
+                self._count('failures')
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                raise
+            except Exception:
+                # A client error from the scoring endpoint (e.g. a 400) is not a sign of an
+                # unhealthy deployment; leave the breaker alone
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                raise
+            else:
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                return values
+            if attempt < self.retries:
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                time.sleep(max(0.0, min(delay, expires - time.monotonic())))
+
+        self._count('failures')
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        if last_error is None or time.monotonic() >= expires:
+            raise DeadlineExceeded(f"no answer within the {self.deadline if deadline is None else deadline:g}s "
+                                   f"deadline (last error: {last_error})") from last_error
+        raise RemoteUnavailable(f"scoring failed after {self.retries + 1} attempts: {last_error}") from last_error
+
+    def predict_one(self, reading):
+        """Predicted class code for one [Type, air, process, rpm, torque, wear] reading"""
+        return self.predict([reading])[0][0]
+
+    def close(self):
+        if self.tokens is not None:
+            self.tokens.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.session.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time repeated predictions through WMLClient')
+    parser.add_argument('--endpoint', default=None, help='predictions URL (default: $WML_ENDPOINT_URL)')
+    parser.add_argument('--api-key', default=None, help='API key (default: $WML_API_KEY)')
+    parser.add_argument('--iam-url', default=None, help='token URL (default: $WML_IAM_URL or IBM IAM)')
+    parser.add_argument('--requests', type=int, default=20, help='predictions to send (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds per attempt (default: %(default)s)')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='seconds per prediction including retries (default: timeout x attempts)')
+    parser.add_argument('--retries', type=int, default=2, help='retries of transient failures (default: %(default)s)')
+    parser.add_argument('--hedge-after', type=float, default=None,
+                        help='duplicate attempts slower than this many seconds (default: no hedging)')
+    parser.add_argument('--breaker-threshold', type=int, default=5,
+                        help='consecutive failures that open the circuit (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    client = WMLClient.from_env(args.endpoint, args.api_key, args.iam_url, timeout=args.timeout,
+                                deadline=args.deadline, retries=args.retries, hedge_after=args.hedge_after,
+                                breaker=CircuitBreaker(args.breaker_threshold))
+    reading = ['L', 300.5, 310.2, 1500.0, 45.3, 120.0]
+    latencies = []
+    errors = {}
+    prediction = None
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        try:
+            prediction = client.predict_one(reading)
+            latencies.append(time.perf_counter() - start)
+        except RemoteUnavailable as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+    client.close()
+
+    print(f"Prediction: {prediction}")
+    if latencies:
+        rest = sorted(latencies[1:]) or latencies
+        print(f"First request (token + connection): {1000 * latencies[0]:.1f} ms")
+        print(f"Later requests: median {1000 * rest[len(rest) // 2]:.1f} ms, "
+              f"p99 {1000 * rest[min(len(rest) - 1, int(0.99 * len(rest)))]:.1f} ms, max {1000 * rest[-1]:.1f} ms")
+    print(f"Succeeded: {len(latencies)}/{args.requests}, failed: {errors or 0}")
+    print(f"Client: {client.stats}, circuit {client.breaker.state} (opened {client.breaker.times_opened}x)")
+    if client.tokens is not None:
+        print(f"Token fetches: {client.tokens.refreshes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Pipeline Stage Graph
+====================
+
+Runs the stages of PredictiveMaintenanceML as a dependency graph instead of
+a fixed chain. Every stage declares the pipeline state it reads (inputs)
+and the state it produces (outputs). Dependencies follow from the
+declaration order:
+
+- read after write:  a stage waits for the last earlier stage writing one of its inputs
+- write after read:  a stage waits for earlier stages still reading what it overwrites
+- write after write: a stage waits for the last earlier writer of its outputs
+
+So the declaration order is always a valid serial schedule, and every
+schedule the graph allows ends in the same state. Stages must replace the
+state they output rather than mutate objects another stage may still read.
+
+Ready stages start on a thread pool as soon as their dependencies finish;
+the heavy work inside them (scikit-learn forests, XGBoost, LightGBM, figure
+rendering in worker processes) releases the GIL. With one worker the
+stages run in declaration order on the calling thread, exactly as a chain.
+
+report() compares the run's wall time with the sum of its stage times
+(what the chain costs) and the critical path: the longest chain of
+dependent stages, which no number of workers can beat. Stages running at
+the same time share the CPUs and each takes longer, so the critical path
+of a serial run (one worker) is the estimate of the achievable wall time.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Stage:
+    """
+    One node of the graph
+
+    Parameters:
+    name: stage name (the pipeline method that runs it)
+    inputs: names of the state the stage reads
+    outputs: names of the state the stage writes
+    """
+
+    def __init__(self, name, inputs=(), outputs=()):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={list(self.inputs)}, outputs={list(self.outputs)})"
+
+
+class StageGraph:
+    """
+    Dependency graph of stages derived from their inputs and outputs
+
+    Parameters:
+    stages: Stage list in a valid serial order
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.order = [stage.name for stage in self.stages]
+        if len(set(self.order)) != len(self.order):
+            raise ValueError(f"Duplicate stage names in {self.order}")
+
+        self.dependencies = {}
+        last_writer = {}
+        readers = {}  # stages reading each name since its last write
+        for stage in self.stages:
+            after = {last_writer[name] for name in stage.inputs if name in last_writer}
+            for name in stage.outputs:
+                if name in last_writer:
+                    after.add(last_writer[name])
+                after.update(readers.get(name, ()))
+            after.discard(stage.name)
+            self.dependencies[stage.name] = after
+
+            for name in stage.inputs:
+                readers.setdefault(name, []).append(stage.name)
+            for name in stage.outputs:
+                last_writer[name] = stage.name
+                readers[name] = []
+
+        self.timings = {}
+        self.workers = None
+        self._start = None
+
+    def direct_dependencies(self, name):
+        """Dependencies of a stage that are not already implied by another one"""
+        after = self.dependencies[name]
+        implied = set()
+        for dependency in after:
+            implied |= self._ancestors(dependency)
+        return [stage for stage in self.order if stage in after and stage not in implied]
+
+    def _ancestors(self, name):
+        ancestors = set()
+        pending = list(self.dependencies[name])
+        while pending:
+            dependency = pending.pop()
+            if dependency not in ancestors:
+                ancestors.add(dependency)
+                pending.extend(self.dependencies[dependency])
+        return ancestors
+
+    def run(self, execute, max_workers=1):
+        """
+        Run every stage once all of its dependencies have finished
+
+        Parameters:
+        execute: callable running one stage, given its name
+        max_workers: stages running at the same time (1: declaration order on this thread)
+
+        After a failure no further stages start; running ones finish and the
+        first error is raised. self.timings keeps the stages that completed.
+        """
+        self.timings = {}
+        self.workers = max_workers
+        self._start = time.perf_counter()
+
+        if max_workers <= 1:
+            for name in self.order:
+                self._timed(execute, name)
+            return self
+
+        remaining = {name: set(after) for name, after in self.dependencies.items()}
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stage') as pool:
+            while remaining or running:
+                if error is None:
+                    # Declaration order among the ready stages keeps the schedule stable
+                    for name in [name for name in self.order if name in remaining and not remaining[name]]:
+                        del remaining[name]
+                        running[pool.submit(self._timed, execute, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    for after in remaining.values():
+                        after.discard(name)
+        if error is not None:
+            raise error
+        return self
+
+    def _timed(self, execute, name):
+        start = time.perf_counter() - self._start
+        execute(name)
+        self.timings[name] = (start, time.perf_counter() - self._start, threading.current_thread().name)
+
+    def report(self):
+        """
+        Critical path and concurrency of the last run
+
+        Returns:
+        JSON-serialisable dict: wall seconds, summed stage seconds and their
+        ratio (stages running on average), the critical path and its
+        seconds, and a per-stage list with start, seconds and slack
+        """
+        finished = [name for name in self.order if name in self.timings]
+        seconds = {name: self.timings[name][1] - self.timings[name][0] for name in finished}
+
+        # Longest chain of dependent stages ending with each stage
+        path_seconds, previous = {}, {}
+        for name in finished:
+            after = [dependency for dependency in self.dependencies[name] if dependency in path_seconds]
+            longest = max(after, key=path_seconds.get, default=None)
+            previous[name] = longest
+            path_seconds[name] = seconds[name] + (path_seconds[longest] if longest else 0.0)
+
+        # Longest chain starting with each stage, for the slack
+        tail_seconds = {}
+        for name in reversed(finished):
+            later = [stage for stage in finished if name in self.dependencies[stage]]
+            tail_seconds[name] = seconds[name] + max((tail_seconds[stage] for stage in later), default=0.0)
+
+        critical_seconds = max(path_seconds.values(), default=0.0)
+        critical_path = []
+        name = max(path_seconds, key=path_seconds.get) if path_seconds else None
+        while name is not None:
+            critical_path.append(name)
+            name = previous[name]
+        critical_path.reverse()
+
+        wall_seconds = max((self.timings[name][1] for name in finished), default=0.0)
+        stage_seconds = sum(seconds.values())
+        return {
+            'workers': self.workers,
+            'wall_seconds': wall_seconds,
+            'stage_seconds': stage_seconds,
+            'concurrency': stage_seconds / wall_seconds if wall_seconds else 1.0,
+            'critical_path_seconds': critical_seconds,
+            'critical_path': critical_path,
+            'max_speedup': stage_seconds / critical_seconds if critical_seconds else 1.0,
+            'stages': [{
+                'stage': name,
+                'after': self.direct_dependencies(name),
+                'start_seconds': self.timings[name][0],
+                'seconds': seconds[name],
+                'slack_seconds': critical_seconds - (path_seconds[name] + tail_seconds[name] - seconds[name]),
+                'thread': self.timings[name][2],
+            } for name in finished],
+        }
+
+
+def print_report(report):
+    """Print the per-stage schedule with the critical path marked"""
+    print(f"\n{'Stage':<28}{'Start s':>9}{'Wall s':>9}{'Slack s':>9}  After")
+    for stage in report['stages']:
+        mark = '*' if stage['stage'] in report['critical_path'] else ' '
+        print(f"{mark}{stage['stage']:<27}{stage['start_seconds']:>9.2f}{stage['seconds']:>9.2f}"
+              f"{stage['slack_seconds']:>9.2f}  {', '.join(stage['after'])}")
+    if report['workers'] <= 1:
+        print(f"⏱️  1 worker: {report['wall_seconds']:.1f}s wall; critical path (*) "
+              f"{report['critical_path_seconds']:.1f}s, so concurrent stages can be up to "
+              f"{report['max_speedup']:.2f}x faster given a CPU per stage")
+    else:
+        print(f"⏱️  {report['workers']} workers: {report['wall_seconds']:.1f}s wall for "
+              f"{report['stage_seconds']:.1f}s of stage time ({report['concurrency']:.2f} stages at once "
+              f"on average); critical path (*) {report['critical_path_seconds']:.1f}s")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Machine Fleet Telemetry Simulator
+=================================
+
+Streams time-series sensor readings from a simulated fleet of machines,
+for load-testing the scoring paths with realistic traffic.
+
+Each machine has a product type (L/M/H, in the same mix as
+create_sample_data.py) and emits a reading every --interval seconds, with
+start times spread evenly over the interval. Between readings:
+- tool wear grows by the type's wear per process (H/M/L: 5/3/2 min, as in
+  the AI4I dataset) and the tool is replaced at the end of its life or
+  after a tool wear or overstrain failure
+- air temperature follows a slow daily cycle plus a per-machine random walk,
+  and process temperature tracks it about 10 K higher
+- speed and torque vary per job, as in create_sample_data.py
+
+Failures are labelled with create_sample_data.label_failures, so streams
+follow the same rules as the training data.
+
+Readings are written in the training CSV layout (plus a Timestamp column)
+as CSV or JSON lines, to a file, stdout or a local socket:
+
+    python3 scripts/telemetry_simulator.py --machines 10000 --duration 60 --output -
+    python3 scripts/telemetry_simulator.py --machines 500 --duration 3600 --speedup 0 \\
+        --output data/telemetry.csv
+    python3 scripts/telemetry_simulator.py --machines 10000 --output tcp://127.0.0.1:9000
+"""
+
+import argparse
+import os
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from create_sample_data import PRODUCT_TYPES, PRODUCT_TYPE_P, label_failures
+
+# Tool wear added per process, by product type (minutes)
+WEAR_PER_READING = {'L': 2, 'M': 3, 'H': 5}
+
+# Tool life in minutes: a tool is replaced once it reaches a random limit in this range
+TOOL_LIFE_RANGE = (200, 240)
+
+# Failures after which the tool is replaced
+TOOL_REPLACING_FAILURES = ['Tool Wear Failure', 'Overstrain Failure']
+
+OUTPUT_COLUMNS = ['Timestamp', 'UDI', 'Product ID', 'Type', 'Air temperature [K]',
+                  'Process temperature [K]', 'Rotational speed [rpm]', 'Torque [Nm]',
+                  'Tool wear [min]', 'Machine failure', 'Failure Type']
+
+
+class Fleet:
+    """
+    State of N simulated machines
+
+    Parameters:
+    n_machines: fleet size
+    seed: seed of the fleet's np.random.Generator
+    """
+
+    def __init__(self, n_machines, seed=42):
+        self.rng = np.random.default_rng(seed)
+        self.n_machines = n_machines
+
+        self.types = self.rng.choice(PRODUCT_TYPES, n_machines, p=PRODUCT_TYPE_P)
+        self.machine_ids = np.array([f'{t}{i + 1:05d}' for i, t in enumerate(self.types)])
+        self.wear_per_reading = np.array([WEAR_PER_READING[t] for t in self.types], dtype=float)
+
+        # Machines start at random points of their tool's life
+        self.tool_life = self.rng.uniform(*TOOL_LIFE_RANGE, n_machines)
+        self.tool_wear = self.rng.uniform(0, self.tool_life)
+
+        # Per-machine air temperature offset (placement) and slow drift (random walk)
+        self.temp_offset = self.rng.normal(0, 1.0, n_machines)
+        self.temp_drift = np.zeros(n_machines)
+
+        self.next_udi = 1
+        self.tool_changes = 0
+
+    def read(self, machines, timestamp):
+        """
+        Advance the given machines by one process and return their readings
+
+        Parameters:
+        machines: indices of the machines emitting now
+        timestamp: simulated time (seconds since the epoch)
+
+        Returns:
+        DataFrame in OUTPUT_COLUMNS layout
+        """
+        n = len(machines)
+        rng = self.rng
+
+        # Tools past their life are replaced before the next process
+        worn_out = machines[self.tool_wear[machines] >= self.tool_life[machines]]
+        self._replace_tools(worn_out)
+        self.tool_wear[machines] += self.wear_per_reading[machines]
+
+        # Daily ambient cycle (peak mid-afternoon) plus per-machine drift
+        day_phase = 2 * np.pi * ((timestamp % 86400) / 86400 - 0.375)
+        self.temp_drift[machines] = 0.995 * self.temp_drift[machines] + rng.normal(0, 0.1, n)
+        air = (298.1 + 1.5 * np.sin(day_phase) + self.temp_offset[machines]
+               + self.temp_drift[machines] + rng.normal(0, 0.2, n))
+
+        readings = {
+            'Air temperature [K]': air,
+            'Process temperature [K]': air + rng.normal(10, 1.5, n),
+            'Rotational speed [rpm]': rng.normal(1538.8, 179.3, n),
+            'Torque [Nm]': rng.normal(40.17, 9.97, n),
+            'Tool wear [min]': self.tool_wear[machines].copy(),
+        }
+        readings['Machine failure'], readings['Failure Type'] = label_failures(readings, rng)
+
+        failed_tool = np.isin(readings['Failure Type'], TOOL_REPLACING_FAILURES)
+        self._replace_tools(machines[failed_tool])
+
+        df = pd.DataFrame(readings)
+        df.insert(0, 'Timestamp', datetime.fromtimestamp(timestamp, timezone.utc).isoformat())
+        df.insert(1, 'UDI', np.arange(self.next_udi, self.next_udi + n))
+        df.insert(2, 'Product ID', self.machine_ids[machines])
+        df.insert(3, 'Type', self.types[machines])
+        self.next_udi += n
+        return df
+
+    def _replace_tools(self, machines):
+        self.tool_wear[machines] = 0.0
+        self.tool_life[machines] = self.rng.uniform(*TOOL_LIFE_RANGE, len(machines))
+        self.tool_changes += len(machines)
+
+
+def _json_lines(df):
+    text = df.to_json(orient='records', lines=True)
+    return text if text.endswith('\n') else text + '\n'
+
+
+class FileSink:
+    """CSV or JSON-lines file"""
+
+    def __init__(self, path, fmt):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.fmt = fmt
+        self.file = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.file, index=False, header=self.header)
+            self.header = False
+        else:
+            self.file.write(_json_lines(df))
+
+    def close(self):
+        self.file.close()
+
+
+class StdoutSink(FileSink):
+    """Standard output (JSON lines by default)"""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.file = sys.stdout
+        self.header = True
+
+    def write(self, df):
+        super().write(df)
+        self.file.flush()
+
+    def close(self):
+        self.file.flush()
+
+
+class SocketSink:
+    """Newline-delimited JSON (or CSV rows) to a tcp://host:port or unix:///path listener"""
+
+    def __init__(self, address, fmt):
+        self.fmt = fmt
+        if address.startswith('unix://'):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address[len('unix://'):])
+        else:
+            host, port = address[len('tcp://'):].rsplit(':', 1)
+            self.sock = socket.create_connection((host, int(port)))
+        self.header = True
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            payload = df.to_csv(index=False, header=self.header)
+            self.header = False
+        else:
+            payload = _json_lines(df)
+        self.sock.sendall(payload.encode())
+
+    def close(self):
+        self.sock.close()
+
+
+def open_sink(output, fmt=None):
+    """Sink for '-' (stdout), tcp://host:port, unix:///path or a file path"""
+    if fmt is None:
+        is_csv_file = output.endswith('.csv') and '://' not in output
+        fmt = 'csv' if is_csv_file else 'jsonl'
+    if output == '-':
+        return StdoutSink(fmt)
+    if output.startswith(('tcp://', 'unix://')):
+        return SocketSink(output, fmt)
+    return FileSink(output, fmt)
+
+
+def send_slots(n_machines, interval, tick):
+    """
+    Machines emitting in each tick of an interval, spread evenly
+
+    Every machine reports once per interval, so the interval must be a whole
+    number of ticks; otherwise machines would report more or less often than
+    every `interval` seconds.
+
+    Parameters:
+    n_machines: fleet size
+    interval: seconds between two readings of one machine
+    tick: simulated seconds per emitted batch
+
+    Returns:
+    list with the machine indices of each tick, interval / tick entries
+    """
+    if tick <= 0 or interval <= 0:
+        raise ValueError(f"interval ({interval:g}s) and tick ({tick:g}s) must be positive")
+    ratio = interval / tick
+    n_slots = int(round(ratio))
+    if ratio < 1 - 1e-9:
+        raise ValueError(f"interval ({interval:g}s) is shorter than the tick ({tick:g}s)")
+    if abs(ratio - n_slots) > 1e-9 * ratio:
+        raise ValueError(f"interval ({interval:g}s) must be a whole number of ticks ({tick:g}s)")
+    slots = np.arange(n_machines) % n_slots
+    return [np.flatnonzero(slots == s) for s in range(n_slots)]
+
+
+def simulate(fleet, sink, duration, interval=1.0, tick=0.1, speedup=1.0, start_time=None,
+             log=None):
+    """
+    Emit readings for `duration` simulated seconds
+
+    Parameters:
+    fleet: Fleet to advance
+    sink: object with write(DataFrame)
+    duration: simulated seconds to run
+    interval: seconds between two readings of one machine
+    tick: simulated seconds per emitted batch; machines are spread over the
+          interval's ticks so traffic is smooth rather than one burst per interval
+          (interval must be a whole number of ticks, see send_slots)
+    speedup: simulated seconds per wall second (0 = as fast as possible)
+    start_time: simulated start (seconds since the epoch, default: now)
+    log: stream for progress lines (default: none)
+
+    Returns:
+    dict of run statistics
+    """
+    start_time = time.time() if start_time is None else start_time
+    machines_by_slot = send_slots(fleet.n_machines, interval, tick)
+    n_slots = len(machines_by_slot)
+
+    wall_start = time.perf_counter()
+    messages = failures = 0
+    max_lag = 0.0
+    next_log = 10.0
+
+    for k in range(int(round(duration / tick))):
+        sim_elapsed = k * tick
+        if speedup > 0:
+            lag = (time.perf_counter() - wall_start) - sim_elapsed / speedup
+            if lag < 0:
+                time.sleep(-lag)
+            max_lag = max(max_lag, lag)
+
+        machines = machines_by_slot[k % n_slots]
+        if len(machines) == 0:
+            continue
+        batch = fleet.read(machines, start_time + sim_elapsed)
+        sink.write(batch)
+        messages += len(batch)
+        failures += int(batch['Machine failure'].sum())
+
+        wall = time.perf_counter() - wall_start
+        if log is not None and wall >= next_log:
+            print(f"⏱️  {sim_elapsed:,.0f}s simulated, {messages:,} readings, "
+                  f"{messages / wall:,.0f}/s", file=log)
+            next_log += 10.0
+
+    wall = time.perf_counter() - wall_start
+    return {
+        'machines': fleet.n_machines,
+        'simulated_seconds': duration,
+        'wall_seconds': wall,
+        'messages': messages,
+        'messages_per_second': messages / wall if wall > 0 else float('inf'),
+        'target_messages_per_second': fleet.n_machines / interval * (speedup or float('inf')),
+        'failures': failures,
+        'tool_changes': fleet.tool_changes,
+        'max_lag_seconds': max_lag,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream telemetry from a simulated machine fleet')
+    parser.add_argument('--machines', type=int, default=1000, help='fleet size (default: %(default)s)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="seconds between a machine's readings (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=60.0,
+                        help='simulated seconds to run (default: %(default)s)')
+    parser.add_argument('--speedup', type=float, default=1.0,
+                        help='simulated seconds per wall second, 0 = as fast as possible (default: %(default)s)')
+    parser.add_argument('--tick', type=float, default=0.1,
+                        help='simulated seconds per emitted batch (default: %(default)s)')
+    parser.add_argument('--output', default='-',
+                        help="'-' (stdout), a .csv/.jsonl file, tcp://host:port or unix:///path "
+                             "(default: stdout)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                        help='record format (default: csv for .csv files, otherwise jsonl)')
+    parser.add_argument('--seed', type=int, default=42, help='fleet seed (default: %(default)s)')
+    args = parser.parse_args(argv)
+    try:
+        send_slots(args.machines, args.interval, args.tick)
+    except ValueError as e:
+        parser.error(f"{e}; use an --interval that is a multiple of --tick")
+
+    fleet = Fleet(args.machines, seed=args.seed)
+    sink = open_sink(args.output, args.format)
+    print(f"🏭 Simulating {args.machines:,} machines, one reading every {args.interval:g}s each "
+          f"-> {args.output}", file=sys.stderr)
+    try:
+        stats = simulate(fleet, sink, args.duration, interval=args.interval, tick=args.tick,
+                         speedup=args.speedup, log=sys.stderr)
+    except (KeyboardInterrupt, BrokenPipeError):
+        return
+    finally:
+        sink.close()
+
+    print(f"✅ {stats['messages']:,} readings in {stats['wall_seconds']:.1f}s "
+          f"({stats['messages_per_second']:,.0f}/s), {stats['failures']:,} failures, "
+          f"{stats['tool_changes']:,} tool changes, max lag {stats['max_lag_seconds']:.2f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,29 @@ for making predictions on new machinery sensor data.
 
 import sys
 import os
-sys.path.append('models')
 
+import joblib
 import pandas as pd
 import numpy as np
+from features import WINDOW_FEATURES, add_engineered_features
+from model_registry import resolve_model_dir
+from streaming_features import first_reading_features
+
+# Artifacts of the published version in use (or models/ itself when unversioned)
+MODEL_DIR = resolve_model_dir('models')
+
+# The version's own prediction script, falling back to the one in models/
+sys.path.append(MODEL_DIR)
+sys.path.append('models')
 from predict_failure import predict_failure
 
+def with_window_features(data):
+    """Add the window features the saved model uses; the test readings have no machine history"""
+    feature_names = joblib.load(os.path.join(MODEL_DIR, 'feature_names.pkl'))
+    if any(name in feature_names for name in WINDOW_FEATURES):
+        data = data.join(first_reading_features(data))
+    return data
+
 def test_single_prediction():
     """Test prediction with a single data point"""
     print("🔧 Testing Single Prediction...")
@@ -34,6 +51,8 @@ def test_single_prediction():
         'Stress_indicator': [12.0]
     })
     
+    sample_data = with_window_features(sample_data)
+
     # Get prediction
     prediction = predict_failure(sample_data)
     print(f"Predicted failure type: {prediction[0]}")
@@ -44,8 +63,7 @@ def test_single_prediction():
     print(f"Probabilities:")
     
     # Load label encoder to get class names
-    import joblib
-    le_failure = joblib.load('models/label_encoder_failure.pkl')
+    le_failure = joblib.load(os.path.join(MODEL_DIR, 'label_encoder_failure.pkl'))
     
     for class_name, prob in zip(le_failure.classes_, probabilities[0]):
         print(f"  {class_name}: {prob:.4f}")
@@ -69,6 +87,8 @@ def test_batch_predictions():
         'Stress_indicator': [2.42, 15.45, 1.08]
     })
     
+    batch_data = with_window_features(batch_data)
+
     # Get predictions
     predictions = predict_failure(batch_data)
     
@@ -89,7 +109,7 @@ def generate_test_features(air_temp, process_temp, rpm, torque, tool_wear, produ
     product_type: Product type (0=H, 1=L, 2=M)
     
     Returns:
-    DataFrame with all required features
+    DataFrame with the features the saved model uses
     """
     data = pd.DataFrame({
         'Air temperature [K]': [air_temp],
@@ -97,14 +117,12 @@ def generate_test_features(air_temp, process_temp, rpm, torque, tool_wear, produ
         'Rotational speed [rpm]': [rpm],
         'Torque [Nm]': [torque],
         'Tool wear [min]': [tool_wear],
-        'Type_encoded': [product_type],
-        'Temp_diff': [process_temp - air_temp],
-        'Power': [torque * rpm / 9549],
-        'Tool_wear_rate': [tool_wear / (rpm / 1000)],
-        'Temp_ratio': [process_temp / air_temp],
-        'Stress_indicator': [(torque * tool_wear) / rpm]
+        'Type_encoded': [product_type]
     })
-    return data
+    
+    # Only compute the engineered features that survived feature selection
+    feature_names = joblib.load(os.path.join(MODEL_DIR, 'feature_names.pkl'))
+    return add_engineered_features(with_window_features(data), features=feature_names)[feature_names]
 
 def test_different_scenarios():
     """Test predictions for different failure scenarios"""
@@ -179,7 +197,7 @@ def main():
         print("\n" + "=" * 50)
         print("✅ All tests completed successfully!")
         print("\n💡 Usage Tips:")
-        print("  - Ensure all 11 features are provided")
+        print("  - Ensure every feature in models/feature_names.pkl is provided")
         print("  - Features must be in correct units (K for temperature, rpm, Nm, minutes)")
         print("  - Type_encoded: 0=H, 1=L, 2=M")
         print("  - Use generate_test_features() helper for easy feature generation")